@@ -0,0 +1,235 @@
+import threading
+import time
+import numpy as np
+import pandas as pd
+from config import AGREGADOS_RECONCILIAR
+from paginacion import leer_filas
+from lecturas import en_paralelo
+import catalogos
+import copia_local
+
+# --- Cubo diario de producción, mantenido de forma incremental ---
+# El proceso guarda la producción sumada por (fecha, empresa, triot,
+# actividad) con cantidad, monto de producción y monto de venta, y el último
+# produccion.id ya sumado. Cada consulta solo trae las filas nuevas; las
+# ediciones hechas desde esta app se aplican como deltas (aplicar_cambios).
+# Las filas por sumar se acumulan y se compactan con un solo groupby cuando
+# alguien lee el cubo. Cada AGREGADOS_RECONCILIAR segundos se recalcula
+# todo, para recoger ediciones hechas por otros procesos; con copia local
+# (ver copia_local.py) ese recálculo lee la producción del disco.
+#
+# La empresa sale del trabajador (personal) y los montos de los valores de
+# la actividad. Todo el cubo se suma con los mismos catálogos, para que el
+# delta negativo de una edición reste lo mismo que se sumó: si cambian
+# empresas o valores, el cubo se recalcula entero.
+
+DIMENSIONES = ["fecha", "empresa", "triot", "actividad"]
+MEDIDAS = ["cantidad", "monto_produccion", "monto_venta"]
+_COLUMNAS = ["id", "fecha", "actividad", "trabajador", "triot", "cantidad"]
+
+_candado = threading.Lock()
+_cubo = pd.DataFrame({"fecha": pd.Series(dtype="datetime64[ns]"),
+                      **{c: pd.Series(dtype=object) for c in DIMENSIONES[1:]},
+                      **{c: pd.Series(dtype=float) for c in MEDIDAS}})
+_pendientes = []      # DataFrames (DIMENSIONES + MEDIDAS) por sumar al cubo
+_ultimo_id = 0
+_reconciliado = None  # instante del último recálculo completo
+_version = 0          # aumenta cada vez que el cubo cambia
+_rebanadas = {}       # (versión, consulta) -> resultado de consultar()
+_MAX_REBANADAS = 64
+_huella = None        # huella de los catálogos con que se sumó el cubo
+_valores_cache = (None, None)   # (versiones de personal y actividades, _valores())
+
+
+def _valores() -> tuple:
+    """
+    (empresa por trabajador, valores por actividad, huella) según los
+    catálogos en caché. La huella cambia solo si cambia alguna empresa o
+    algún valor, no cada vez que se renueva el catálogo.
+    """
+    global _valores_cache
+    pers, v_pers = catalogos.obtener_con_version("personal")
+    act, v_act = catalogos.obtener_con_version("actividades")
+    if _valores_cache[0] != (v_pers, v_act):
+        empresa = pd.Series(pers["empresa"].to_numpy(), index=pers["nombre"])
+        empresa = empresa[~empresa.index.duplicated()].fillna("(sin empresa)")
+        valores = act.drop_duplicates("descripcion").set_index("descripcion")
+        valores = valores[["valor_produccion", "valor_venta"]].apply(
+            pd.to_numeric, errors="coerce").fillna(0)
+        huella = (tuple(empresa.items()), tuple(valores.itertuples(name=None)))
+        _valores_cache = ((v_pers, v_act), (empresa, valores, huella))
+    return _valores_cache[1]
+
+
+def _enriquecer(df: pd.DataFrame, valores: tuple, signo: int = 1) -> pd.DataFrame:
+    """Filas de producción -> filas del cubo (empresa y montos según `valores`)."""
+    empresa, valores, _ = valores
+    cantidad = pd.to_numeric(df["cantidad"], errors="coerce").fillna(0).to_numpy() * signo
+    v_prod = df["actividad"].map(valores["valor_produccion"]).astype(float).fillna(0).to_numpy()
+    v_venta = df["actividad"].map(valores["valor_venta"]).astype(float).fillna(0).to_numpy()
+    return pd.DataFrame({
+        "fecha": pd.to_datetime(df["fecha"].astype(str).str[:10], errors="coerce").to_numpy(),
+        "empresa": df["trabajador"].map(empresa).fillna("(sin empresa)").to_numpy(),
+        "triot": df["triot"].fillna("").to_numpy(),
+        "actividad": df["actividad"].to_numpy(),
+        "cantidad": cantidad,
+        "monto_produccion": cantidad * v_prod,
+        "monto_venta": cantidad * v_venta,
+    })
+
+
+def _vaciar():
+    """Descarta lo sumado; el cubo se vuelve a sumar desde el primer registro."""
+    global _cubo, _ultimo_id, _reconciliado, _version, _huella
+    _cubo = _cubo.iloc[0:0]
+    _version += 1
+    _rebanadas.clear()
+    _pendientes.clear()
+    _ultimo_id = 0
+    _huella = None
+    _reconciliado = time.monotonic()
+
+
+def _incorporar_nuevas():
+    global _ultimo_id, _huella
+    if _ultimo_id == 0 and copia_local.activa():
+        df = copia_local.produccion(_COLUMNAS)
+        if len(df):
+            valores = _valores()
+            _pendientes.append(_enriquecer(df, valores))
+            _huella = valores[2]
+            _ultimo_id = int(df["id"].max())
+    # Las filas nuevas y los catálogos con que se enriquecen se leen a la vez
+    leido = en_paralelo({
+        "filas": lambda: leer_filas("produccion", ", ".join(_COLUMNAS), desde=_ultimo_id),
+        "valores": _valores,
+    })
+    filas, valores = leido["filas"], leido["valores"]
+    if _huella is not None and valores[2] != _huella:
+        # Cambiaron empresas o valores: lo ya sumado se recalcula con los nuevos
+        _vaciar()
+        return _incorporar_nuevas()
+    if filas:
+        _pendientes.append(_enriquecer(pd.DataFrame.from_records(filas, columns=_COLUMNAS), valores))
+        _huella = valores[2]
+        _ultimo_id = filas[-1]["id"]
+
+
+def _compactar():
+    global _cubo, _version
+    if not _pendientes:
+        return
+    _version += 1
+    _rebanadas.clear()
+    df = pd.concat([_cubo.astype({c: object for c in DIMENSIONES[1:]})] + _pendientes,
+                   ignore_index=True)
+    _pendientes.clear()
+    df = df.groupby(DIMENSIONES, sort=False)[MEDIDAS].sum().reset_index()
+    # Lo que quedó en cero tras borrar o editar registros
+    df = df[(df[MEDIDAS].abs() > 1e-9).any(axis=1)]
+    _cubo = df.sort_values(DIMENSIONES, ignore_index=True).astype(
+        {"empresa": "category", "triot": "category", "actividad": "category"})
+
+
+def refrescar():
+    """Suma las filas de producción posteriores al último id incorporado."""
+    with _candado:
+        if _reconciliado is None or time.monotonic() - _reconciliado > AGREGADOS_RECONCILIAR:
+            _vaciar()
+        _incorporar_nuevas()
+        _compactar()
+
+
+def reiniciar():
+    """Descarta el cubo; el próximo refrescar() recalcula todo."""
+    global _reconciliado
+    with _candado:
+        _reconciliado = None
+
+
+def aplicar_cambios(anteriores: list, nuevos: list):
+    """
+    Aplica ediciones de registros de producción ya incorporados.
+    `anteriores` y `nuevos` son dicts con id, fecha, actividad, trabajador,
+    triot y cantidad (los datos que falten en un nuevo se toman del
+    anterior con el mismo id); un borrado solo aparece en `anteriores`.
+    Las filas con id mayor al último incorporado se ignoran: las sumará el
+    próximo refrescar(). Si los catálogos cambiaron desde que se sumó el
+    cubo, el delta no restaría lo mismo que se sumó: en vez de aplicarlo,
+    el próximo refrescar() recalcula todo.
+    """
+    global _reconciliado
+    previos = {a["id"]: a for a in anteriores}
+    nuevos = [{**previos.get(n["id"], {}), **n} for n in nuevos]
+    valores = _valores()
+    with _candado:
+        if _huella is not None and valores[2] != _huella:
+            _reconciliado = None
+            return
+        for filas, signo in ((anteriores, -1), (nuevos, 1)):
+            filas = [f for f in filas if f["id"] <= _ultimo_id]
+            if filas:
+                _pendientes.append(_enriquecer(pd.DataFrame(filas), valores, signo))
+
+
+def aplicar_cambio(anterior: dict | None, nuevo: dict | None):
+    """aplicar_cambios() para un solo registro; None es inserción o borrado."""
+    aplicar_cambios([anterior] if anterior else [], [nuevo] if nuevo else [])
+
+
+def cubo() -> pd.DataFrame:
+    """
+    El cubo al día: una fila por (fecha, empresa, triot, actividad) con
+    cantidad, monto_produccion y monto_venta. Se comparte entre sesiones y
+    se reemplaza entero al cambiar: tratarlo como solo lectura.
+    """
+    return _al_dia()[0]
+
+
+def _al_dia():
+    refrescar()
+    with _candado:
+        return _cubo, _version
+
+
+def consultar(desde: str | None = None, hasta: str | None = None, empresas=(), triots=(),
+              actividades=(), por=("actividad",)) -> pd.DataFrame:
+    """
+    Rebanada del cubo: fechas entre `desde` y `hasta` (date o AAAA-MM-DD,
+    inclusive) y, si se indican, solo esas empresas, triots y actividades;
+    sumada por las dimensiones de `por` (en ese orden). Mientras el cubo no
+    cambie, la misma consulta se responde desde memoria.
+    """
+    c, version = _al_dia()
+    clave = (version, str(desde or "")[:10], str(hasta or "")[:10], tuple(sorted(empresas)),
+             tuple(sorted(triots)), tuple(sorted(actividades)), tuple(por))
+    resultado = _rebanadas.get(clave)
+    if resultado is None:
+        resultado = _rebanar(c, desde, hasta, empresas, triots, actividades, por)
+        with _candado:
+            if len(_rebanadas) >= _MAX_REBANADAS:
+                _rebanadas.pop(next(iter(_rebanadas)), None)
+            _rebanadas[clave] = resultado
+    return resultado.copy()
+
+
+def _rebanar(c, desde, hasta, empresas, triots, actividades, por) -> pd.DataFrame:
+    mascara = np.ones(len(c), dtype=bool)
+    fechas = c["fecha"].to_numpy()
+    if desde:
+        mascara &= fechas >= np.datetime64(str(desde)[:10])
+    if hasta:
+        mascara &= fechas <= np.datetime64(str(hasta)[:10])
+    for col, valores in (("empresa", empresas), ("triot", triots), ("actividad", actividades)):
+        if valores:
+            mascara &= c[col].isin(list(valores)).to_numpy()
+    rebanada = c[mascara]
+    por = list(por)
+    if not por:
+        return rebanada[MEDIDAS].sum().to_frame().T
+    return rebanada.groupby(por, observed=True, sort=True)[MEDIDAS].sum().reset_index()
+
+
+def totales_por_actividad() -> pd.DataFrame:
+    """DataFrame (actividad, cantidad) con la producción total por actividad."""
+    return consultar(por=["actividad"])[["actividad", "cantidad"]]
@@ -0,0 +1,457 @@
+import re
+import sqlite3
+from abc import ABC, abstractmethod
+import threading
+from config import ALMACENAMIENTO, SQLITE_PATH
+import instrumentacion
+import migrar_sqlite
+import resiliencia
+
+# --- Repositorio de datos ---
+# Todas las páginas acceden a las tablas a través de `repo`, que según
+# config.ALMACENAMIENTO es Supabase o el archivo SQLite local.
+#
+# Filtros: lista de tuplas (columna, operador, valor) con operador en
+#   eq, neq, gt, gte, lt, lte, in, ilike
+# Orden: lista de columnas; ("columna", True) ordena descendente.
+
+OPERADORES = ("eq", "neq", "gt", "gte", "lt", "lte", "in", "ilike")
+
+# Tablas editables en lote y dónde constan sus filas ya facturadas
+# (tabla de detalle del estado de pago, columna con el id)
+FACTURACION = {
+    "produccion": ("estados_pago_detalle", "produccion_id"),
+    "gastos": ("estados_pago_gastos", "gasto_id"),
+}
+
+
+def formatear_correlativo(n: int) -> str:
+    return f"EGTD-{n:02d}"
+
+
+def _orden_normalizado(orden):
+    return [(o, False) if isinstance(o, str) else (o[0], bool(o[1])) for o in orden]
+
+
+class Repositorio(ABC):
+    """Operaciones sobre tablas que usan los módulos de la app."""
+
+    @abstractmethod
+    def seleccionar(self, tabla: str, columnas: str = "*", filtros=(), orden=(),
+                    limite: int | None = None, desde: int | None = None) -> list:
+        """Filas (dicts) que cumplen `filtros`; `desde` es el offset."""
+
+    @abstractmethod
+    def insertar(self, tabla: str, filas) -> list:
+        """Inserta un dict o una lista de dicts y devuelve las filas creadas."""
+
+    @abstractmethod
+    def actualizar(self, tabla: str, datos: dict, filtros):
+        """Asigna `datos` a las filas que cumplen `filtros`."""
+
+    @abstractmethod
+    def upsert(self, tabla: str, filas: list, conflicto: str = "id"):
+        """
+        Inserta las filas o, si ya existe una con el mismo valor en las
+        columnas `conflicto` (separadas por coma, con índice único), la
+        reemplaza por los valores dados.
+        """
+
+    @abstractmethod
+    def eliminar(self, tabla: str, filtros):
+        """Borra las filas que cumplen `filtros`."""
+
+    @abstractmethod
+    def siguiente_correlativo(self) -> str:
+        """Próximo correlativo de estado de pago, sin consumirlo."""
+
+    @abstractmethod
+    def crear_estado_pago(self, empresa: str, fecha: str, total_produccion: float,
+                          total_gastos: float, neto: float,
+                          produccion_ids: list, gasto_ids: list) -> str:
+        """
+        Asigna el correlativo y guarda cabecera, detalle y gastos del estado
+        de pago en una sola operación atómica. Devuelve el correlativo.
+        Falla sin guardar nada si alguna línea ya estaba facturada.
+        """
+
+    @abstractmethod
+    def guardar_lote(self, tabla: str, nuevas: list, modificadas: list, borradas: list) -> dict:
+        """
+        Inserta `nuevas`, actualiza por id `modificadas` (dicts con id y las
+        columnas cambiadas) y borra los ids `borradas` en una sola operación
+        atómica. Si alguna fila por modificar o borrar ya no existe o está en
+        un estado de pago no guarda nada. Devuelve {"creadas": filas,
+        "faltantes": ids, "facturados": ids}. `tabla` debe estar en FACTURACION.
+        """
+
+    def uno(self, tabla: str, columnas: str = "*", filtros=()) -> dict | None:
+        """Primera fila que cumple `filtros`, o None."""
+        filas = self.seleccionar(tabla, columnas, filtros, limite=1)
+        return filas[0] if filas else None
+
+
+# --- Supabase ---
+
+class RepositorioSupabase(Repositorio):
+
+    def __init__(self, obtener_cliente):
+        # El cliente se crea en la primera consulta (ver config.cliente_supabase)
+        self._obtener_cliente = obtener_cliente
+
+    @property
+    def cliente(self):
+        return self._obtener_cliente()
+
+    @staticmethod
+    def _filtrar(consulta, filtros):
+        for col, op, valor in filtros:
+            consulta = getattr(consulta, "in_" if op == "in" else op)(col, valor)
+        return consulta
+
+    def seleccionar(self, tabla, columnas="*", filtros=(), orden=(), limite=None, desde=None):
+        consulta = self._filtrar(self.cliente.table(tabla).select(columnas), filtros)
+        for col, desc in _orden_normalizado(orden):
+            consulta = consulta.order(col, desc=desc)
+        if desde is not None:
+            consulta = consulta.range(desde, desde + (limite or 1000) - 1)
+        elif limite is not None:
+            consulta = consulta.limit(limite)
+        # Los reintentos los hace RepositorioResiliente, no postgrest
+        return consulta.retry(False).execute().data or []
+
+    def insertar(self, tabla, filas):
+        return self.cliente.table(tabla).insert(filas).execute().data or []
+
+    def actualizar(self, tabla, datos, filtros):
+        self._filtrar(self.cliente.table(tabla).update(datos), filtros).execute()
+
+    def upsert(self, tabla, filas, conflicto="id"):
+        self.cliente.table(tabla).upsert(list(filas), on_conflict=conflicto).execute()
+
+    def eliminar(self, tabla, filtros):
+        self._filtrar(self.cliente.table(tabla).delete(), filtros).execute()
+
+    # Funciones definidas en sql/estado_pago_atomico.sql
+    def siguiente_correlativo(self):
+        return self.cliente.rpc("siguiente_correlativo", {}).execute().data
+
+    def crear_estado_pago(self, empresa, fecha, total_produccion, total_gastos, neto,
+                          produccion_ids, gasto_ids):
+        return self.cliente.rpc("crear_estado_pago", {
+            "p_empresa": empresa,
+            "p_fecha": fecha,
+            "p_total_produccion": float(total_produccion),
+            "p_total_gastos": float(total_gastos),
+            "p_neto": float(neto),
+            "p_produccion_ids": [int(i) for i in produccion_ids],
+            "p_gasto_ids": [int(i) for i in gasto_ids],
+        }).execute().data
+
+    # Definida en sql/edicion_lote_atomica.sql
+    def guardar_lote(self, tabla, nuevas, modificadas, borradas):
+        return self.cliente.rpc("guardar_lote", {
+            "p_tabla": tabla,
+            "p_nuevas": list(nuevas),
+            "p_modificadas": list(modificadas),
+            "p_borradas": [int(i) for i in borradas],
+        }).execute().data
+
+
+# --- SQLite ---
+
+_IDENTIFICADOR = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+_SQL_OPERADOR = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<=",
+                 "ilike": "LIKE"}
+
+
+def _ident(nombre: str) -> str:
+    nombre = nombre.strip()
+    if not _IDENTIFICADOR.match(nombre):
+        raise ValueError(f"Identificador no válido: {nombre!r}")
+    return f'"{nombre}"'
+
+
+class RepositorioSQLite(Repositorio):
+    """
+    Mismo esquema que Supabase sobre un archivo SQLite (productividad_fibra.db).
+    Cada hilo de Streamlit usa su propia conexión. No modifica el esquema:
+    vistas, índices, triggers y secuencias los crea migrar_sqlite.py.
+    """
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self._local = threading.local()
+
+    def _conexion(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.ruta, timeout=30)
+            conn.row_factory = sqlite3.Row
+            if migrar_sqlite.version(conn) < migrar_sqlite.VERSION:
+                conn.close()
+                raise RuntimeError(f"La base {self.ruta} no está migrada: ejecuta "
+                                   f"python migrar_sqlite.py {self.ruta}")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _columnas(columnas: str) -> str:
+        if columnas.strip() == "*":
+            return "*"
+        return ", ".join(_ident(c) for c in columnas.split(","))
+
+    @staticmethod
+    def _where(filtros):
+        partes, params = [], []
+        for col, op, valor in filtros:
+            if op == "in":
+                valores = list(valor)
+                partes.append(f"{_ident(col)} IN ({', '.join('?' * len(valores))})")
+                params.extend(valores)
+            else:
+                partes.append(f"{_ident(col)} {_SQL_OPERADOR[op]} ?")
+                params.append(valor)
+        return (" WHERE " + " AND ".join(partes) if partes else ""), params
+
+    def seleccionar(self, tabla, columnas="*", filtros=(), orden=(), limite=None, desde=None):
+        where, params = self._where(filtros)
+        sql = f"SELECT {self._columnas(columnas)} FROM {_ident(tabla)}{where}"
+        if orden:
+            sql += " ORDER BY " + ", ".join(
+                f"{_ident(c)} {'DESC' if d else 'ASC'}" for c, d in _orden_normalizado(orden)
+            )
+        if limite is not None or desde is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limite if limite is not None else -1, desde or 0]
+        return [dict(r) for r in self._conexion().execute(sql, params)]
+
+    def insertar(self, tabla, filas):
+        filas = [filas] if isinstance(filas, dict) else list(filas)
+        if not filas:
+            return []
+        cols = list(filas[0])
+        sql = (f"INSERT INTO {_ident(tabla)} ({', '.join(_ident(c) for c in cols)}) "
+               f"VALUES ({', '.join('?' * len(cols))}) RETURNING *")
+        conn = self._conexion()
+        with conn:
+            creadas = [dict(conn.execute(sql, [f.get(c) for c in cols]).fetchone())
+                       for f in filas]
+        return creadas
+
+    def actualizar(self, tabla, datos, filtros):
+        where, params = self._where(filtros)
+        sets = ", ".join(f"{_ident(c)} = ?" for c in datos)
+        conn = self._conexion()
+        with conn:
+            conn.execute(f"UPDATE {_ident(tabla)} SET {sets}{where}", list(datos.values()) + params)
+
+    def upsert(self, tabla, filas, conflicto="id"):
+        filas = list(filas)
+        if not filas:
+            return
+        cols = list(filas[0])
+        claves = [c.strip() for c in conflicto.split(",")]
+        sets = ", ".join(f"{_ident(c)} = excluded.{_ident(c)}" for c in cols if c not in claves)
+        sql = (f"INSERT INTO {_ident(tabla)} ({', '.join(_ident(c) for c in cols)}) "
+               f"VALUES ({', '.join('?' * len(cols))}) "
+               f"ON CONFLICT ({', '.join(_ident(c) for c in claves)}) "
+               + (f"DO UPDATE SET {sets}" if sets else "DO NOTHING"))
+        conn = self._conexion()
+        with conn:
+            conn.executemany(sql, [[f.get(c) for c in cols] for f in filas])
+
+    def eliminar(self, tabla, filtros):
+        where, params = self._where(filtros)
+        conn = self._conexion()
+        with conn:
+            conn.execute(f"DELETE FROM {_ident(tabla)}{where}", params)
+
+    def siguiente_correlativo(self):
+        fila = self._conexion().execute(
+            "SELECT valor FROM secuencias WHERE nombre = 'estados_pago'").fetchone()
+        return formatear_correlativo(fila["valor"] + 1)
+
+    def crear_estado_pago(self, empresa, fecha, total_produccion, total_gastos, neto,
+                          produccion_ids, gasto_ids):
+        prod = [int(i) for i in produccion_ids]
+        gast = [int(i) for i in gasto_ids]
+        conn = self._conexion()
+        # BEGIN IMMEDIATE toma el bloqueo de escritura: la verificación de
+        # duplicados y la asignación del número no pueden intercalarse.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for tabla, col, ids in (("estados_pago_detalle", "produccion_id", prod),
+                                    ("estados_pago_gastos", "gasto_id", gast)):
+                if ids and conn.execute(
+                    f"SELECT 1 FROM {tabla} WHERE {col} IN ({', '.join('?' * len(ids))}) LIMIT 1",
+                    ids
+                ).fetchone():
+                    raise ValueError(f"Hay registros en {tabla} que ya están en otro estado de pago")
+            n = conn.execute(
+                "UPDATE secuencias SET valor = valor + 1 WHERE nombre = 'estados_pago' RETURNING valor"
+            ).fetchone()["valor"]
+            corr = formatear_correlativo(n)
+            conn.execute(
+                "INSERT INTO estados_pago (correlativo, fecha, empresa, total_produccion, total_gastos, neto) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (corr, fecha, empresa, float(total_produccion), float(total_gastos), float(neto))
+            )
+            conn.executemany("INSERT INTO estados_pago_detalle (correlativo, produccion_id) VALUES (?, ?)",
+                             [(corr, i) for i in prod])
+            conn.executemany("INSERT INTO estados_pago_gastos (correlativo, gasto_id) VALUES (?, ?)",
+                             [(corr, i) for i in gast])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return corr
+
+    def guardar_lote(self, tabla, nuevas, modificadas, borradas):
+        detalle, columna = FACTURACION[tabla]
+        tabla = _ident(tabla)
+        ids = [int(f["id"]) for f in modificadas] + [int(i) for i in borradas]
+        marcas = ", ".join("?" * len(ids))
+        conn = self._conexion()
+        # Como en crear_estado_pago: nadie puede borrar ni facturar estas
+        # filas entre la verificación y la escritura
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            existentes = {r[0] for r in conn.execute(
+                f"SELECT id FROM {tabla} WHERE id IN ({marcas})", ids)} if ids else set()
+            facturados = sorted({r[0] for r in conn.execute(
+                f"SELECT {columna} FROM {detalle} WHERE {columna} IN ({marcas})", ids)}) if ids else []
+            faltantes = sorted(set(ids) - existentes)
+            if faltantes or facturados:
+                conn.rollback()
+                return {"creadas": [], "faltantes": faltantes, "facturados": facturados}
+            for fila in modificadas:
+                datos = {c: v for c, v in fila.items() if c != "id"}
+                if datos:
+                    sets = ", ".join(f"{_ident(c)} = ?" for c in datos)
+                    conn.execute(f"UPDATE {tabla} SET {sets} WHERE id = ?",
+                                 list(datos.values()) + [int(fila["id"])])
+            if borradas:
+                conn.execute(f"DELETE FROM {tabla} WHERE id IN ({', '.join('?' * len(borradas))})",
+                             [int(i) for i in borradas])
+            creadas = []
+            if nuevas:
+                cols = list(nuevas[0])
+                sql = (f"INSERT INTO {tabla} ({', '.join(_ident(c) for c in cols)}) "
+                       f"VALUES ({', '.join('?' * len(cols))}) RETURNING *")
+                creadas = [dict(conn.execute(sql, [f.get(c) for c in cols]).fetchone())
+                           for f in nuevas]
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return {"creadas": creadas, "faltantes": [], "facturados": []}
+
+
+# --- Resiliencia ---
+
+class RepositorioResiliente(Repositorio):
+    """
+    Pasa cada operación por el cortocircuito de resiliencia.py y reintenta
+    las lecturas ante fallas transitorias. Las escrituras no se reintentan:
+    una inserción que llegó a la base pero cuya respuesta se perdió se
+    duplicaría.
+    """
+
+    def __init__(self, interno: Repositorio):
+        self.interno = interno
+
+    def seleccionar(self, tabla, columnas="*", filtros=(), orden=(), limite=None, desde=None):
+        return resiliencia.ejecutar(
+            lambda: self.interno.seleccionar(tabla, columnas, filtros, orden, limite, desde), True
+        )
+
+    def insertar(self, tabla, filas):
+        return resiliencia.ejecutar(lambda: self.interno.insertar(tabla, filas), False)
+
+    def actualizar(self, tabla, datos, filtros):
+        return resiliencia.ejecutar(lambda: self.interno.actualizar(tabla, datos, filtros), False)
+
+    def upsert(self, tabla, filas, conflicto="id"):
+        return resiliencia.ejecutar(lambda: self.interno.upsert(tabla, filas, conflicto), False)
+
+    def eliminar(self, tabla, filtros):
+        return resiliencia.ejecutar(lambda: self.interno.eliminar(tabla, filtros), False)
+
+    def siguiente_correlativo(self):
+        # Solo consulta la secuencia, no la consume
+        return resiliencia.ejecutar(self.interno.siguiente_correlativo, True)
+
+    def crear_estado_pago(self, *args, **kwargs):
+        return resiliencia.ejecutar(lambda: self.interno.crear_estado_pago(*args, **kwargs), False)
+
+    def guardar_lote(self, tabla, nuevas, modificadas, borradas):
+        return resiliencia.ejecutar(
+            lambda: self.interno.guardar_lote(tabla, nuevas, modificadas, borradas), False
+        )
+
+
+# --- Instrumentación ---
+
+class RepositorioInstrumentado(Repositorio):
+    """Anota cada operación del repositorio interno (ver instrumentacion.py)."""
+
+    def __init__(self, interno: Repositorio):
+        self.interno = interno
+
+    def seleccionar(self, tabla, columnas="*", filtros=(), orden=(), limite=None, desde=None):
+        return instrumentacion.medir(
+            tabla, "seleccionar", filtros,
+            lambda: self.interno.seleccionar(tabla, columnas, filtros, orden, limite, desde)
+        )
+
+    def insertar(self, tabla, filas):
+        return instrumentacion.medir(
+            tabla, "insertar", (), lambda: self.interno.insertar(tabla, filas)
+        )
+
+    def actualizar(self, tabla, datos, filtros):
+        return instrumentacion.medir(
+            tabla, "actualizar", filtros, lambda: self.interno.actualizar(tabla, datos, filtros)
+        )
+
+    def upsert(self, tabla, filas, conflicto="id"):
+        return instrumentacion.medir(
+            tabla, "upsert", (), lambda: self.interno.upsert(tabla, filas, conflicto)
+        )
+
+    def eliminar(self, tabla, filtros):
+        return instrumentacion.medir(
+            tabla, "eliminar", filtros, lambda: self.interno.eliminar(tabla, filtros)
+        )
+
+    def siguiente_correlativo(self):
+        return instrumentacion.medir(
+            "estados_pago", "siguiente_correlativo", (), self.interno.siguiente_correlativo
+        )
+
+    def crear_estado_pago(self, *args, **kwargs):
+        return instrumentacion.medir(
+            "estados_pago", "crear_estado_pago", (),
+            lambda: self.interno.crear_estado_pago(*args, **kwargs)
+        )
+
+    def guardar_lote(self, tabla, nuevas, modificadas, borradas):
+        return instrumentacion.medir(
+            tabla, "guardar_lote", (),
+            lambda: self.interno.guardar_lote(tabla, nuevas, modificadas, borradas)
+        )
+
+
+def crear_repositorio(tipo: str = ALMACENAMIENTO) -> Repositorio:
+    if tipo == "sqlite":
+        interno = RepositorioSQLite(SQLITE_PATH)
+    elif tipo == "supabase":
+        from config import cliente_supabase
+        interno = RepositorioResiliente(RepositorioSupabase(cliente_supabase))
+    else:
+        raise ValueError(f"ALMACENAMIENTO desconocido: {tipo!r}")
+    return RepositorioInstrumentado(interno)
+
+
+repo = crear_repositorio()
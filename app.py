@@ -1,11 +1,18 @@
+import time
+_inicio = time.perf_counter()
+
 import streamlit as st
 import hashlib
-from config import supabase
+import importlib
+from almacenamiento import repo
+import instrumentacion
+import resiliencia
 
-import mantenimiento_usuarios
-# (los demás módulos que cargas abajo)
+# pandas, fpdf y el cliente de Supabase no se importan aquí: la pantalla de
+# login no los necesita y cada sección trae los suyos al cargarse.
+instrumentacion.marcar_arranque("importaciones de app.py", time.perf_counter() - _inicio)
 
-# --- Funciones de autenticación con Supabase ---
+# --- Funciones de autenticación ---
 
 def hash_password(password: str) -> str:
     """SHA-256 de la contraseña."""
@@ -13,28 +20,16 @@ def hash_password(password: str) -> str:
 
 def verificar_usuario(usuario: str, contrasena: str) -> str | None:
     """
-    Comprueba en Supabase que el usuario exista y la contraseña hashee coincida.
+    Comprueba en la base de datos que el usuario exista y la contraseña hashee coincida.
     Devuelve el rol si OK, o None si falla o no hay filas.
     """
     hashed = hash_password(contrasena)
     try:
-        resp = (
-            supabase
-            .table("usuarios")
-            .select("usuario, password, rol")
-            .eq("usuario", usuario)
-            .maybe_single()
-            .execute()
-        )
+        fila = repo.uno("usuarios", "usuario, password, rol", [("usuario", "eq", usuario)])
     except Exception:
         # Si la consulta lanza cualquier excepción, tratamos como fallo de login
         return None
 
-    # Si resp es None o no viene el atributo data, o data es None → fallo
-    if resp is None or not hasattr(resp, "data") or resp.data is None:
-        return None
-
-    fila = resp.data
     # Aseguramos que fila sea un dict (y no lista u otro tipo)
     if not isinstance(fila, dict):
         return None
@@ -65,27 +60,83 @@ def mostrar_login():
                     st.error("❌ Usuario o contraseña incorrectos")
 
 
-# --- Función para cargar secciones ---
-
-def cargar_seccion(nombre):
-    if nombre == "Resumen de Producción":
-        import resumen_produccion; resumen_produccion.app()
-    elif nombre == "Ingreso de Producción":
-        import ingreso_produccion; ingreso_produccion.app()
-    elif nombre == "Mantenimiento de Actividades":
-        import mantenimiento_actividades; mantenimiento_actividades.app()
-    elif nombre == "Mantenimiento de Personal":
-        import mantenimiento_personal; mantenimiento_personal.app()
-    elif nombre == "Mantenimiento de Tramos":
-        import mantenimiento_tramos; mantenimiento_tramos.app()
-    elif nombre == "Mantenimiento de Usuarios":
-        mantenimiento_usuarios.app()
-    elif nombre == "Mantenimiento de Empresas":
-        import mantenimiento_empresas; mantenimiento_empresas.app()
-    elif nombre == "Registro de Gastos":
-        import registro_gastos; registro_gastos.app()
-    elif nombre == "Creación de Estado de Pago":
-        import creacion_estado_pago; creacion_estado_pago.app()
+# --- Panel de rendimiento ---
+
+def mostrar_panel_rendimiento():
+    """Cascada de consultas de la ejecución actual, con totales y exportación."""
+    import pandas as pd
+    filas = instrumentacion.consultas()
+    st.markdown("### 📈 Rendimiento")
+    arranque = instrumentacion.arranque()
+    if arranque:
+        with st.expander("Arranque del proceso (en frío)"):
+            st.dataframe([{"etapa": k, "ms": v} for k, v in arranque.items()],
+                         use_container_width=True, hide_index=True)
+    if not filas:
+        st.caption("Sin consultas en esta ejecución.")
+        return
+    df = pd.DataFrame(filas)
+    c1, c2 = st.columns(2)
+    c1.metric("Consultas", len(df))
+    c2.metric("Tiempo total", f"{df['duracion_ms'].sum():,.0f} ms")
+    c1.metric("Filas", f"{df['filas'].fillna(0).sum():,.0f}")
+    c2.metric("Datos", f"{df['bytes'].sum() / 1024:,.1f} KB")
+
+    # Cascada: cada barra va del inicio al fin de la consulta
+    df["fin_ms"] = df["inicio_ms"] + df["duracion_ms"]
+    df["consulta"] = [f"{i + 1:02d} {r.operacion} {r.tabla}" for i, r in enumerate(df.itertuples())]
+    st.vega_lite_chart(df, {
+        "mark": "bar",
+        "encoding": {
+            "y": {"field": "consulta", "type": "nominal", "sort": None, "title": None},
+            "x": {"field": "inicio_ms", "type": "quantitative", "title": "ms"},
+            "x2": {"field": "fin_ms"},
+            "tooltip": [{"field": c} for c in ["tabla", "operacion", "filtros",
+                                               "duracion_ms", "filas", "bytes"]],
+        },
+    }, use_container_width=True)
+    st.dataframe(df[["consulta", "filtros", "duracion_ms", "filas", "bytes"]],
+                 use_container_width=True, hide_index=True)
+    st.download_button("Exportar JSONL", instrumentacion.a_jsonl(filas),
+                       "consultas.jsonl", "application/jsonl")
+
+
+# --- Registro de secciones ---
+# Sección -> (módulo, roles que pueden usarla). El módulo se importa solo
+# cuando se abre la sección, y las que el rol no puede usar no se ofrecen.
+
+TODOS = ("admin", "editor", "visualizador")
+EDICION = ("admin", "editor")
+
+SECCIONES = {
+    "Resumen de Producción": ("resumen_produccion", TODOS),
+    "Avance de Tramos": ("avance_tramos", TODOS),
+    "Ingreso de Producción": ("ingreso_produccion", EDICION),
+    "Mantenimiento de Actividades": ("mantenimiento_actividades", EDICION),
+    "Mantenimiento de Personal": ("mantenimiento_personal", EDICION),
+    "Mantenimiento de Tramos": ("mantenimiento_tramos", EDICION),
+    "Mantenimiento de Usuarios": ("mantenimiento_usuarios", ("admin",)),
+    "Mantenimiento de Empresas": ("mantenimiento_empresas", EDICION),
+    "Registro de Gastos": ("registro_gastos", EDICION),
+    "Creación de Estado de Pago": ("creacion_estado_pago", EDICION),
+}
+
+
+def secciones_permitidas(rol: str) -> list:
+    """Secciones que puede usar `rol`, en el orden del menú."""
+    return [nombre for nombre, (_, roles) in SECCIONES.items() if rol in roles]
+
+
+def cargar_seccion(nombre, rol):
+    """Importa el módulo de la sección (la primera vez) y la dibuja."""
+    modulo, roles = SECCIONES[nombre]
+    if rol not in roles:
+        st.error("⛔ No tienes permiso para esta sección.")
+        return
+    t0 = time.perf_counter()
+    seccion = importlib.import_module(modulo)
+    instrumentacion.marcar_arranque(f"importar {modulo}", time.perf_counter() - t0)
+    seccion.app()
 
 
 # --- Inicio de la app ---
@@ -97,23 +148,33 @@ if "autenticado" not in st.session_state:
 
 if not st.session_state["autenticado"]:
     mostrar_login()
+    instrumentacion.marcar_arranque("pantalla de login", time.perf_counter() - _inicio)
 else:
+    # Copia local de producción y catálogos (ver copia_local.py): se abre una
+    # vez por proceso y se pone al día en segundo plano
+    t0 = time.perf_counter()
+    import copia_local
+    copia_local.iniciar()
+    instrumentacion.marcar_arranque("copia local", time.perf_counter() - t0)
     with st.sidebar:
         st.markdown(f"### 👋 Hola, {st.session_state['usuario'].capitalize()}")
-        seccion = st.radio("Navegación", [
-            "Resumen de Producción",
-            "Ingreso de Producción",
-            "Mantenimiento de Actividades",
-            "Mantenimiento de Personal",
-            "Mantenimiento de Tramos",
-            "Mantenimiento de Usuarios",
-            "Mantenimiento de Empresas",
-            "Registro de Gastos",
-            "Creación de Estado de Pago"
-        ])
+        seccion = st.radio("Navegación", secciones_permitidas(st.session_state["rol"]))
+        panel = st.checkbox("Panel de rendimiento", key="panel_rendimiento")
         if st.button("Cerrar sesión"):
             st.session_state.clear()
             st.rerun()
 
-    st.title(f"📋 {seccion}")
-    cargar_seccion(seccion)
+    if panel:
+        instrumentacion.iniciar_registro()
+    if resiliencia.circuito.abierto:
+        st.warning("⚠️ La base de datos no responde: se muestran los catálogos guardados en "
+                   "memoria y por ahora no se pueden guardar cambios.")
+    if seccion is None:
+        st.warning("⚠️ Tu rol no tiene secciones asignadas.")
+    else:
+        st.title(f"📋 {seccion}")
+        cargar_seccion(seccion, st.session_state["rol"])
+    instrumentacion.marcar_arranque("primera sección", time.perf_counter() - _inicio)
+    if panel:
+        with st.sidebar:
+            mostrar_panel_rendimiento()
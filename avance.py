@@ -0,0 +1,260 @@
+import threading
+import time
+import numpy as np
+import pandas as pd
+from config import AGREGADOS_RECONCILIAR
+from paginacion import leer_filas
+from esquemas import metros
+import catalogos
+import copia_local
+
+# --- Avance de tramos por metros cubiertos ---
+# Cada registro de producción declara los metros [inicio, fin] que trabajó
+# en un tramo. Los registros se solapan, así que sumar cantidades exagera el
+# avance: aquí se unen los intervalos de cada tramo con un barrido (ordenar
+# por inicio y llevar el mayor fin visto), vectorizado para todos los tramos
+# a la vez, y se comparan con la extensión del tramo en el catálogo.
+#
+# Los intervalos se guardan en memoria y se completan de forma incremental
+# (solo las filas con id mayor al último leído), como en agregados.py; las
+# ediciones hechas desde esta app recargan sus filas con recargar(). Cada
+# AGREGADOS_RECONCILIAR segundos se vuelven a leer todos (de la copia local,
+# si la hay).
+
+_COLUMNAS = ["id", "triot", "tramo", "actividad", "inicio", "fin"]
+TOLERANCIA = 0.5    # metros sin cubrir que aún cuentan como tramo completo
+
+_candado = threading.Lock()
+_intervalos = pd.DataFrame({"id": pd.Series(dtype="int64"),
+                            **{c: pd.Series(dtype=object) for c in _COLUMNAS[1:4]},
+                            "inicio": pd.Series(dtype=float), "fin": pd.Series(dtype=float)})
+_pendientes = []
+_ultimo_id = 0
+_reconciliado = None
+_generacion = 0     # cambia cuando filas ya leídas se releen o se descartan
+
+
+def _a_intervalos(df: pd.DataFrame) -> pd.DataFrame:
+    a, b = metros(df["inicio"]), metros(df["fin"])
+    # Un registro puede venir con inicio > fin (se midió en sentido contrario)
+    return df.assign(inicio=np.fmin(a, b), fin=np.fmax(a, b))
+
+
+def _compactar():
+    global _intervalos
+    if _pendientes:
+        _intervalos = pd.concat([_intervalos] + _pendientes, ignore_index=True)
+        _pendientes.clear()
+
+
+def _refrescar():
+    global _intervalos, _ultimo_id, _reconciliado, _generacion
+    if _reconciliado is None or time.monotonic() - _reconciliado > AGREGADOS_RECONCILIAR:
+        _generacion += 1
+        _intervalos = _intervalos.iloc[0:0]
+        _pendientes.clear()
+        _ultimo_id = 0
+        _reconciliado = time.monotonic()
+        if copia_local.activa():
+            df = copia_local.produccion(_COLUMNAS)
+            if len(df):
+                _pendientes.append(_a_intervalos(df))
+                _ultimo_id = int(df["id"].max())
+    filas = leer_filas("produccion", ", ".join(_COLUMNAS), desde=_ultimo_id)
+    if filas:
+        _pendientes.append(_a_intervalos(pd.DataFrame.from_records(filas, columns=_COLUMNAS)))
+        _ultimo_id = filas[-1]["id"]
+    _compactar()
+
+
+def intervalos(actividades=()) -> pd.DataFrame:
+    """
+    Intervalos de producción al día (id, triot, tramo, actividad, inicio,
+    fin en metros, inicio <= fin), solo de `actividades` si se indican.
+    Se comparten entre sesiones: tratarlos como solo lectura.
+    """
+    with _candado:
+        _refrescar()
+        df = _intervalos
+    if actividades:
+        df = df[df["actividad"].isin(list(actividades))]
+    return df
+
+
+def recargar(ids: list):
+    """Vuelve a leer los registros `ids` (editados o borrados desde esta app)."""
+    global _intervalos, _generacion
+    ids = [int(i) for i in ids]
+    if not ids:
+        return
+    with _candado:
+        if _reconciliado is None:
+            return
+        _generacion += 1
+        _compactar()
+        _intervalos = _intervalos[~_intervalos["id"].isin(ids)]
+        ya_leidos = [i for i in ids if i <= _ultimo_id]
+        if ya_leidos:
+            filas = leer_filas("produccion", ", ".join(_COLUMNAS), [("id", "in", ya_leidos)])
+            if filas:
+                nuevas = _a_intervalos(pd.DataFrame.from_records(filas, columns=_COLUMNAS))
+                _intervalos = pd.concat([_intervalos, nuevas], ignore_index=True)
+
+
+def instantanea():
+    """
+    (generación, intervalos()) leídos juntos. La generación cambia cuando
+    los intervalos dejan de ser una extensión de los anteriores (filas
+    releídas o descartadas); si no cambió, lo único nuevo son las filas con
+    id mayor a las ya vistas.
+    """
+    with _candado:
+        _refrescar()
+        return _generacion, _intervalos
+
+
+def reiniciar():
+    """Descarta los intervalos; la próxima consulta los lee todos."""
+    global _reconciliado
+    with _candado:
+        _reconciliado = None
+
+# --- Barrido ---
+
+def _extension(tramos: pd.DataFrame) -> pd.DataFrame:
+    t = tramos.drop_duplicates(["triot", "tramo"])
+    a, b = metros(t["inicio"]), metros(t["fin"])
+    inicio, fin = np.fmin(a, b), np.fmax(a, b)
+    return pd.DataFrame({"triot": t["triot"].to_numpy(), "tramo": t["tramo"].to_numpy(),
+                         "inicio": inicio, "fin": fin,
+                         "largo": np.nan_to_num(fin - inicio)})
+
+
+def _barrer(iv: pd.DataFrame, ext: pd.DataFrame):
+    """
+    Intervalos recortados a su tramo y ordenados por (tramo, inicio).
+    Devuelve (g, a, b, previo, primero): posición del tramo en `ext`,
+    inicio, fin, mayor fin de los intervalos anteriores del mismo tramo y
+    si es el primero del tramo.
+    """
+    clave = pd.MultiIndex.from_arrays([ext["triot"], ext["tramo"]])
+    g = clave.get_indexer(pd.MultiIndex.from_arrays([iv["triot"], iv["tramo"]]))
+    a, b = iv["inicio"].to_numpy(dtype=float), iv["fin"].to_numpy(dtype=float)
+    ok = (g >= 0) & np.isfinite(a) & np.isfinite(b)
+    g, a, b = g[ok], a[ok], b[ok]
+    lo, hi = ext["inicio"].to_numpy()[g], ext["fin"].to_numpy()[g]
+    a, b = np.maximum(a, lo), np.minimum(b, hi)
+    ok = b > a      # fuera del tramo, o de largo cero (p. ej. una MUFA)
+    g, a, b = g[ok], a[ok], b[ok]
+    orden = np.lexsort((a, g))
+    g, a, b = g[orden], a[orden], b[orden]
+
+    # Máximo acumulado de fin dentro de cada tramo con un solo accumulate:
+    # cada tramo se desplaza a su propia franja para que no se mezclen.
+    if len(g):
+        base = np.nanmin(ext["inicio"].to_numpy())
+        franja = np.nanmax(ext["fin"].to_numpy()) - base + 1
+        desplazado = np.maximum.accumulate(b - base + g * franja)
+        previo = np.empty_like(b)
+        previo[0] = -np.inf
+        previo[1:] = desplazado[:-1] - g[1:] * franja + base
+    else:
+        previo = b.copy()
+    primero = np.ones(len(g), dtype=bool)
+    primero[1:] = g[1:] != g[:-1]
+    previo[primero] = -np.inf
+    return g, a, b, previo, primero
+
+
+def calcular(iv: pd.DataFrame, tramos: pd.DataFrame) -> pd.DataFrame:
+    """
+    Avance por tramo a partir de los intervalos (ver intervalos()) y el
+    catálogo de tramos: largo, metros declarados, cubiertos (la unión),
+    solapados (declarados de más), sin cubrir, cantidad de huecos y % de
+    avance. Los intervalos se recortan a la extensión del tramo.
+    """
+    ext = _extension(tramos)
+    n = len(ext)
+    g, a, b, previo, primero = _barrer(iv, ext)
+    declarado = np.bincount(g, b - a, minlength=n)
+    cubierto = np.bincount(g, np.maximum(0, b - np.maximum(a, previo)), minlength=n)
+
+    # Huecos: antes del primer intervalo, entre bloques y después del último
+    huecos = np.bincount(g, (a > previo) & ~primero, minlength=n)
+    inicio_tramo = ext["inicio"].to_numpy()
+    huecos += np.bincount(g[primero], a[primero] > inicio_tramo[g[primero]], minlength=n).astype(int)
+    ultimo = np.ones(len(g), dtype=bool)
+    ultimo[:-1] = g[:-1] != g[1:]
+    fin_bloque = np.maximum(previo, b)[ultimo]
+    huecos += np.bincount(g[ultimo], fin_bloque < ext["fin"].to_numpy()[g[ultimo]],
+                          minlength=n).astype(int)
+    largo = ext["largo"].to_numpy()
+    sin_registros = np.bincount(g, minlength=n) == 0
+    huecos[sin_registros] = (largo[sin_registros] > 0).astype(int)
+
+    largo_seguro = np.where(largo > 0, largo, np.nan)
+    return ext.assign(
+        registros=np.bincount(g, minlength=n),
+        declarado=declarado,
+        cubierto=cubierto,
+        solapado=declarado - cubierto,
+        sin_cubrir=np.maximum(0, largo - cubierto),
+        huecos=huecos.astype(int),
+        avance=np.nan_to_num(100 * cubierto / largo_seguro),
+    )
+
+
+def listar_huecos(iv: pd.DataFrame, tramos: pd.DataFrame) -> pd.DataFrame:
+    """Tramos de metros sin producción: (triot, tramo, desde, hasta, metros)."""
+    ext = _extension(tramos)
+    g, a, b, previo, primero = _barrer(iv, ext)
+    ini, fin = ext["inicio"].to_numpy(), ext["fin"].to_numpy()
+    ultimo = np.ones(len(g), dtype=bool)
+    ultimo[:-1] = g[:-1] != g[1:]
+    cierre = np.maximum(previo, b)
+    sin = np.setdiff1d(np.flatnonzero(ext["largo"].to_numpy() > 0), g)
+    entre = (a > previo) & ~primero
+    delante = primero & (a > ini[g])
+    detras = ultimo & (cierre < fin[g])
+    partes = [
+        (g[entre], previo[entre], a[entre]),
+        (g[delante], ini[g[delante]], a[delante]),
+        (g[detras], cierre[detras], fin[g[detras]]),
+        (sin, ini[sin], fin[sin]),
+    ]
+    pos = np.concatenate([p[0] for p in partes]).astype(int)
+    desde = np.concatenate([p[1] for p in partes])
+    hasta = np.concatenate([p[2] for p in partes])
+    df = pd.DataFrame({"triot": ext["triot"].to_numpy()[pos], "tramo": ext["tramo"].to_numpy()[pos],
+                       "desde": desde, "hasta": hasta, "metros": hasta - desde, "_g": pos})
+    return df.sort_values(["_g", "desde"]).drop(columns="_g").reset_index(drop=True)
+
+
+def resumir_por_triot(por_tramo: pd.DataFrame) -> pd.DataFrame:
+    """Avance de cada TRIOT a partir del resultado de calcular()."""
+    df = por_tramo.assign(completo=(por_tramo["largo"] > 0) & (por_tramo["sin_cubrir"] <= TOLERANCIA))
+    r = df.groupby("triot", sort=True).agg(
+        tramos=("tramo", "size"), completos=("completo", "sum"),
+        largo=("largo", "sum"), declarado=("declarado", "sum"), cubierto=("cubierto", "sum"),
+        solapado=("solapado", "sum"), sin_cubrir=("sin_cubrir", "sum"), huecos=("huecos", "sum"),
+    ).reset_index()
+    r["avance"] = np.nan_to_num(100 * r["cubierto"] / r["largo"].where(r["largo"] > 0))
+    return r
+
+# --- Consultas ---
+
+def por_tramo(actividades=()) -> pd.DataFrame:
+    """calcular() con la producción al día y el catálogo de tramos."""
+    return calcular(intervalos(actividades), catalogos.obtener("tramos"))
+
+
+def por_triot(actividades=()) -> pd.DataFrame:
+    """Avance por TRIOT con la producción al día."""
+    return resumir_por_triot(por_tramo(actividades))
+
+
+def huecos(triot: str, actividades=()) -> pd.DataFrame:
+    """listar_huecos() de un TRIOT."""
+    iv = intervalos(actividades)
+    tramos = catalogos.obtener("tramos")
+    return listar_huecos(iv[iv["triot"] == triot], tramos[tramos["triot"] == triot])
@@ -0,0 +1,103 @@
+import streamlit as st
+import avance
+import catalogos
+import solapes
+
+# Columnas de avance.py como se muestran en las tablas
+ETIQUETAS = {
+    "triot": "TRIOT",
+    "tramo": "Tramo",
+    "inicio": "Inicio",
+    "fin": "Fin",
+    "largo": "Largo (m)",
+    "tramos": "Tramos",
+    "completos": "Completos",
+    "registros": "Registros",
+    "declarado": "Declarado (m)",
+    "cubierto": "Cubierto (m)",
+    "solapado": "Solapado (m)",
+    "sin_cubrir": "Sin cubrir (m)",
+    "huecos": "Huecos",
+    "avance": "Avance",
+    "desde": "Desde",
+    "hasta": "Hasta",
+    "metros": "Metros",
+    "actividad": "Actividad",
+    "contra": "Se solapa con",
+    "exacto": "Idéntico",
+}
+_FORMATO = {
+    "Avance": st.column_config.ProgressColumn("Avance", format="%.1f %%", min_value=0, max_value=100),
+}
+
+# --- Módulo de Avance de Tramos ---
+
+def app():
+    st.subheader("📏 Avance de Tramos")
+    st.caption("Metros cubiertos por la producción en cada tramo: los registros que se "
+               "solapan cuentan una sola vez.")
+
+    actividades = st.multiselect(
+        "Actividades", catalogos.obtener("actividades")["descripcion"].tolist(),
+        help="Vacío: todas las actividades con inicio y fin en metros.", key="av_actividades")
+    try:
+        por_tramo = avance.por_tramo(actividades)
+    except Exception as e:
+        st.error(f"⚠️ Error al calcular el avance: {e}")
+        return
+    if por_tramo.empty:
+        st.info("No hay tramos registrados.")
+        return
+    por_triot = avance.resumir_por_triot(por_tramo)
+
+    largo, cubierto = por_triot["largo"].sum(), por_triot["cubierto"].sum()
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Avance", f"{100 * cubierto / largo:.1f} %" if largo else "—")
+    m2.metric("Metros cubiertos", f"{cubierto:,.0f} / {largo:,.0f}")
+    m3.metric("Tramos completos", f"{por_triot['completos'].sum()} / {por_triot['tramos'].sum()}")
+    m4.metric("Metros solapados", f"{por_triot['solapado'].sum():,.0f}")
+
+    st.markdown("#### Por TRIOT")
+    st.dataframe(por_triot.rename(columns=ETIQUETAS), column_config=_FORMATO,
+                 use_container_width=True, hide_index=True)
+
+    st.markdown("#### Detalle de un TRIOT")
+    triot = st.selectbox("TRIOT", por_triot["triot"].tolist(), key="av_triot")
+    detalle = por_tramo[por_tramo["triot"] == triot].drop(columns="triot")
+    st.dataframe(detalle.rename(columns=ETIQUETAS), column_config=_FORMATO,
+                 use_container_width=True, hide_index=True)
+    huecos = avance.huecos(triot, actividades)
+    if huecos.empty:
+        st.success("✅ Sin metros pendientes en este TRIOT.")
+    else:
+        st.dataframe(huecos.drop(columns="triot").rename(columns=ETIQUETAS),
+                     use_container_width=True, hide_index=True)
+
+    seccion_solapes(actividades)
+
+
+def seccion_solapes(actividades):
+    with st.expander("🔍 Registros solapados"):
+        st.caption("Registros de producción cuyos metros ya estaban registrados para la misma "
+                   "actividad y tramo: duplicados o trabajo que se pagaría dos veces.")
+        if not st.button("Revisar producción guardada", key="av_solapes"):
+            return
+        try:
+            cruces = solapes.revisar_existentes(actividades)
+        except Exception as e:
+            st.error(f"⚠️ Error al revisar los solapes: {e}")
+            return
+        if cruces.empty:
+            st.success("✅ No hay registros solapados.")
+            return
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Registros solapados", len(cruces))
+        c2.metric("Idénticos", int(cruces["exacto"].sum()))
+        c3.metric("Metros solapados", f"{cruces['metros'].sum():,.0f}")
+        tabla = cruces.rename(columns=ETIQUETAS)
+        st.dataframe(tabla, use_container_width=True, hide_index=True)
+        st.download_button("Descargar", tabla.to_csv(index=False), "solapes_produccion.csv",
+                           "text/csv")
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,186 @@
+"""
+Mide las funciones de datos de cada sección de app.py sobre una base SQLite
+(ver generar_datos.py) y compara con una línea base guardada.
+
+    python benchmark.py --db bench_fibra.db --salida resultados.json \
+        --base benchmarks/base.json [--guardar-base] [--copia-local]
+
+Termina con código 1 si alguna medición empeora más que --tolerancia.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+
+def _medir(funcion, repeticiones, preparar=None):
+    tiempos = []
+    for _ in range(repeticiones):
+        if preparar:
+            preparar()
+        t0 = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - t0)
+    return {
+        "mediana_s": statistics.median(tiempos),
+        "min_s": min(tiempos),
+        "repeticiones": repeticiones,
+    }
+
+
+# Intérprete nuevo que importa streamlit y ejecuta app.py sin servidor (la
+# pantalla de login): mide el arranque en frío de un worker.
+_ARRANQUE = "import runpy, streamlit; runpy.run_path('app.py', run_name='__main__')"
+
+
+def arranque_frio():
+    subprocess.run([sys.executable, "-c", _ARRANQUE], check=True, capture_output=True,
+                   cwd=os.path.dirname(os.path.abspath(__file__)))
+
+
+def casos():
+    """Lista de (nombre, función, preparación) a medir."""
+    import catalogos
+    import copia_local
+    import agregados
+    import avance
+    import solapes
+    import resumen_produccion
+    import ingreso_produccion
+    import creacion_estado_pago
+    import cache_pdf
+    import pdf_estado_pago
+    import registro_gastos
+    import mantenimiento_personal
+    import grilla
+
+    empresa = catalogos.nombres_empresas()[0]
+    datos = {}
+
+    def leer_estado():
+        datos["prod"] = creacion_estado_pago.leer_produccion(empresa)
+        datos["gast"] = creacion_estado_pago.leer_gastos(empresa)
+
+    def pdf():
+        prod, gast = datos["prod"], datos["gast"]
+        tp = prod["Monto Producción"].sum() if not prod.empty else 0
+        tg = gast["monto"].sum() if not gast.empty else 0
+        pdf_estado_pago.generar_pdf_bytes(
+            "EGTD-BENCH", empresa, "2025-01-01", prod, gast, tp, tg, tp - tg)
+
+    def pdf_cache():
+        prod, gast = datos["prod"], datos["gast"]
+        tp = prod["Monto Producción"].sum() if not prod.empty else 0
+        tg = gast["monto"].sum() if not gast.empty else 0
+        cache_pdf.pdf_estado_pago("EGTD-BENCH", empresa, "2025-01-01", prod, gast, tp, tg, tp - tg)
+
+    def catalogos_ingreso():
+        ingreso_produccion.leer_actividades()
+        ingreso_produccion.leer_personal()
+        ingreso_produccion.leer_tramos()
+
+    # Con --copia-local los recálculos en frío leen la copia creada aquí
+    copia = [
+        ("copia_local.sincronizar_completa", lambda: copia_local.sincronizar(completa=True), None),
+        ("copia_local.sincronizar", lambda: copia_local.sincronizar(forzar=True), None),
+    ] if copia_local.activa() else []
+
+    return copia + [
+        ("app.arranque_frio", arranque_frio, None),
+        ("ingreso.catalogos_frio", catalogos_ingreso, catalogos.invalidar),
+        ("ingreso.catalogos_caliente", catalogos_ingreso, None),
+        ("ingreso.leer_produccion", ingreso_produccion.leer_produccion, None),
+        ("resumen.calcular_frio", resumen_produccion.calcular_resumen, agregados.reiniciar),
+        ("resumen.calcular_caliente", resumen_produccion.calcular_resumen, None),
+        ("resumen.semana_por_empresa_triot", lambda: resumen_produccion.calcular_resumen(
+            *resumen_produccion.rango_periodo("Esta semana"), por=["empresa", "triot"]), None),
+        ("avance.por_triot_frio", avance.por_triot, avance.reiniciar),
+        ("avance.por_triot_caliente", avance.por_triot, None),
+        ("solapes.buscar", lambda: solapes.buscar("TRIOT-001", "1", "ACTIVIDAD 001", "0", "300"), None),
+        ("solapes.revisar_existentes", solapes.revisar_existentes, None),
+        ("estado_pago.leer_produccion", lambda: creacion_estado_pago.leer_produccion(empresa), None),
+        ("estado_pago.leer_gastos", lambda: creacion_estado_pago.leer_gastos(empresa), None),
+        ("estado_pago.generar_pdf_bytes", pdf, leer_estado),
+        # Primera repetición renderiza; las siguientes leen el archivo
+        ("estado_pago.pdf_cache", pdf_cache, None),
+        ("gastos.listar_gastos", registro_gastos.listar_gastos, None),
+        ("personal.listar_personal", mantenimiento_personal.listar_personal, catalogos.invalidar),
+        ("personal.pagina_grilla", lambda: grilla.leer_pagina(
+            "personal", "id, nombre, rut, cargo, empresa", "empresa", True, ("SUBCONTRATO 050", 10**9)), None),
+    ]
+
+
+def comparar(resultados, base, tolerancia):
+    """Devuelve lista de (nombre, actual, base, razón) que empeoraron."""
+    regresiones = []
+    for nombre, r in resultados.items():
+        previo = base.get(nombre)
+        if not previo:
+            continue
+        razon = r["mediana_s"] / previo["mediana_s"] if previo["mediana_s"] else 1.0
+        r["razon_vs_base"] = round(razon, 3)
+        if razon > 1 + tolerancia:
+            regresiones.append((nombre, r["mediana_s"], previo["mediana_s"], razon))
+    return regresiones
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--db", default="bench_fibra.db")
+    p.add_argument("--repeticiones", type=int, default=5)
+    p.add_argument("--salida", default="benchmark_resultados.json")
+    p.add_argument("--base", default=os.path.join("benchmarks", "base.json"))
+    p.add_argument("--guardar-base", action="store_true",
+                   help="Guarda estos resultados como nueva línea base")
+    p.add_argument("--tolerancia", type=float, default=0.25,
+                   help="Empeoramiento relativo permitido (0.25 = 25%%)")
+    p.add_argument("--copia-local", action="store_true",
+                   help="Medir con la copia local de producción (copia_local.py)")
+    a = p.parse_args()
+
+    if not os.path.exists(a.db):
+        sys.exit(f"No existe {a.db}; créala con generar_datos.py")
+    # Debe definirse antes de importar config
+    os.environ["ALMACENAMIENTO"] = "sqlite"
+    os.environ["SQLITE_PATH"] = a.db
+    os.environ["PDF_CACHE_DIR"] = tempfile.mkdtemp(prefix="bench_pdf_")
+    os.environ["COPIA_LOCAL_DIR"] = tempfile.mkdtemp(prefix="bench_copia_") if a.copia_local else ""
+
+    resultados = {}
+    for nombre, funcion, preparar in casos():
+        resultados[nombre] = _medir(funcion, a.repeticiones, preparar)
+        print(f"{nombre:32s} {resultados[nombre]['mediana_s'] * 1000:10.1f} ms")
+
+    base = {}
+    if os.path.exists(a.base):
+        with open(a.base, encoding="utf-8") as f:
+            base = json.load(f)["resultados"]
+    regresiones = comparar(resultados, base, a.tolerancia)
+
+    informe = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "db": a.db,
+        "python": platform.python_version(),
+        "maquina": platform.node(),
+        "resultados": resultados,
+    }
+    with open(a.salida, "w", encoding="utf-8") as f:
+        json.dump(informe, f, indent=2, ensure_ascii=False)
+    if a.guardar_base:
+        os.makedirs(os.path.dirname(a.base) or ".", exist_ok=True)
+        with open(a.base, "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=2, ensure_ascii=False)
+
+    for nombre, actual, previo, razon in regresiones:
+        print(f"⚠️ Regresión en {nombre}: {actual * 1000:.1f} ms vs {previo * 1000:.1f} ms (x{razon:.2f})")
+    sys.exit(1 if regresiones else 0)
+
+
+if __name__ == "__main__":
+    main()
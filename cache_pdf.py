@@ -0,0 +1,110 @@
+import hashlib
+import os
+import tempfile
+import threading
+import numpy as np
+import pandas as pd
+from config import PDF_CACHE_DIR, PDF_CACHE_MB
+from pdf_estado_pago import generar_pdf_bytes, PLANTILLA_VERSION
+
+# --- Caché en disco de PDFs de estados de pago ---
+# Cada PDF se guarda con el hash de lo que determina su contenido
+# (correlativo, empresa, fecha, ids de producción y gastos, montos,
+# agrupación y versión de la plantilla); si nada de eso cambió, se sirve el
+# archivo en lugar de volver a renderizar. Las lecturas actualizan la fecha
+# de modificación y, al superar PDF_CACHE_MB, se borran los menos usados.
+
+_candado = threading.Lock()
+
+
+def _ids(ids) -> bytes:
+    return np.sort(np.asarray(ids, dtype="int64")).tobytes()
+
+
+def clave(corr, empresa, fecha, produccion_ids, gasto_ids, tot_p, tot_g, neto,
+          agrupar_por=None) -> str:
+    """Hash hexadecimal que identifica el PDF."""
+    h = hashlib.sha256()
+    cabecera = [PLANTILLA_VERSION, corr, empresa, fecha, agrupar_por or "",
+                f"{float(tot_p):.2f}", f"{float(tot_g):.2f}", f"{float(neto):.2f}"]
+    h.update("\x1f".join(str(c) for c in cabecera).encode("utf-8"))
+    h.update(b"\x1eP" + _ids(produccion_ids))
+    h.update(b"\x1eG" + _ids(gasto_ids))
+    return h.hexdigest()
+
+
+def _ruta(k: str) -> str:
+    return os.path.join(PDF_CACHE_DIR, f"{k}.pdf")
+
+
+def leer(k: str) -> bytes | None:
+    """PDF guardado con la clave `k`, o None."""
+    ruta = _ruta(k)
+    try:
+        with open(ruta, "rb") as f:
+            pdf = f.read()
+        os.utime(ruta)
+        return pdf
+    except FileNotFoundError:
+        return None
+
+
+def guardar(k: str, pdf: bytes):
+    """Guarda el PDF (escritura atómica) y aplica el límite de tamaño."""
+    os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=PDF_CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf)
+        os.replace(tmp, _ruta(k))
+    except Exception:
+        os.unlink(tmp)
+        raise
+    podar()
+
+
+def podar(limite_mb: float | None = None):
+    """Borra los PDFs menos usados hasta quedar bajo el límite."""
+    limite = (PDF_CACHE_MB if limite_mb is None else limite_mb) * 1024 * 1024
+    with _candado:
+        try:
+            entradas = [e for e in os.scandir(PDF_CACHE_DIR) if e.name.endswith(".pdf")]
+        except FileNotFoundError:
+            return
+        archivos = []
+        for e in entradas:
+            try:
+                st = e.stat()
+            except FileNotFoundError:
+                continue
+            archivos.append((st.st_mtime, st.st_size, e.path))
+        total = sum(a[1] for a in archivos)
+        for _, tamano, ruta in sorted(archivos):
+            if total <= limite:
+                break
+            try:
+                os.unlink(ruta)
+            except FileNotFoundError:
+                pass
+            total -= tamano
+
+
+def pdf_estado_pago(corr, empresa, fecha, df_prod, df_g, tot_p, tot_g, neto,
+                    agrupar_por=None) -> bytes:
+    """
+    Igual que generar_pdf_bytes, pero pasando por la caché. Las líneas se
+    emiten ordenadas por id, para que el mismo contenido dé el mismo PDF.
+    """
+    k = clave(corr, empresa, fecha, df_prod.get("id", []), df_g.get("id", []),
+              tot_p, tot_g, neto, agrupar_por)
+    pdf = leer(k)
+    if pdf is None:
+        pdf = generar_pdf_bytes(corr, empresa, fecha, por_id(df_prod), por_id(df_g),
+                                tot_p, tot_g, neto, agrupar_por=agrupar_por)
+        guardar(k, pdf)
+    return pdf
+
+
+def por_id(df: pd.DataFrame) -> pd.DataFrame:
+    """Líneas en el orden canónico con que se renderizan."""
+    return df.sort_values("id", ignore_index=True) if "id" in df.columns else df
@@ -0,0 +1,133 @@
+import threading
+import time
+import pandas as pd
+from config import CATALOGO_TTL
+from paginacion import leer_dataframe
+from resiliencia import es_transitorio
+
+# --- Caché compartida de catálogos ---
+# Los catálogos se guardan a nivel de proceso: todas las sesiones de Streamlit
+# del mismo worker leen el mismo DataFrame. Se tratan como solo lectura; quien
+# necesite modificarlos debe trabajar sobre una copia (df.copy()).
+#
+# Si la base de datos falla de forma transitoria (o el cortocircuito de
+# resiliencia.py está abierto) al renovar un catálogo, se sigue sirviendo la
+# última copia cargada, aunque esté vencida o invalidada.
+
+_CONSULTAS = {
+    "actividades": (
+        ["id", "codigo", "descripcion", "unidad", "grupo", "tipo",
+         "valor_produccion", "valor_venta"],
+        ["descripcion"],
+    ),
+    "personal": (["id", "nombre", "rut", "cargo", "empresa"], ["nombre"]),
+    "tramos": (
+        ["id", "triot", "tramo", "inicio", "fin", "mufa_inicio", "mufa_fin"],
+        ["triot", "tramo"],
+    ),
+    "empresas": (
+        ["id", "nombre", "rut", "representante", "direccion", "correo"],
+        ["nombre"],
+    ),
+}
+
+_entradas = {}                      # tabla -> (instante de carga, DataFrame)
+_indice_tramos = (None, {})         # (versión de "tramos", índice)
+_candado_indice = threading.Lock()
+_versiones = {t: 0 for t in _CONSULTAS}
+_candados = {t: threading.Lock() for t in _CONSULTAS}
+
+
+def _descargar(tabla: str) -> pd.DataFrame:
+    columnas, orden = _CONSULTAS[tabla]
+    return leer_dataframe(tabla, ", ".join(columnas), orden=orden + ["id"], clave=None)
+
+
+def obtener(tabla: str, permitir_vencida: bool = True) -> pd.DataFrame:
+    """
+    Devuelve el catálogo `tabla` desde la caché del proceso.
+    Solo consulta la base de datos si no hay copia o si superó CATALOGO_TTL.
+    Con `permitir_vencida`, una falla transitoria al renovarlo devuelve la
+    copia anterior en lugar de lanzar la excepción.
+    """
+    return obtener_con_version(tabla, permitir_vencida)[0]
+
+
+def obtener_con_version(tabla: str, permitir_vencida: bool = True) -> tuple:
+    """
+    Como obtener(), pero devuelve (DataFrame, versión) leídos juntos bajo el
+    candado del catálogo: la versión es la de ese DataFrame aunque otro hilo
+    lo renueve justo después.
+    """
+    with _candados[tabla]:
+        entrada = _entradas.get(tabla)
+        if entrada is None or time.monotonic() - entrada[0] > CATALOGO_TTL:
+            try:
+                df = _descargar(tabla)
+            except Exception as e:
+                if entrada is None or not permitir_vencida or not es_transitorio(e):
+                    raise
+                return entrada[1], _versiones[tabla]
+            entrada = (time.monotonic(), df)
+            _entradas[tabla] = entrada
+            _versiones[tabla] += 1
+        return entrada[1], _versiones[tabla]
+
+
+def invalidar(*tablas: str):
+    """
+    Marca como vencida la copia en memoria de los catálogos indicados (o de
+    todos): la próxima lectura los vuelve a consultar.
+    """
+    for tabla in tablas or tuple(_CONSULTAS):
+        with _candados[tabla]:
+            entrada = _entradas.get(tabla)
+            if entrada is not None:
+                _entradas[tabla] = (float("-inf"), entrada[1])
+
+
+def sembrar(tabla: str, df: pd.DataFrame, antiguedad: float):
+    """
+    Carga una copia guardada fuera del proceso (ver copia_local.py) si aún
+    no hay ninguna en memoria. Cuenta como cargada hace `antiguedad`
+    segundos, así que vence según CATALOGO_TTL como cualquier otra.
+    """
+    with _candados[tabla]:
+        if tabla not in _entradas:
+            _entradas[tabla] = (time.monotonic() - antiguedad, df)
+            _versiones[tabla] += 1
+
+
+def tablas() -> list:
+    """Nombres de los catálogos en caché."""
+    return list(_CONSULTAS)
+
+
+def version(tabla: str) -> int:
+    """Contador que aumenta cada vez que se carga una copia nueva del catálogo."""
+    return _versiones[tabla]
+
+
+def nombres_empresas() -> list:
+    """Lista de nombres de empresas (subcontratos) ordenada."""
+    return obtener("empresas")["nombre"].tolist()
+
+
+def indice_tramos() -> dict:
+    """
+    Índice {triot: {tramo: registro}} del catálogo de tramos, en el orden
+    del catálogo; cada registro es un dict con inicio, fin, mufa_inicio y
+    mufa_fin. Se arma una vez por versión del catálogo y se comparte entre
+    sesiones, así los selectores en cascada son búsquedas en diccionarios.
+    Si un (triot, tramo) está repetido, vale el primero.
+    """
+    global _indice_tramos
+    df, actual = obtener_con_version("tramos")
+    with _candado_indice:
+        # Si otro hilo ya armó el de una versión posterior, sirve ese
+        if _indice_tramos[0] is None or _indice_tramos[0] < actual:
+            indice = {}
+            for registro in df.to_dict("records"):
+                indice.setdefault(registro["triot"], {}).setdefault(registro["tramo"], registro)
+            _indice_tramos = (actual, indice)
+        return _indice_tramos[1]
@@ -1,6 +1,95 @@
 import os
-from supabase import create_client
+
+# Almacenamiento de datos: "supabase" o "sqlite" (archivo local, sin red;
+# se prepara una vez con migrar_sqlite.py)
+ALMACENAMIENTO = os.getenv("ALMACENAMIENTO", "supabase")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "productividad_fibra.db")
 
 url = os.getenv("SUPABASE_URL")
 key = os.getenv("SUPABASE_KEY")
-supabase = create_client(url, key)
+_cliente = None
+
+
+def cliente_supabase():
+    """
+    Cliente de Supabase, creado en la primera consulta y no al importar:
+    importar supabase (httpx, postgrest...) alarga el arranque del proceso.
+    """
+    global _cliente
+    if _cliente is None:
+        from supabase import create_client, ClientOptions
+        from resiliencia import cliente_http
+        _cliente = create_client(url, key, ClientOptions(httpx_client=cliente_http()))
+    return _cliente
+
+
+def __getattr__(nombre):
+    # Compatibilidad con `from config import supabase`
+    if nombre == "supabase":
+        return cliente_supabase() if ALMACENAMIENTO == "supabase" else None
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
+# Cliente de Supabase (ver resiliencia.py): conexiones HTTP del pool,
+# segundos que una conexión ociosa se mantiene abierta y plazos por operación.
+DB_CONEXIONES = int(os.getenv("DB_CONEXIONES", "16"))
+DB_KEEPALIVE = float(os.getenv("DB_KEEPALIVE", "60"))
+DB_TIMEOUT_CONEXION = float(os.getenv("DB_TIMEOUT_CONEXION", "5"))
+DB_TIMEOUT_LECTURA = float(os.getenv("DB_TIMEOUT_LECTURA", "20"))
+DB_TIMEOUT_ESCRITURA = float(os.getenv("DB_TIMEOUT_ESCRITURA", "30"))
+# Reintentos de lecturas ante fallas transitorias: espera aleatoria entre 0 y
+# min(TOPE, BASE * 2^intento) segundos.
+DB_REINTENTOS = int(os.getenv("DB_REINTENTOS", "3"))
+DB_REINTENTO_BASE = float(os.getenv("DB_REINTENTO_BASE", "0.2"))
+DB_REINTENTO_TOPE = float(os.getenv("DB_REINTENTO_TOPE", "2"))
+# Cortocircuito: fallas seguidas que lo abren y segundos que se mantiene abierto
+DB_CIRCUITO_FALLOS = int(os.getenv("DB_CIRCUITO_FALLOS", "5"))
+DB_CIRCUITO_ESPERA = float(os.getenv("DB_CIRCUITO_ESPERA", "30"))
+
+# Segundos que un catálogo (actividades, personal, tramos, empresas) se sirve
+# desde memoria antes de volver a consultarlo.
+CATALOGO_TTL = float(os.getenv("CATALOGO_TTL", "300"))
+
+# Lectura paginada (ver paginacion.py). El tamaño de página no debe superar el
+# "max rows" configurado en la API de Supabase (1000 por defecto).
+PAGINA_TAMANO = int(os.getenv("PAGINA_TAMANO", "1000"))
+PAGINA_CONCURRENCIA = int(os.getenv("PAGINA_CONCURRENCIA", "4"))
+
+# Lecturas independientes de una página en paralelo (ver lecturas.py): hilos
+# del pool compartido y segundos máximos de espera por lectura.
+LECTURAS_CONCURRENCIA = int(os.getenv("LECTURAS_CONCURRENCIA", "8"))
+LECTURA_TIMEOUT = float(os.getenv("LECTURA_TIMEOUT", "30"))
+
+# Columnas de texto respaldadas por Arrow al tipar los datos leídos (ver
+# esquemas.py); requiere pyarrow.
+TIPOS_ARROW = os.getenv("TIPOS_ARROW", "0") == "1"
+
+# Filas por petición en inserciones y actualizaciones masivas
+LOTE_INSERCION = int(os.getenv("LOTE_INSERCION", "500"))
+
+# Filas por página en las grillas de mantenimiento (ver grilla.py)
+GRILLA_TAMANO = int(os.getenv("GRILLA_TAMANO", "50"))
+
+# Cada cuántos segundos los agregados de producción se recalculan desde cero
+# para recoger cambios hechos por otros procesos (ver agregados.py).
+AGREGADOS_RECONCILIAR = float(os.getenv("AGREGADOS_RECONCILIAR", "600"))
+
+# Producción que se solapa en metros con otra de la misma actividad en el
+# mismo tramo (ver solapes.py): "advertir" pide confirmación, "bloquear" no
+# la deja guardar y "no" desactiva la revisión. Los solapes de menos de
+# SOLAPE_MINIMO metros (p. ej. el punto de una MUFA compartida) se ignoran.
+SOLAPES = os.getenv("SOLAPES", "advertir")
+SOLAPE_MINIMO = float(os.getenv("SOLAPE_MINIMO", "1"))
+
+# PDFs de estados de pago ya generados (ver cache_pdf.py). Al superar el
+# límite se borran los menos usados recientemente.
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", "cache_pdf")
+PDF_CACHE_MB = float(os.getenv("PDF_CACHE_MB", "500"))
+
+# Copia local de producción y catálogos en archivos Arrow (ver copia_local.py),
+# para que los reportes no descarguen toda la producción en cada arranque.
+# Vacío la desactiva; por defecto solo se usa con Supabase. Se sincroniza como
+# mucho cada COPIA_LOCAL_INTERVALO segundos y pide de nuevo los cambios de los
+# últimos COPIA_LOCAL_MARGEN segundos (transacciones que terminan tarde).
+COPIA_LOCAL_DIR = os.getenv("COPIA_LOCAL_DIR", "copia_local" if ALMACENAMIENTO == "supabase" else "")
+COPIA_LOCAL_INTERVALO = float(os.getenv("COPIA_LOCAL_INTERVALO", "30"))
+COPIA_LOCAL_MARGEN = float(os.getenv("COPIA_LOCAL_MARGEN", "60"))
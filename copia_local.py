@@ -0,0 +1,382 @@
+"""
+Copia local de la producción y los catálogos en archivos Arrow, puesta al
+día con la base de datos de forma incremental.
+
+    python copia_local.py [--completa]
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from config import (COPIA_LOCAL_DIR, COPIA_LOCAL_INTERVALO, COPIA_LOCAL_MARGEN,
+                    AGREGADOS_RECONCILIAR)
+from almacenamiento import repo
+from paginacion import leer_dataframe
+from lecturas import en_paralelo
+from resiliencia import es_transitorio
+import catalogos
+import esquemas
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:     # sin pyarrow no hay copia local: todo se lee de la base
+    pa = None
+
+# --- Copia local de producción ---
+# La tabla produccion se guarda en COPIA_LOCAL_DIR/produccion.arrow (formato
+# IPC de Arrow sin comprimir, los textos como diccionario) y se abre con un
+# mapa de memoria: un worker nuevo la tiene sin descargar nada. El estado de
+# la sincronización va en los metadatos del mismo archivo, que se reemplaza
+# de forma atómica, así que copia y estado nunca quedan desparejos.
+#
+# Cada sincronización pide solo (ver sql/sincronizacion_produccion.sql):
+#   - las filas con id mayor al último copiado,
+#   - las filas con actualizado_en posterior a la última marca vista,
+#   - los ids anotados en produccion_borrados después de la última marca.
+# Las marcas son las del servidor, menos COPIA_LOCAL_MARGEN segundos para
+# no perder transacciones que terminaron tarde; lo que llega dos veces
+# simplemente se reemplaza. Si la base aún no tiene esas columnas solo se
+# copian las filas nuevas y todo se vuelve a leer cada AGREGADOS_RECONCILIAR
+# segundos, como hacen los agregados.
+#
+# Los catálogos se guardan igual (<tabla>.arrow) y siembran la caché de
+# catalogos.py al arrancar.
+
+COLUMNAS = ["id", "fecha", "actividad", "trabajador", "triot", "tramo", "inicio", "fin",
+            "mufa_origen", "mufa_final", "cantidad", "rematado"]
+_NUMEROS = ("id", "cantidad", "rematado")
+_VERSION = 1
+_MARCA_INICIAL = "1970-01-01T00:00:00.000"
+# Columnas de v_produccion_no_facturada que se piden siempre a la base: todo
+# lo que entra en el monto de un estado de pago. La copia solo aporta
+# columnas que se muestran (fecha, trabajador, triot, tramo).
+_DE_LA_VISTA = ["id", "empresa", "actividad", "cantidad", "valor_produccion", "valor_venta",
+                "monto_produccion"]
+
+_candado = threading.Lock()
+_cargada = False
+_copia = None           # DataFrame de producción (textos como category)
+_estado = {}            # hasta_id, marca, marca_borrados, seguimiento, completa_en
+_sincronizada = None    # instante (monotonic) de la última sincronización
+_catalogos_guardados = {}   # tabla -> versión de catalogos.py escrita en disco
+
+
+def activa() -> bool:
+    """True si hay directorio configurado y pyarrow instalado."""
+    return bool(COPIA_LOCAL_DIR) and pa is not None
+
+# --- Archivos ---
+
+def _ruta(nombre: str) -> str:
+    return os.path.join(COPIA_LOCAL_DIR, f"{nombre}.arrow")
+
+
+def _escribir(nombre: str, df: pd.DataFrame, estado: dict | None = None):
+    """Guarda `df` como archivo Arrow (escritura atómica)."""
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    if estado is not None:
+        metadatos = dict(tabla.schema.metadata or {})
+        metadatos[b"copia_local"] = json.dumps(estado).encode()
+        tabla = tabla.replace_schema_metadata(metadatos)
+    os.makedirs(COPIA_LOCAL_DIR, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=COPIA_LOCAL_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f, ipc.new_file(f, tabla.schema) as escritor:
+            escritor.write_table(tabla)
+        os.replace(tmp, _ruta(nombre))
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _leer(nombre: str):
+    """(DataFrame, estado guardado) del archivo, o (None, None) si no hay."""
+    try:
+        tabla = ipc.open_file(pa.memory_map(_ruta(nombre), "r")).read_all()
+    except (OSError, pa.ArrowException):
+        return None, None
+    estado = (tabla.schema.metadata or {}).get(b"copia_local")
+    return tabla.to_pandas(), (json.loads(estado) if estado else {})
+
+
+def _cargar():
+    """Abre la copia guardada y siembra los catálogos (una vez por proceso)."""
+    global _cargada, _copia, _estado
+    if _cargada:
+        return
+    _cargada = True
+    df, estado = _leer("produccion")
+    if df is not None and estado.get("version") == _VERSION:
+        _copia, _estado = df, estado
+    for tabla in catalogos.tablas():
+        cat, _ = _leer(tabla)
+        if cat is not None:
+            catalogos.sembrar(tabla, cat, time.time() - os.path.getmtime(_ruta(tabla)))
+            _catalogos_guardados[tabla] = catalogos.version(tabla)
+
+
+def _guardar_catalogos():
+    """Escribe los catálogos que cambiaron desde la última vez."""
+    for tabla in catalogos.tablas():
+        df, version = catalogos.obtener_con_version(tabla)
+        if _catalogos_guardados.get(tabla) == version:
+            continue
+        try:
+            _escribir(tabla, df)
+        except pa.ArrowException:
+            continue    # tipos mezclados en una columna: ese catálogo no se guarda
+        _catalogos_guardados[tabla] = version
+
+# --- Sincronización ---
+
+def _texto(serie: pd.Series) -> pd.Series:
+    return serie.where(serie.isna(), serie.astype(str)).astype("str").astype("category")
+
+
+def _categorias_texto(serie: pd.Series) -> pd.Series:
+    # Una columna sin valores vuelve del archivo con categorías object
+    return serie.cat.set_categories(serie.cat.categories.astype("str"))
+
+
+def _normalizar(df: pd.DataFrame) -> pd.DataFrame:
+    """Filas leídas de la base -> columnas de la copia."""
+    df = df.reindex(columns=COLUMNAS)
+    return pd.DataFrame({
+        c: (pd.to_numeric(df[c], errors="coerce").astype("int64" if c == "id" else float)
+            if c in _NUMEROS else _texto(df[c]))
+        for c in COLUMNAS
+    })
+
+
+def _fusionar(copia: pd.DataFrame, entran: pd.DataFrame, borrados) -> pd.DataFrame:
+    """`copia` sin los ids que entran ni los borrados, más las filas que entran."""
+    quitar = np.union1d(entran["id"].to_numpy(), np.asarray(borrados, dtype="int64"))
+    base = copia[~copia["id"].isin(quitar)]
+    partes = [base, _normalizar(entran)]
+    df = pd.DataFrame({
+        c: (np.concatenate([p[c].to_numpy() for p in partes]) if c in _NUMEROS
+            else union_categoricals([_categorias_texto(p[c]) for p in partes], ignore_order=True))
+        for c in COLUMNAS
+    })
+    return df.sort_values("id", kind="stable", ignore_index=True)
+
+
+def _sin_cambios(copia: pd.DataFrame, entran: pd.DataFrame, borrados) -> bool:
+    """True si las filas que entran ya están tal cual y no hay borrados pendientes."""
+    if entran.empty and len(borrados) == 0:
+        return True
+    if np.isin(np.asarray(borrados, dtype="int64"), copia["id"].to_numpy()).any():
+        return False
+    previas = copia[copia["id"].isin(entran["id"])]
+    if len(previas) != len(entran):
+        return False
+    antes = _decodificar(previas, COLUMNAS).sort_values("id", ignore_index=True)
+    ahora = _decodificar(_normalizar(entran), COLUMNAS).sort_values("id", ignore_index=True)
+    return antes.equals(ahora)
+
+
+def _marca(valores, previa: str) -> str:
+    """La mayor marca de tiempo entre `valores` y `previa`, en UTC sin zona."""
+    fechas = pd.to_datetime(pd.Series(list(valores) + [previa]).dropna(), utc=True,
+                            format="ISO8601")
+    return fechas.max().strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3]
+
+
+def _menos_margen(marca: str) -> str:
+    t = pd.Timestamp(marca) - pd.Timedelta(seconds=COPIA_LOCAL_MARGEN)
+    return t.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3]
+
+
+def _hay_seguimiento() -> bool:
+    """True si la base ya tiene actualizado_en y produccion_borrados."""
+    try:
+        repo.seleccionar("produccion", "id, actualizado_en", limite=1)
+        repo.seleccionar("produccion_borrados", "id, borrado_en", limite=1)
+        return True
+    except Exception as e:
+        if es_transitorio(e):
+            raise
+        return False
+
+
+def _copiar_todo() -> tuple:
+    seguimiento = _hay_seguimiento()
+    columnas = COLUMNAS + (["actualizado_en"] if seguimiento else [])
+    # La marca de borrados se toma antes de leer, así no se pierde ninguno.
+    # La lectura completa no pasa por en_paralelo: puede tardar más que
+    # LECTURA_TIMEOUT.
+    ultimo_borrado = repo.seleccionar("produccion_borrados", "borrado_en",
+                                      orden=[("borrado_en", True)], limite=1) if seguimiento else []
+    filas = leer_dataframe("produccion", ", ".join(columnas), tipar=False)
+    estado = {
+        "version": _VERSION,
+        "seguimiento": seguimiento,
+        "hasta_id": int(filas["id"].max()) if len(filas) else 0,
+        "marca": _marca(filas.get("actualizado_en", []), _MARCA_INICIAL),
+        "marca_borrados": _marca([b["borrado_en"] for b in ultimo_borrado], _MARCA_INICIAL),
+        "completa_en": time.time(),
+    }
+    return _normalizar(filas), estado
+
+
+def _copiar_cambios(copia: pd.DataFrame, estado: dict) -> tuple:
+    hasta_id = estado["hasta_id"]
+    columnas = ", ".join(COLUMNAS + (["actualizado_en"] if estado["seguimiento"] else []))
+    lecturas = {"nuevas": lambda: leer_dataframe("produccion", columnas, desde=hasta_id,
+                                                 tipar=False)}
+    if estado["seguimiento"]:
+        # Las filas con id ya copiado pero guardadas después (o cuya
+        # transacción terminó tarde) llegan por actualizado_en; se ordenan
+        # por esa columna para que la base recorra su índice y no la tabla
+        lecturas["cambiadas"] = lambda: leer_dataframe(
+            "produccion", columnas,
+            [("actualizado_en", "gt", _menos_margen(estado["marca"])), ("id", "lte", hasta_id)],
+            tipar=False, clave=None, orden=["actualizado_en", "id"])
+        lecturas["borrados"] = lambda: leer_dataframe(
+            "produccion_borrados", "id, borrado_en",
+            [("borrado_en", "gt", _menos_margen(estado["marca_borrados"]))], tipar=False)
+    r = en_paralelo(lecturas)
+    entran = pd.concat([r["nuevas"], r.get("cambiadas", r["nuevas"].iloc[0:0])],
+                       ignore_index=True)
+    borrados = r.get("borrados", pd.DataFrame(columns=["id", "borrado_en"]))
+    if _sin_cambios(copia, entran, borrados["id"]):
+        return copia, estado
+    estado = {**estado, "hasta_id": max(hasta_id, int(r["nuevas"]["id"].max())
+                                        if len(r["nuevas"]) else 0)}
+    if estado["seguimiento"]:
+        estado["marca"] = _marca(entran["actualizado_en"], estado["marca"])
+        estado["marca_borrados"] = _marca(borrados["borrado_en"], estado["marca_borrados"])
+    return _fusionar(copia, entran, borrados["id"]), estado
+
+
+def sincronizar(forzar: bool = False, completa: bool = False) -> bool:
+    """
+    Trae a la copia los cambios de la base. Sin `forzar` no hace nada si la
+    última sincronización fue hace menos de COPIA_LOCAL_INTERVALO segundos;
+    con `completa` vuelve a leer toda la tabla. Devuelve True si la copia
+    cambió.
+    """
+    global _copia, _estado, _sincronizada
+    if not activa():
+        return False
+    with _candado:
+        _cargar()
+        ahora = time.monotonic()
+        if (not forzar and not completa and _sincronizada is not None
+                and ahora - _sincronizada < COPIA_LOCAL_INTERVALO):
+            return False
+        completa = (completa or _copia is None
+                    or (not _estado["seguimiento"]
+                        and time.time() - _estado["completa_en"] > AGREGADOS_RECONCILIAR))
+        if completa:
+            copia, estado = _copiar_todo()
+        else:
+            copia, estado = _copiar_cambios(_copia, _estado)
+        _sincronizada = ahora
+        cambio = copia is not _copia
+        if cambio:
+            _escribir("produccion", copia, estado)
+            _copia, _estado = copia, estado
+        _guardar_catalogos()
+        return cambio
+
+
+def _al_dia(forzar: bool = False) -> pd.DataFrame:
+    """La copia sincronizada; si la base no responde, la copia tal como está."""
+    try:
+        sincronizar(forzar)
+    except Exception as e:
+        if _copia is None or not es_transitorio(e):
+            raise
+    return _copia
+
+
+def _decodificar(df: pd.DataFrame, columnas) -> pd.DataFrame:
+    # Cada columna de texto vuelve al tipo de sus categorías, el mismo con
+    # que pandas arma las filas leídas de la base
+    return pd.DataFrame({c: df[c].astype(df[c].cat.categories.dtype)
+                         if isinstance(df[c].dtype, pd.CategoricalDtype) else df[c]
+                         for c in columnas})
+
+
+def produccion(columnas=None) -> pd.DataFrame:
+    """
+    Producción de la copia local (las `columnas` indicadas o COLUMNAS), con
+    los textos con el mismo tipo que al leerlos de la base. Antes se sincroniza
+    si corresponde.
+    """
+    df = _al_dia()
+    return _decodificar(df, columnas or COLUMNAS).reset_index(drop=True)
+
+
+def iniciar():
+    """
+    Abre la copia local al arrancar el proceso y la sincroniza en segundo
+    plano, para que la primera página no espere a la red.
+    """
+    if not activa() or _cargada:
+        return
+    with _candado:
+        _cargar()
+
+    def sincronizar_en_fondo():
+        try:
+            sincronizar()
+        except Exception:
+            pass    # se vuelve a intentar en la próxima lectura
+
+    threading.Thread(target=sincronizar_en_fondo, name="copia_local", daemon=True).start()
+
+# --- Estados de pago ---
+
+def produccion_no_facturada(columnas: str, filtros=()) -> pd.DataFrame:
+    """
+    Igual que leer_dataframe("v_produccion_no_facturada", columnas, filtros),
+    pero fecha, trabajador, triot y tramo salen de la copia local: a la vista
+    solo se le piden id, empresa, actividad, cantidad y montos, así que un
+    atraso de la copia nunca cambia lo que se factura. Sin copia local, sin
+    seguimiento de cambios en la base o si a la copia le faltan filas, lee
+    todo de la vista.
+    """
+    if not activa():
+        return leer_dataframe("v_produccion_no_facturada", columnas, filtros)
+    nombres = [c.strip() for c in columnas.split(",")]
+    r = en_paralelo({
+        "vista": lambda: leer_dataframe("v_produccion_no_facturada", ", ".join(_DE_LA_VISTA),
+                                        filtros, tipar=False),
+        "copia": lambda: _al_dia(forzar=True),
+    })
+    vista, copia = r["vista"], r["copia"]
+    locales = copia[copia["id"].isin(vista["id"])] if len(vista) else copia.iloc[0:0]
+    faltan = np.setdiff1d(vista["id"].to_numpy(dtype="int64"), locales["id"].to_numpy())
+    otras = [c for c in nombres if c not in _DE_LA_VISTA]
+    if (not _estado.get("seguimiento") or len(faltan)
+            or any(c not in COLUMNAS for c in otras)):
+        return leer_dataframe("v_produccion_no_facturada", columnas, filtros)
+    df = vista.merge(_decodificar(locales, ["id"] + otras), on="id", how="left")
+    return esquemas.tipar(df[nombres], "v_produccion_no_facturada")
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--completa", action="store_true", help="volver a leer toda la producción")
+    a = p.parse_args()
+    if not activa():
+        p.error("copia local desactivada: falta COPIA_LOCAL_DIR o pyarrow")
+
+    t0 = time.perf_counter()
+    sincronizar(forzar=True, completa=a.completa)
+    print(f"Filas: {len(_copia):,}  Último id: {_estado['hasta_id']}  "
+          f"Marca: {_estado['marca']}  Seguimiento: {'sí' if _estado['seguimiento'] else 'no'}  "
+          f"({time.perf_counter() - t0:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
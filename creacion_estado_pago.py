@@ -1,175 +1,186 @@
 import streamlit as st
 import pandas as pd
 import datetime
-from fpdf import FPDF
-from config import supabase
+import io
+import zipfile
+from almacenamiento import repo
+import catalogos
+from paginacion import leer_dataframe
+from esquemas import texto_fecha
+from lecturas import en_paralelo
+import cache_pdf
+import estados_pago_lote
+import copia_local
 
-# --- Funciones de acceso a datos en Supabase ---
+# Las fechas llegan como datetime64 (ver esquemas.py); se muestran sin hora
+FORMATO_FECHAS = {"fecha": st.column_config.DateColumn("fecha", format="YYYY-MM-DD")}
+
+# --- Funciones de acceso a datos ---
 
 def leer_empresas():
-    resp = (
-        supabase
-        .table("empresas")
-        .select("nombre")
-        .order("nombre")
-        .execute()
-    )
-    return [r["nombre"] for r in resp.data] if resp.data else []
+    return catalogos.nombres_empresas()
 
 
 def leer_produccion(empresa_sel):
-    prod = pd.DataFrame(
-        supabase
-        .table("produccion")
-        .select("id, fecha, actividad, trabajador, cantidad")
-        .execute()
-        .data
-    )
-    perso = pd.DataFrame(
-        supabase
-        .table("personal")
-        .select("nombre, empresa")
-        .execute()
-        .data
-    )
-    acts = pd.DataFrame(
-        supabase
-        .table("actividades")
-        .select("descripcion, valor_produccion, valor_venta")
-        .execute()
-        .data
+    """
+    Producción aún no facturada de la empresa, ya unida con personal y
+    actividades y con el monto calculado (vista v_produccion_no_facturada,
+    completada con la copia local si la hay).
+    """
+    df = copia_local.produccion_no_facturada(
+        "id, fecha, actividad, trabajador, empresa, cantidad, "
+        "valor_produccion, valor_venta, monto_produccion, triot, tramo",
+        [("empresa", "eq", empresa_sel)]
     )
-    if prod.empty or perso.empty or acts.empty:
+    if df.empty:
         return pd.DataFrame()
-    df = prod.merge(perso, left_on="trabajador", right_on="nombre")
-    df = df[df["empresa"] == empresa_sel]
-    df = df.merge(acts, left_on="actividad", right_on="descripcion")
-    used = {r["produccion_id"] for r in supabase.table(
-        "estados_pago_detalle").select("produccion_id").execute().data}
-    df = df[~df["id"].isin(used)]
-    df["Monto Producción"] = df["cantidad"] * df["valor_produccion"]
-    return df.reset_index(drop=True)
+    return df.rename(columns={"monto_produccion": "Monto Producción"})
 
 
 def leer_gastos(empresa_sel):
-    df_g = pd.DataFrame(
-        supabase
-        .table("gastos")
-        .select("id, empresa, detalle, monto")
-        .execute()
-        .data
+    """Gastos de la empresa que aún no están en un estado de pago."""
+    return leer_dataframe(
+        "v_gastos_no_facturados",
+        "id, empresa, descripcion, monto",
+        [("empresa", "eq", empresa_sel)]
     )
-    if df_g.empty:
-        return pd.DataFrame()
-    df_g = df_g[df_g["empresa"] == empresa_sel]
-    used = {r["gasto_id"] for r in supabase.table(
-        "estados_pago_gastos").select("gasto_id").execute().data}
-    df_g = df_g[~df_g["id"].isin(used)]
-    df_g = df_g.rename(columns={"detalle": "descripcion"})
-    return df_g.reset_index(drop=True)
-
-# --- Generación de PDF ---
-
-def generar_pdf_bytes(corr, empresa, fecha, df_prod, df_g, tot_p, tot_g, neto):
-    pdf = FPDF(orientation="P", unit="mm", format="A4")
-    pdf.add_page()
-    pdf.set_auto_page_break(True, 15)
-
-    # Título
-    pdf.set_font('Helvetica', 'B', 18)
-    pdf.cell(0, 10, f'Estado de Pago {corr}', ln=True, align='C')
-    pdf.ln(5)
-
-    # Empresa y Fecha
-    pdf.set_font('Helvetica', 'B', 12)
-    pdf.cell(100, 6, f'Empresa: {empresa}', ln=0)
-    pdf.cell(0, 6, f'Fecha: {fecha}', ln=1)
-    pdf.ln(3)
-
-        # Separador de texto
-    pdf.set_font('Helvetica', '', 12)
-    pdf.cell(0, 4, '-' * 100, ln=1)
-    pdf.ln(5)
-
-    # Sección Producción
-    pdf.set_font('Helvetica', 'B', 12)
-    pdf.cell(0, 6, 'Producción', ln=1)
-    pdf.ln(2)
-    pdf.set_font('Helvetica', '', 11)
-    for _, r in df_prod.iterrows():
-        pdf.multi_cell(0, 6, f"{r['actividad']}  |  Cant: {r['cantidad']}  |  Monto: ${r['Monto Producción']:,.0f}")
-    pdf.ln(2)
-        # Total Producción
-    pdf.set_font('Helvetica', 'B', 12)
-    pdf.cell(0, 6, f"Total Producción: ${tot_p:,.0f}", ln=1)
-    pdf.ln(5)
-    # Separador de texto
-    pdf.set_font('Helvetica', '', 12)
-    pdf.cell(0, 4, '-' * 100, ln=1)
-    pdf.ln(5)
-
-    # Sección Gastos
-    if not df_g.empty:
-        pdf.set_font('Helvetica', 'B', 12)
-        pdf.cell(0, 6, 'Gastos', ln=1)
-        pdf.ln(2)
-        pdf.set_font('Helvetica', '', 11)
-        for _, r in df_g.iterrows():
-            pdf.multi_cell(0, 6, f"{r['descripcion']}  |  Monto: ${r['monto']:,.0f}")
-        pdf.ln(2)
-                # Total Gastos
-        pdf.set_font('Helvetica', 'B', 12)
-        pdf.cell(0, 6, f"Total Gastos: ${tot_g:,.0f}", ln=1)
-        pdf.ln(5)
-        # Separador de texto
-        pdf.set_font('Helvetica', '', 12)
-        pdf.cell(0, 4, '-' * 100, ln=1)
-        pdf.ln(5)
-
-    # Neto a Pagar
-    pdf.set_font('Helvetica', 'B', 14)
-    pdf.cell(0, 8, f"Neto a Pagar: ${neto:,.0f}", ln=1)
-    pdf.ln(10)
-
-    # Bloque Autorización
-    pdf.set_font('Helvetica', 'B', 12)
-    pdf.cell(0, 6, 'SE AUTORIZA A FACTURAR A', ln=1)
-    pdf.ln(2)
-    pdf.set_font('Helvetica', '', 11)
-    pdf.cell(0, 6, 'SOMYL S.A. | RUT: 76.002.581-K', ln=1)
-    pdf.multi_cell(0, 6, 'Dirección: Puerta Oriente 361 Of. 311 B, Torre B, Colina')
-    pdf.ln(2)
-    pdf.cell(0, 6, 'AUTORIZA: Luis Medina', ln=1)
-    pdf.cell(0, 6, 'CORREO: lmedina@somyl.com', ln=1)
-    pdf.ln(2)
-    pdf.multi_cell(0, 6, 'ENVIAR FACTURA A: cynthia.miranda@somyl.com; carlos.alegria@somyl.com')
-
-    return pdf.output(dest='S').encode('latin1')
-
-# --- Inserción en Supabase ---
-
-def insertar_estado_pago(corr, emp, tp, tg, neto):
-    supabase.table('estados_pago').insert({
-        'correlativo': corr,
-        'fecha': datetime.date.today().isoformat(),
-        'empresa': emp,
-        'total_produccion': float(tp),
-        'total_gastos': float(tg),
-        'neto': float(neto)
-    }).execute()
-    supabase.table('estados_pago_detalle').insert([
-        {'correlativo': corr, 'produccion_id': int(i)}
-        for i in st.session_state['prod_sel']['id']
-    ]).execute()
-    supabase.table('estados_pago_gastos').insert([
-        {'correlativo': corr, 'gasto_id': int(i)}
-        for i in st.session_state['gast_sel']['id']
-    ]).execute()
+
+
+def leer_estados_guardados():
+    return leer_dataframe(
+        "estados_pago", "correlativo, fecha, empresa, total_produccion, total_gastos, neto",
+        clave="correlativo"
+    )
+
+
+def leer_ids_estado(corr):
+    """Ids de producción y de gastos incluidos en un estado guardado."""
+    r = en_paralelo({
+        "prod": lambda: leer_dataframe("estados_pago_detalle", "produccion_id",
+                                       [("correlativo", "eq", corr)], clave="produccion_id"),
+        "gast": lambda: leer_dataframe("estados_pago_gastos", "gasto_id",
+                                       [("correlativo", "eq", corr)], clave="gasto_id"),
+    })
+    return r["prod"]["produccion_id"], r["gast"]["gasto_id"]
+
+
+def leer_lineas_estado(corr):
+    """Líneas de producción y gastos de un estado guardado, como en leer_produccion/leer_gastos."""
+    r = en_paralelo({
+        "prod": lambda: leer_dataframe(
+            "v_estado_pago_produccion",
+            "id, fecha, actividad, trabajador, cantidad, "
+            "valor_produccion, valor_venta, monto_produccion, triot, tramo",
+            [("correlativo", "eq", corr)]
+        ),
+        "gast": lambda: leer_dataframe("v_estado_pago_gastos", "id, descripcion, monto",
+                                       [("correlativo", "eq", corr)]),
+    })
+    return r["prod"].rename(columns={"monto_produccion": "Monto Producción"}), r["gast"]
+
+
+def pdf_estado_guardado(estado: dict, agrupar_por=None) -> bytes:
+    """
+    PDF de un estado ya guardado. Si está en la caché solo se leen los ids
+    de sus líneas; si no, se leen las líneas y se renderiza una vez.
+    """
+    corr = estado['correlativo']
+    fecha = texto_fecha(estado['fecha'])
+    totales = [estado[c] or 0 for c in ('total_produccion', 'total_gastos', 'neto')]
+    prod_ids, gast_ids = leer_ids_estado(corr)
+    pdf = cache_pdf.leer(cache_pdf.clave(corr, estado['empresa'], fecha,
+                                         prod_ids, gast_ids, *totales, agrupar_por))
+    if pdf is None:
+        df_prod, df_g = leer_lineas_estado(corr)
+        pdf = cache_pdf.pdf_estado_pago(corr, estado['empresa'], fecha,
+                                        df_prod, df_g, *totales, agrupar_por=agrupar_por)
+    return pdf
+
+# --- Inserción en la base de datos ---
+
+def insertar_estado_pago(emp, fecha, tp, tg, neto):
+    """Guarda el estado de pago de forma atómica y devuelve su correlativo."""
+    return repo.crear_estado_pago(
+        emp, fecha, tp, tg, neto,
+        st.session_state['prod_sel'].get('id', []),
+        st.session_state['gast_sel'].get('id', [])
+    )
+
+# --- Cierre de período (todas las empresas) ---
+
+def seccion_lote():
+    with st.expander("🗂️ Cierre de período: todas las empresas"):
+        corte = st.date_input("Fecha de corte", value=datetime.date.today(), key="lote_corte")
+        borrador = st.checkbox("Solo borradores (no registrar estados)", key="lote_borrador")
+        if st.button("Generar estados de pago", key="lote_generar"):
+            barra = st.progress(0.0)
+
+            def progreso(empresa, etapa, i, n):
+                barra.progress(i / n, text=f"{etapa}: {empresa} ({i}/{n})")
+
+            try:
+                st.session_state['lote_resultado'] = estados_pago_lote.generar_lote(
+                    corte.isoformat(), guardar=not borrador, progreso=progreso
+                )
+            except Exception as e:
+                st.error(f'⚠️ Error en el cierre de período: {e}')
+
+        resumen = st.session_state.get('lote_resultado')
+        if resumen is None:
+            return
+        if resumen.empty:
+            st.info("No hay producción ni gastos pendientes hasta esa fecha.")
+            return
+        c1, c2, c3 = st.columns(3)
+        c1.metric('PRODUCCIÓN', f"${resumen['total_produccion'].sum():,.0f}")
+        c2.metric('GASTOS', f"${resumen['total_gastos'].sum():,.0f}")
+        c3.metric('NETO', f"${resumen['neto'].sum():,.0f}")
+        st.dataframe(resumen.drop(columns='pdf'), use_container_width=True)
+        if resumen['error'].notna().any():
+            st.warning("⚠️ Algunas empresas no se pudieron guardar; revisa la columna 'error'.")
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as z:
+            for r in resumen.itertuples():
+                if r.pdf is not None:
+                    z.writestr(f"{r.correlativo}.pdf", r.pdf)
+        st.download_button('Descargar PDFs (zip)', buffer.getvalue(),
+                           'estados_pago.zip', 'application/zip')
+
+# --- Estados guardados ---
+
+def seccion_historial():
+    with st.expander("📚 Estados de pago guardados"):
+        try:
+            estados = leer_estados_guardados()
+        except Exception as e:
+            st.error(f'⚠️ Error al leer estados de pago: {e}')
+            return
+        if estados.empty:
+            st.info("Aún no hay estados de pago guardados.")
+            return
+        empresa = st.selectbox("Subcontrato", sorted(estados['empresa'].dropna().unique()),
+                               key='hist_empresa')
+        estados = estados[estados['empresa'] == empresa].sort_values('fecha', ascending=False)
+        st.dataframe(estados, use_container_width=True, hide_index=True,
+                     column_config=FORMATO_FECHAS)
+        corr = st.selectbox("Estado de pago", estados['correlativo'].tolist(), key='hist_corr')
+        if st.button('📄 Obtener PDF', key='hist_pdf'):
+            estado = estados[estados['correlativo'] == corr].iloc[0].to_dict()
+            try:
+                pdf = pdf_estado_guardado(estado)
+            except Exception as e:
+                st.error(f'⚠️ Error al generar el PDF: {e}')
+            else:
+                st.download_button('Descargar PDF', pdf, f'{corr}.pdf', 'application/pdf',
+                                   key='hist_descargar')
 
 # --- UI principal ---
 
 def app():
     st.subheader("🧾 Creación de Estado de Pago")
+    seccion_lote()
+    seccion_historial()
 
     # Callback para reset
     def reset_on_change():
@@ -181,8 +192,10 @@ def app():
         key='empresa_sel', on_change=reset_on_change
     )
 
-    df_prod = leer_produccion(empresa_sel)
-    df_g = leer_gastos(empresa_sel)
+    # Producción y gastos pendientes se leen a la vez
+    r = en_paralelo({"prod": lambda: leer_produccion(empresa_sel),
+                     "gast": lambda: leer_gastos(empresa_sel)})
+    df_prod, df_g = r["prod"], r["gast"]
     if df_prod.empty and df_g.empty:
         st.info("No hay datos para este subcontrato.")
         return
@@ -198,7 +211,8 @@ def app():
     col1, col2 = st.columns(2)
     with col1:
         st.write("**Disponibles**")
-        st.dataframe(st.session_state['prod_disp'], use_container_width=True)
+        st.dataframe(st.session_state['prod_disp'], use_container_width=True,
+                     column_config=FORMATO_FECHAS)
         sel_add = st.multiselect(
             'IDs a añadir', st.session_state['prod_disp']['id'].tolist(),
             key='prod_ids_add'
@@ -215,7 +229,8 @@ def app():
             ].reset_index(drop=True)
     with col2:
         st.write("**Seleccionadas**")
-        st.dataframe(st.session_state['prod_sel'], use_container_width=True)
+        st.dataframe(st.session_state['prod_sel'], use_container_width=True,
+                     column_config=FORMATO_FECHAS)
         sel_rem = st.multiselect(
             'IDs a quitar', st.session_state['prod_sel']['id'].tolist(),
             key='prod_ids_rem'
@@ -283,18 +298,33 @@ def app():
 
     # PDF y Guardar
     st.markdown("---")
+    agrupacion = st.selectbox(
+        'Agrupar producción en el PDF', ['Sin agrupar', 'Actividad', 'TRIOT'],
+        key='pdf_agrupar'
+    )
+    agrupar_por = {'Actividad': 'actividad', 'TRIOT': 'triot'}.get(agrupacion)
     pbtn, gbtn = st.columns(2)
     with pbtn:
         if st.button('📄 Previsualizar PDF'):
-            count = len(supabase.table('estados_pago').select('correlativo').execute().data)
-            corr = f"EGTD-{count+1:02d}"
+            # Número provisorio: el definitivo se asigna al guardar
+            corr = repo.siguiente_correlativo()
             fecha = datetime.date.today().isoformat()
-            pdf = generar_pdf_bytes(corr, empresa_sel, fecha, df_s, df_gs, tp, tg, neto)
+            pdf = cache_pdf.pdf_estado_pago(corr, empresa_sel, fecha, df_s, df_gs, tp, tg, neto,
+                                            agrupar_por=agrupar_por)
             st.download_button('Descargar Preview', pdf, f'preview_{corr}.pdf', 'application/pdf')
     with gbtn:
         if st.button('💾 Guardar Estado'):
-            insertar_estado_pago(corr, empresa_sel, tp, tg, neto)
-            st.success(f'✅ Estado {corr} guardado')
+            fecha = datetime.date.today().isoformat()
+            try:
+                corr = insertar_estado_pago(empresa_sel, fecha, tp, tg, neto)
+            except Exception as e:
+                st.error(f'⚠️ Error al guardar estado de pago: {e}')
+            else:
+                # Queda en la caché: las descargas posteriores no lo vuelven a generar
+                pdf = cache_pdf.pdf_estado_pago(corr, empresa_sel, fecha, df_s, df_gs, tp, tg, neto)
+                reset_on_change()
+                st.success(f'✅ Estado {corr} guardado')
+                st.download_button('Descargar PDF', pdf, f'{corr}.pdf', 'application/pdf')
 
 if __name__ == '__main__':
     app()
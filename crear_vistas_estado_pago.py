@@ -0,0 +1,92 @@
+import sqlite3
+
+DB_PATH = "productividad_fibra.db"
+
+# Mismas vistas que sql/vistas_estado_pago.sql, para el esquema SQLite local
+SENTENCIAS = [
+    "DROP VIEW IF EXISTS v_produccion_no_facturada",
+    """
+    CREATE VIEW v_produccion_no_facturada AS
+    SELECT
+        p.id,
+        p.fecha,
+        p.actividad,
+        p.trabajador,
+        pe.empresa,
+        p.cantidad,
+        a.valor_produccion,
+        a.valor_venta,
+        p.cantidad * a.valor_produccion AS monto_produccion,
+        p.triot,
+        p.tramo
+    FROM produccion p
+    JOIN personal pe ON pe.nombre = p.trabajador
+    JOIN actividades a ON a.descripcion = p.actividad
+    WHERE NOT EXISTS (
+        SELECT 1 FROM estados_pago_detalle d WHERE d.produccion_id = p.id
+    )
+    """,
+    "DROP VIEW IF EXISTS v_gastos_no_facturados",
+    """
+    CREATE VIEW v_gastos_no_facturados AS
+    SELECT
+        g.id,
+        g.empresa,
+        g.detalle AS descripcion,
+        g.monto,
+        g.fecha
+    FROM gastos g
+    WHERE NOT EXISTS (
+        SELECT 1 FROM estados_pago_gastos eg WHERE eg.gasto_id = g.id
+    )
+    """,
+    "DROP VIEW IF EXISTS v_estado_pago_produccion",
+    """
+    CREATE VIEW v_estado_pago_produccion AS
+    SELECT
+        d.correlativo,
+        p.id,
+        p.fecha,
+        p.actividad,
+        p.trabajador,
+        p.cantidad,
+        a.valor_produccion,
+        a.valor_venta,
+        p.cantidad * a.valor_produccion AS monto_produccion,
+        p.triot,
+        p.tramo
+    FROM estados_pago_detalle d
+    JOIN produccion p ON p.id = d.produccion_id
+    JOIN actividades a ON a.descripcion = p.actividad
+    """,
+    "DROP VIEW IF EXISTS v_estado_pago_gastos",
+    """
+    CREATE VIEW v_estado_pago_gastos AS
+    SELECT
+        eg.correlativo,
+        g.id,
+        g.detalle AS descripcion,
+        g.monto
+    FROM estados_pago_gastos eg
+    JOIN gastos g ON g.id = eg.gasto_id
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_produccion_trabajador ON produccion (trabajador)",
+    "CREATE INDEX IF NOT EXISTS idx_personal_empresa ON personal (empresa)",
+    "CREATE INDEX IF NOT EXISTS idx_gastos_empresa ON gastos (empresa)",
+    "CREATE INDEX IF NOT EXISTS idx_estados_pago_detalle_produccion ON estados_pago_detalle (produccion_id)",
+    "CREATE INDEX IF NOT EXISTS idx_estados_pago_gastos_gasto ON estados_pago_gastos (gasto_id)",
+]
+
+
+def crear_vistas(conn):
+    cur = conn.cursor()
+    for sql in SENTENCIAS:
+        cur.execute(sql)
+    conn.commit()
+
+
+if __name__ == "__main__":
+    conn = sqlite3.connect(DB_PATH)
+    crear_vistas(conn)
+    conn.close()
+    print("✅ Vistas de estado de pago creadas.")
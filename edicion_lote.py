@@ -0,0 +1,101 @@
+import pandas as pd
+import streamlit as st
+from almacenamiento import repo
+
+# --- Edición en lote con grillas editables ---
+# La grilla (st.data_editor) se compara con los datos que se mostraron para
+# obtener las filas nuevas, modificadas y borradas. Se guardan juntas en una
+# sola operación atómica (repo.guardar_lote) y el mismo diff se aplica a la
+# copia en memoria en vez de volver a leer la tabla.
+
+
+def _distintos(a: pd.DataFrame, b: pd.DataFrame) -> pd.DataFrame:
+    return ~((a == b) | (a.isna() & b.isna()))
+
+
+def diferencias(original: pd.DataFrame, editado: pd.DataFrame, columnas: list):
+    """
+    (nuevas, modificadas, ids borrados) entre la grilla original y la
+    editada. Las filas se identifican por `id`; las nuevas no lo tienen.
+    `modificadas` trae la fila completa (id y `columnas`) con los cambios.
+    """
+    nuevas = editado[editado["id"].isna()][columnas].reset_index(drop=True)
+    editado = editado[editado["id"].notna()].astype({"id": "int64"}).set_index("id")
+    original = original.set_index("id")
+    borradas = original.index.difference(editado.index).tolist()
+    comunes = original.index.intersection(editado.index)
+    antes, despues = original.loc[comunes, columnas], editado.loc[comunes, columnas]
+    cambio = _distintos(antes.astype(object), despues.astype(object)).any(axis=1)
+    modificadas = despues[cambio].reset_index()
+    return nuevas, modificadas, borradas
+
+
+def guardar(tabla: str, nuevas: pd.DataFrame, modificadas: pd.DataFrame, borradas: list) -> list:
+    """
+    Escribe el diff en una sola operación: inserciones, actualizaciones por
+    id y borrados. Devuelve las filas creadas (con su id). Si otro usuario
+    borró alguna fila modificada o borrada, o ya está en un estado de pago,
+    lanza ValueError sin guardar nada.
+    """
+    resultado = repo.guardar_lote(tabla, _registros(nuevas), _registros(modificadas),
+                                  [int(i) for i in borradas])
+    if resultado["faltantes"]:
+        raise ValueError(f"Los registros {resultado['faltantes']} ya no existen (los borró otro "
+                         "usuario); recarga la grilla.")
+    if resultado["facturados"]:
+        raise ValueError("No se pueden modificar ni borrar registros ya incluidos en un estado "
+                         f"de pago: {resultado['facturados']}")
+    return resultado["creadas"]
+
+
+def _registros(df: pd.DataFrame) -> list:
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def aplicar_local(df: pd.DataFrame, creadas: list, modificadas: pd.DataFrame,
+                  borradas: list) -> pd.DataFrame:
+    """Aplica el diff ya guardado a la copia en memoria (las filas nuevas quedan primero)."""
+    df = df[~df["id"].isin(borradas)].set_index("id")
+    if not modificadas.empty:
+        cambios = modificadas.set_index("id")
+        cambios = cambios.loc[cambios.index.intersection(df.index), df.columns.intersection(cambios.columns)]
+        df = df.astype({c: object for c in cambios.columns})
+        df.loc[cambios.index, cambios.columns] = cambios
+    df = df.reset_index()
+    if creadas:
+        df = pd.concat([pd.DataFrame(creadas).reindex(columns=df.columns), df], ignore_index=True)
+    return df
+
+
+def ids_facturados(ids: list, tabla_detalle: str, columna: str) -> list:
+    """Ids de `ids` que ya están en un estado de pago (no se pueden modificar ni borrar)."""
+    if not ids:
+        return []
+    filas = repo.seleccionar(tabla_detalle, columna, [(columna, "in", [int(i) for i in ids])])
+    return sorted({f[columna] for f in filas})
+
+
+def editor(df: pd.DataFrame, clave: str, editables: list, column_config=None):
+    """
+    Grilla editable (se pueden agregar y borrar filas) con resumen de
+    cambios pendientes y botón para aplicarlos. Devuelve (nuevas,
+    modificadas, borradas, aplicar); `aplicar` es True al pulsar el botón.
+    """
+    version = st.session_state.get(f"{clave}_version", 0)
+    editado = st.data_editor(
+        df, key=f"{clave}_{version}", num_rows="dynamic", hide_index=True,
+        use_container_width=True, column_config=column_config,
+        disabled=[c for c in df.columns if c not in editables]
+    )
+    nuevas, modificadas, borradas = diferencias(df, editado, editables)
+    hay = len(nuevas) + len(modificadas) + len(borradas)
+    c1, c2 = st.columns([3, 1])
+    c1.caption(f"Cambios pendientes: {len(nuevas)} nuevas, {len(modificadas)} modificadas, "
+               f"{len(borradas)} borradas")
+    aplicar = c2.button("💾 Aplicar cambios", key=f"{clave}_aplicar", disabled=not hay)
+    return nuevas, modificadas, borradas, aplicar
+
+
+def reiniciar(clave: str):
+    """Descarta las ediciones pendientes de la grilla `clave`."""
+    st.session_state[f"{clave}_version"] = st.session_state.get(f"{clave}_version", 0) + 1
@@ -0,0 +1,94 @@
+import importlib.util
+import numpy as np
+import pandas as pd
+from config import TIPOS_ARROW
+
+# --- Tipos de las columnas en memoria ---
+# Las filas llegan como dicts (JSON de PostgREST o filas de SQLite) y pandas
+# deja casi todo como object. tipar() aplica a cada tabla o vista su
+# esquema:
+#   entero     int64 (Int64 si hay nulos)
+#   decimal    float64
+#   metros     float64 desde el texto de inicio/fin ("1250" o "1250,5")
+#   fecha      datetime64 (los días "AAAA-MM-DD")
+#   categoria  category: nombres que se repiten en muchas filas (actividad,
+#              trabajador, triot, empresa...) se guardan una vez
+#   texto      str; con TIPOS_ARROW y pyarrow instalado, string de Arrow
+# Los catálogos (actividades, personal, tramos, empresas) solo tipan sus
+# números: son pocas filas y su texto vuelve tal cual a formularios y
+# planillas (p. ej. el inicio/fin de un tramo).
+
+_PRODUCCION = {
+    "id": "entero", "fecha": "fecha", "actividad": "categoria", "trabajador": "categoria",
+    "triot": "categoria", "tramo": "categoria", "inicio": "metros", "fin": "metros",
+    "mufa_origen": "categoria", "mufa_final": "categoria", "cantidad": "decimal",
+    "rematado": "decimal",
+}
+_LINEA_ESTADO = {
+    **_PRODUCCION, "empresa": "categoria", "valor_produccion": "decimal",
+    "valor_venta": "decimal", "monto_produccion": "decimal", "correlativo": "texto",
+}
+_GASTO = {"id": "entero", "empresa": "categoria", "descripcion": "texto", "monto": "decimal",
+          "fecha": "fecha", "correlativo": "texto"}
+
+ESQUEMAS = {
+    "produccion": _PRODUCCION,
+    "v_produccion_no_facturada": _LINEA_ESTADO,
+    "v_estado_pago_produccion": _LINEA_ESTADO,
+    "gastos": _GASTO,
+    "v_gastos_no_facturados": _GASTO,
+    "v_estado_pago_gastos": _GASTO,
+    "estados_pago": {"correlativo": "texto", "fecha": "fecha", "empresa": "categoria",
+                     "total_produccion": "decimal", "total_gastos": "decimal", "neto": "decimal"},
+    "estados_pago_detalle": {"correlativo": "texto", "produccion_id": "entero"},
+    "estados_pago_gastos": {"correlativo": "texto", "gasto_id": "entero"},
+    "actividades": {"id": "entero", "valor_produccion": "decimal", "valor_venta": "decimal"},
+    "personal": {"id": "entero"},
+    "tramos": {"id": "entero"},
+    "empresas": {"id": "entero"},
+}
+
+
+def metros(serie: pd.Series) -> np.ndarray:
+    """Texto de metros ("1250", "1250,5") -> float; NaN si no es un número."""
+    texto = serie.astype(str).str.strip().str.replace(",", ".", regex=False)
+    return pd.to_numeric(texto, errors="coerce").to_numpy(dtype=float)
+
+
+def _texto_arrow():
+    if not TIPOS_ARROW or importlib.util.find_spec("pyarrow") is None:
+        return None
+    return "string[pyarrow]"
+
+
+def convertir(serie: pd.Series, tipo: str) -> pd.Series:
+    """`serie` con el tipo de esquema `tipo`."""
+    if tipo == "entero":
+        num = pd.to_numeric(serie, errors="coerce")
+        return num.astype("Int64" if num.isna().any() else "int64")
+    if tipo == "decimal":
+        return pd.to_numeric(serie, errors="coerce").astype(float)
+    if tipo == "metros":
+        return pd.Series(metros(serie), index=serie.index, name=serie.name)
+    if tipo == "fecha":
+        return pd.to_datetime(serie.astype("string").str.slice(0, 10), errors="coerce",
+                              format="%Y-%m-%d")
+    if tipo == "categoria":
+        return serie.astype("category")
+    arrow = _texto_arrow()
+    return serie.astype(arrow) if arrow else serie
+
+
+def tipar(df: pd.DataFrame, tabla: str) -> pd.DataFrame:
+    """`df` (filas de `tabla`) con las columnas de su esquema ya tipadas."""
+    esquema = ESQUEMAS.get(tabla)
+    if not esquema:
+        return df
+    return df.assign(**{c: convertir(df[c], esquema[c]) for c in df.columns if c in esquema})
+
+
+def texto_fecha(valor) -> str:
+    """Una fecha (Timestamp, date o texto) como "AAAA-MM-DD"; "" si no hay."""
+    if valor is None or valor is pd.NaT or (isinstance(valor, float) and np.isnan(valor)):
+        return ""
+    return pd.Timestamp(valor).strftime("%Y-%m-%d") if not isinstance(valor, str) else valor[:10]
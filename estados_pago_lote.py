@@ -0,0 +1,141 @@
+"""
+Cierre de período: genera los estados de pago de todas las empresas con
+producción o gastos pendientes hasta una fecha de corte.
+
+    python estados_pago_lote.py --corte 2025-05-31 --salida estados/ [--sin-guardar]
+"""
+import argparse
+import datetime
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from almacenamiento import repo
+from paginacion import leer_dataframe
+from lecturas import en_paralelo
+from pdf_estado_pago import generar_pdf_bytes
+import cache_pdf
+import copia_local
+
+COLUMNAS_PROD = ("id, fecha, actividad, trabajador, empresa, cantidad, "
+                 "valor_produccion, valor_venta, monto_produccion, triot, tramo")
+
+# --- Datos pendientes de todas las empresas ---
+
+def leer_pendientes(fecha_corte: str):
+    """
+    Producción y gastos no facturados hasta `fecha_corte`, de todas las
+    empresas, en una sola lectura por vista. Los gastos sin fecha se incluyen.
+    """
+    r = en_paralelo({
+        "prod": lambda: copia_local.produccion_no_facturada(COLUMNAS_PROD,
+                                                            [("fecha", "lte", fecha_corte)]),
+        "gast": lambda: leer_dataframe("v_gastos_no_facturados",
+                                       "id, empresa, descripcion, monto, fecha"),
+    })
+    df_prod = r["prod"].rename(columns={"monto_produccion": "Monto Producción"})
+    df_g = r["gast"]
+    df_g = df_g[df_g["fecha"].isna() | (df_g["fecha"] <= fecha_corte)]
+    return df_prod, df_g
+
+
+def calcular_lote(df_prod: pd.DataFrame, df_g: pd.DataFrame) -> pd.DataFrame:
+    """Totales por empresa (producción, gastos, neto y número de líneas)."""
+    prod = df_prod.groupby("empresa", observed=True).agg(
+        lineas_produccion=("id", "size"), total_produccion=("Monto Producción", "sum"))
+    gast = df_g.groupby("empresa", observed=True).agg(
+        lineas_gastos=("id", "size"), total_gastos=("monto", "sum"))
+    resumen = prod.join(gast, how="outer").fillna(0)
+    resumen = resumen.astype({"lineas_produccion": int, "lineas_gastos": int})
+    resumen["neto"] = resumen["total_produccion"] - resumen["total_gastos"]
+    return resumen.reset_index().sort_values("empresa", ignore_index=True)
+
+
+# --- Generación y guardado ---
+
+def generar_lote(fecha_corte: str, guardar: bool = True, procesos: int | None = None,
+                 progreso=None) -> pd.DataFrame:
+    """
+    Calcula, guarda (si `guardar`) y renderiza los estados de pago del período.
+    `progreso(empresa, etapa, i, n)` se llama por empresa en cada etapa.
+    Devuelve el resumen por empresa con el correlativo y el PDF (bytes); si
+    el guardado de una empresa falla, su fila trae el error y no tiene PDF.
+    """
+    df_prod, df_g = leer_pendientes(fecha_corte)
+    resumen = calcular_lote(df_prod, df_g)
+    n = len(resumen)
+    prod_por_emp = dict(tuple(df_prod.groupby("empresa", observed=True)))
+    gast_por_emp = dict(tuple(df_g.groupby("empresa", observed=True)))
+    vacio_p, vacio_g = df_prod.iloc[0:0], df_g.iloc[0:0]
+    fecha = datetime.date.today().isoformat()
+
+    # 1) Guardar: una operación atómica por empresa, en secuencia
+    correlativos, errores = [], []
+    for i, r in enumerate(resumen.itertuples()):
+        p = prod_por_emp.get(r.empresa, vacio_p)
+        g = gast_por_emp.get(r.empresa, vacio_g)
+        corr, error = f"BORRADOR-{i + 1:02d}", None
+        if guardar:
+            try:
+                corr = repo.crear_estado_pago(r.empresa, fecha, r.total_produccion,
+                                              r.total_gastos, r.neto, p["id"], g["id"])
+            except Exception as e:
+                corr, error = None, str(e)
+        correlativos.append(corr)
+        errores.append(error)
+        if progreso:
+            progreso(r.empresa, "guardado" if error is None else "error", i + 1, n)
+    resumen["correlativo"] = correlativos
+    resumen["error"] = errores
+
+    # 2) Renderizar los PDFs en paralelo (solo los que se guardaron); los
+    # estados guardados quedan en la caché para descargas posteriores
+    ok = resumen.index[resumen["error"].isna()].tolist()
+    argumentos = [
+        (resumen.at[k, "correlativo"], resumen.at[k, "empresa"], fecha,
+         cache_pdf.por_id(prod_por_emp.get(resumen.at[k, "empresa"], vacio_p)),
+         cache_pdf.por_id(gast_por_emp.get(resumen.at[k, "empresa"], vacio_g)),
+         resumen.at[k, "total_produccion"], resumen.at[k, "total_gastos"], resumen.at[k, "neto"])
+        for k in ok
+    ]
+    resumen["pdf"] = None
+    if ok:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            pdfs = pool.map(generar_pdf_bytes, *zip(*argumentos))
+            for i, (k, args, pdf) in enumerate(zip(ok, argumentos, pdfs)):
+                resumen.at[k, "pdf"] = pdf
+                if guardar:
+                    corr, emp, fch, p, g, tp, tg, neto = args
+                    cache_pdf.guardar(cache_pdf.clave(corr, emp, fch, p["id"], g["id"], tp, tg, neto), pdf)
+                if progreso:
+                    progreso(resumen.at[k, "empresa"], "pdf", i + 1, len(ok))
+    return resumen
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--corte", required=True, help="Fecha de corte (AAAA-MM-DD)")
+    p.add_argument("--salida", default="estados_pago_pdf")
+    p.add_argument("--sin-guardar", action="store_true",
+                   help="Solo calcula y genera borradores, sin registrar estados")
+    p.add_argument("--procesos", type=int, default=None)
+    a = p.parse_args()
+
+    def progreso(empresa, etapa, i, n):
+        print(f"[{i}/{n}] {etapa:8s} {empresa}")
+
+    resumen = generar_lote(a.corte, guardar=not a.sin_guardar,
+                           procesos=a.procesos, progreso=progreso)
+    os.makedirs(a.salida, exist_ok=True)
+    for r in resumen.itertuples():
+        if r.pdf is not None:
+            with open(os.path.join(a.salida, f"{r.correlativo}.pdf"), "wb") as f:
+                f.write(r.pdf)
+
+    print()
+    print(resumen.drop(columns="pdf").to_string(index=False))
+    print(f"\nEmpresas: {len(resumen)}  Producción: ${resumen['total_produccion'].sum():,.0f}  "
+          f"Gastos: ${resumen['total_gastos'].sum():,.0f}  Neto: ${resumen['neto'].sum():,.0f}")
+
+
+if __name__ == "__main__":
+    main()
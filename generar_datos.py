@@ -0,0 +1,177 @@
+"""
+Genera una base SQLite con datos sintéticos de un proyecto de fibra, con el
+mismo esquema que productividad_fibra.db, para medir rendimiento a escala.
+
+    python generar_datos.py --db bench_fibra.db --produccion 500000
+"""
+import argparse
+import os
+import random
+import sqlite3
+from datetime import date, timedelta
+
+from migrar_sqlite import migrar
+
+ESQUEMA = [
+    """CREATE TABLE produccion (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        fecha TEXT, actividad TEXT, trabajador TEXT, triot TEXT, tramo TEXT,
+        inicio TEXT, fin TEXT, mufa_origen TEXT, mufa_final TEXT,
+        cantidad REAL, rematado REAL
+    )""",
+    """CREATE TABLE usuarios (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        usuario TEXT, contrasena TEXT, rol TEXT, nombre TEXT, password TEXT
+    )""",
+    """CREATE TABLE actividades (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        codigo TEXT, descripcion TEXT, unidad TEXT, grupo TEXT, tipo TEXT,
+        valor_produccion REAL, valor_venta REAL
+    )""",
+    """CREATE TABLE personal (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nombre TEXT, rut TEXT, cargo TEXT, empresa TEXT
+    )""",
+    """CREATE TABLE tramos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        triot TEXT, tramo TEXT, inicio TEXT, fin TEXT, mufa_inicio TEXT, mufa_fin TEXT
+    )""",
+    """CREATE TABLE empresas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nombre TEXT UNIQUE, rut TEXT, representante TEXT, direccion TEXT, correo TEXT
+    )""",
+    """CREATE TABLE gastos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        empresa TEXT, detalle TEXT, monto REAL, observacion TEXT, fecha TEXT
+    )""",
+    """CREATE TABLE estados_pago (
+        correlativo TEXT PRIMARY KEY, fecha TEXT, empresa TEXT,
+        total_produccion REAL, total_venta REAL, total_gastos REAL, neto REAL
+    )""",
+    """CREATE TABLE estados_pago_detalle (
+        correlativo TEXT, produccion_id INTEGER,
+        PRIMARY KEY(correlativo, produccion_id)
+    )""",
+    """CREATE TABLE estados_pago_gastos (
+        correlativo TEXT, gasto_id INTEGER,
+        PRIMARY KEY(correlativo, gasto_id)
+    )""",
+]
+
+LOTE = 50_000
+
+
+def _insertar(cur, tabla, columnas, filas):
+    sql = f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({', '.join('?' * len(columnas))})"
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= LOTE:
+            cur.executemany(sql, lote)
+            lote.clear()
+    if lote:
+        cur.executemany(sql, lote)
+
+
+def generar(ruta, produccion=500_000, tramos=5_000, triots=200, personal=2_000,
+            empresas=100, gastos=10_000, estados=1_000, actividades=60,
+            facturado=0.6, dias=365, semilla=1):
+    """
+    Crea `ruta` desde cero. `facturado` es la fracción de producción (y de
+    gastos) ya incluida en algún estado de pago.
+    """
+    rnd = random.Random(semilla)
+    if os.path.exists(ruta):
+        os.remove(ruta)
+    conn = sqlite3.connect(ruta)
+    cur = conn.cursor()
+    for sql in ESQUEMA:
+        cur.execute(sql)
+
+    nombres_emp = [f"SUBCONTRATO {i:03d}" for i in range(1, empresas + 1)]
+    _insertar(cur, "empresas", ["nombre", "rut", "representante", "direccion", "correo"],
+              ((n, f"{76000000 + i}-{i % 10}", f"Representante {i}", f"Dirección {i}",
+                f"contacto{i}@empresa.cl") for i, n in enumerate(nombres_emp, 1)))
+
+    acts = [(f"ACT-{i:03d}", f"ACTIVIDAD {i:03d}", rnd.choice(["MT", "UN", "GL"]),
+             f"GRUPO {i % 6}", rnd.choice(["Programada", "Extra Programática"]),
+             float(rnd.randrange(100, 30000, 50)))
+            for i in range(1, actividades + 1)]
+    _insertar(cur, "actividades",
+              ["codigo", "descripcion", "unidad", "grupo", "tipo", "valor_produccion", "valor_venta"],
+              ((c, d, u, g, t, v, round(v * rnd.uniform(1.3, 2.2))) for c, d, u, g, t, v in acts))
+    desc_acts = [a[1] for a in acts]
+
+    trabajadores = [(f"TRABAJADOR {i:05d}", rnd.choice(nombres_emp)) for i in range(1, personal + 1)]
+    _insertar(cur, "personal", ["nombre", "rut", "cargo", "empresa"],
+              ((n, f"{10000000 + i}-{i % 10}", rnd.choice(["Técnico", "Ayudante", "Supervisor"]), e)
+               for i, (n, e) in enumerate(trabajadores, 1)))
+
+    lista_tramos = []
+    por_triot = max(1, tramos // triots)
+    for t in range(1, triots + 1):
+        metro = 0
+        for k in range(1, por_triot + 1):
+            largo = rnd.randrange(200, 3000)
+            lista_tramos.append((f"TRIOT-{t:03d}", str(k), metro, metro + largo,
+                                 f"MUFA{t:03d}-{k}", f"MUFA{t:03d}-{k + 1}"))
+            metro += largo
+    _insertar(cur, "tramos", ["triot", "tramo", "inicio", "fin", "mufa_inicio", "mufa_fin"],
+              ((tr, tm, str(i), str(f), mi, mf) for tr, tm, i, f, mi, mf in lista_tramos))
+
+    hoy = date.today()
+
+    def filas_produccion():
+        for _ in range(produccion):
+            tr, tm, ini, fin, mi, mf = rnd.choice(lista_tramos)
+            a = rnd.randrange(ini, fin)
+            b = min(fin, a + rnd.randrange(10, 400))
+            yield ((hoy - timedelta(days=rnd.randrange(dias))).isoformat(),
+                   rnd.choice(desc_acts), rnd.choice(trabajadores)[0], tr, tm,
+                   str(a), str(b), mi, mf, float(b - a), rnd.randrange(0, 101))
+    _insertar(cur, "produccion",
+              ["fecha", "actividad", "trabajador", "triot", "tramo", "inicio", "fin",
+               "mufa_origen", "mufa_final", "cantidad", "rematado"],
+              filas_produccion())
+
+    _insertar(cur, "gastos", ["empresa", "detalle", "monto", "observacion", "fecha"],
+              ((rnd.choice(nombres_emp), f"Gasto {i}", float(rnd.randrange(1000, 500000, 500)),
+                "", (hoy - timedelta(days=rnd.randrange(dias))).isoformat())
+               for i in range(1, gastos + 1)))
+
+    # Estados de pago: reparten la fracción facturada de producción y gastos
+    correlativos = [f"EGTD-{i:02d}" for i in range(1, estados + 1)]
+    _insertar(cur, "estados_pago",
+              ["correlativo", "fecha", "empresa", "total_produccion", "total_venta",
+               "total_gastos", "neto"],
+              ((c, (hoy - timedelta(days=rnd.randrange(dias))).isoformat(),
+                rnd.choice(nombres_emp), 0.0, 0.0, 0.0, 0.0) for c in correlativos))
+    if estados:
+        _insertar(cur, "estados_pago_detalle", ["correlativo", "produccion_id"],
+                  ((correlativos[i % estados], i + 1) for i in range(int(produccion * facturado))))
+        _insertar(cur, "estados_pago_gastos", ["correlativo", "gasto_id"],
+                  ((correlativos[i % estados], i + 1) for i in range(int(gastos * facturado))))
+
+    cur.execute("INSERT INTO usuarios (usuario, rol, nombre, password) VALUES ('admin', 'admin', 'Admin', '')")
+    conn.commit()
+    migrar(conn)
+    conn.close()
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--db", default="bench_fibra.db")
+    p.add_argument("--produccion", type=int, default=500_000)
+    p.add_argument("--tramos", type=int, default=5_000)
+    p.add_argument("--triots", type=int, default=200)
+    p.add_argument("--personal", type=int, default=2_000)
+    p.add_argument("--empresas", type=int, default=100)
+    p.add_argument("--gastos", type=int, default=10_000)
+    p.add_argument("--estados", type=int, default=1_000)
+    p.add_argument("--actividades", type=int, default=60)
+    p.add_argument("--facturado", type=float, default=0.6)
+    p.add_argument("--semilla", type=int, default=1)
+    a = p.parse_args()
+    generar(a.db, a.produccion, a.tramos, a.triots, a.personal, a.empresas,
+            a.gastos, a.estados, a.actividades, a.facturado, semilla=a.semilla)
+    print(f"✅ Base sintética creada en {a.db}")
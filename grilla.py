@@ -0,0 +1,119 @@
+import streamlit as st
+from config import GRILLA_TAMANO
+from almacenamiento import repo
+
+# --- Grilla paginada para las páginas de mantenimiento ---
+# Muestra una página de la tabla con búsqueda y orden resueltos en la base de
+# datos, y solo crea widgets de edición para la fila elegida: el costo de
+# cada rerun no depende del tamaño de la tabla.
+#
+# La paginación es por keyset sobre (columna de orden, id): la página
+# siguiente son las filas con el mismo valor de orden e id mayor al último
+# mostrado, y luego las de valor de orden mayor. Las filas con la columna de
+# orden vacía (NULL) solo se recorren completas ordenando por id.
+
+
+def leer_pagina(tabla, columnas, orden="id", descendente=False, despues=None,
+                filtros=(), tamano=None) -> list:
+    """
+    Hasta `tamano` filas ordenadas por (`orden`, id). `despues` es el
+    cursor (valor de orden, id) de la última fila de la página anterior.
+    """
+    tamano = tamano or GRILLA_TAMANO
+    filtros = list(filtros)
+    siguiente = "lt" if descendente else "gt"
+    por_id = [("id", descendente)]
+    por_orden = [(orden, descendente)] + (por_id if orden != "id" else [])
+    if despues is None:
+        return repo.seleccionar(tabla, columnas, filtros, por_orden, limite=tamano)
+    valor, ultimo_id = despues
+    if orden == "id":
+        return repo.seleccionar(tabla, columnas, filtros + [("id", siguiente, ultimo_id)],
+                                por_id, limite=tamano)
+    filas = repo.seleccionar(tabla, columnas,
+                             filtros + [(orden, "eq", valor), ("id", siguiente, ultimo_id)],
+                             por_id, limite=tamano)
+    if len(filas) < tamano:
+        filas += repo.seleccionar(tabla, columnas, filtros + [(orden, siguiente, valor)],
+                                  por_orden, limite=tamano - len(filas))
+    return filas
+
+
+def pagina_actual(tabla: str, columnas: list, filtros, orden: str, descendente: bool,
+                  prefijo: str, tamano: int | None = None) -> list | None:
+    """
+    Lee la página actual de la consulta y dibuja los botones de página.
+    `columnas` debe incluir id y `orden`. Un cambio de filtros u orden vuelve
+    a la primera página. Devuelve las filas (None si la lectura falló).
+    """
+    tamano = tamano or GRILLA_TAMANO
+    filtros = list(filtros)
+    consulta = (repr(filtros), orden, descendente)
+    if st.session_state.get(f"{prefijo}_consulta") != consulta:
+        st.session_state[f"{prefijo}_consulta"] = consulta
+        st.session_state[f"{prefijo}_cursores"] = [None]
+        st.session_state.pop(f"{prefijo}_sel", None)
+    cursores = st.session_state[f"{prefijo}_cursores"]
+
+    try:
+        # Una fila extra indica si hay página siguiente
+        filas = leer_pagina(tabla, ", ".join(columnas), orden, descendente, cursores[-1],
+                            filtros, tamano + 1)
+    except Exception as e:
+        st.error(f"⚠️ Error al leer {tabla}: {e}")
+        return None
+    hay_siguiente = len(filas) > tamano
+    filas = filas[:tamano]
+
+    def anterior():
+        cursores.pop()
+        st.session_state.pop(f"{prefijo}_sel", None)
+
+    def siguiente():
+        cursores.append((filas[-1][orden], filas[-1]["id"]))
+        st.session_state.pop(f"{prefijo}_sel", None)
+
+    p1, p2, p3 = st.columns([1, 2, 1])
+    p1.button("◀ Anterior", key=f"{prefijo}_ant", on_click=anterior, disabled=len(cursores) == 1)
+    p2.caption(f"Página {len(cursores)} · {len(filas)} registros")
+    p3.button("Siguiente ▶", key=f"{prefijo}_sig", on_click=siguiente, disabled=not hay_siguiente)
+    return filas
+
+
+def tabla_paginada(tabla: str, columnas: list, filtros, orden: str, descendente: bool,
+                   prefijo: str, etiqueta=None, tamano: int | None = None) -> dict | None:
+    """
+    pagina_actual() mostrada como tabla, con selector de fila.
+    `etiqueta(fila)` es el texto de cada fila en el selector.
+    Devuelve la fila elegida, o None.
+    """
+    etiqueta = etiqueta or (lambda f: str(f["id"]))
+    filas = pagina_actual(tabla, columnas, filtros, orden, descendente, prefijo, tamano)
+    if filas is None:
+        return None
+    if filas:
+        st.dataframe(filas, column_order=columnas, use_container_width=True, hide_index=True)
+    else:
+        st.info("No hay registros que coincidan.")
+
+    opciones = [None] + list(range(len(filas)))
+    if st.session_state.get(f"{prefijo}_sel") not in opciones:
+        st.session_state.pop(f"{prefijo}_sel", None)
+    i = st.selectbox("Registro a editar", opciones, key=f"{prefijo}_sel",
+                     format_func=lambda i: "—" if i is None else etiqueta(filas[i]))
+    return filas[i] if i is not None else None
+
+
+def grilla(tabla: str, columnas: list, buscar_en: list, ordenar_por: list, prefijo: str,
+           etiqueta=None, tamano: int | None = None) -> dict | None:
+    """
+    tabla_paginada() con buscador de texto (ilike sobre una columna de
+    `buscar_en`) y orden a elección entre `ordenar_por`.
+    """
+    c1, c2, c3, c4 = st.columns([3, 2, 2, 1])
+    texto = c1.text_input("Buscar", key=f"{prefijo}_buscar").strip()
+    campo = c2.selectbox("en", buscar_en, key=f"{prefijo}_campo")
+    orden = c3.selectbox("Ordenar por", ordenar_por, key=f"{prefijo}_orden")
+    descendente = c4.toggle("Desc.", key=f"{prefijo}_desc")
+    filtros = [(campo, "ilike", f"%{texto}%")] if texto else []
+    return tabla_paginada(tabla, columnas, filtros, orden, descendente, prefijo, etiqueta, tamano)
@@ -0,0 +1,168 @@
+"""
+Importación masiva de producción desde CSV o Excel.
+
+    python importar_produccion.py planilla.xlsx [--solo-validar] [--permitir-solapes]
+
+Columnas: fecha, actividad, trabajador, triot, tramo, cantidad y, opcionales,
+inicio, fin y rematado. Las MUFA (y el inicio/fin, si vienen vacíos) se
+toman del tramo. Las filas cuyos metros ya están registrados para la misma
+actividad y tramo (ver solapes.py) no se importan salvo --permitir-solapes.
+"""
+import argparse
+import pandas as pd
+from config import LOTE_INSERCION, SOLAPES
+from almacenamiento import repo
+import catalogos
+import solapes
+from planillas import leer_planilla, normalizar
+
+OBLIGATORIAS = ["fecha", "actividad", "trabajador", "triot", "tramo", "cantidad"]
+OPCIONALES = ["inicio", "fin", "rematado"]
+COLUMNAS_PRODUCCION = ["fecha", "actividad", "trabajador", "triot", "tramo", "inicio", "fin",
+                       "mufa_origen", "mufa_final", "cantidad", "rematado"]
+
+# --- Validación ---
+
+def _canonico(serie: pd.Series, valores: pd.Series) -> pd.Series:
+    """Valor del catálogo que corresponde a cada dato (sin distinguir mayúsculas ni espacios), o NaN."""
+    mapa = pd.Series(valores.to_numpy(), index=normalizar(valores))
+    mapa = mapa[~mapa.index.duplicated()]
+    return normalizar(serie).map(mapa)
+
+
+def validar(df: pd.DataFrame, df_act: pd.DataFrame, df_pers: pd.DataFrame,
+            df_tr: pd.DataFrame):
+    """
+    Valida un trozo contra los catálogos, sin recorrer fila a fila.
+    Devuelve (filas válidas con las columnas de `produccion` y su `fila`,
+    errores con columnas fila y error).
+    """
+    df = df.reset_index(drop=True)
+    for col in OPCIONALES:
+        if col not in df.columns:
+            df[col] = ""
+    problemas = []     # (máscara de filas con error, mensaje)
+
+    # AAAA-MM-DD (o fecha de Excel) y, si no, formato chileno DD-MM-AAAA o
+    # DD/MM/AAAA; cualquier otra cosa (p. ej. 2025-13-01) es un error
+    texto = df["fecha"].str.strip()
+    fecha = pd.to_datetime(texto, errors="coerce", format="ISO8601")
+    for formato in ("%d-%m-%Y", "%d/%m/%Y"):
+        fecha = fecha.fillna(pd.to_datetime(texto, errors="coerce", format=formato))
+    problemas.append((fecha.isna(), "fecha no válida"))
+
+    actividad = _canonico(df["actividad"], df_act["descripcion"])
+    problemas.append((actividad.isna(), "actividad no existe"))
+    trabajador = _canonico(df["trabajador"], df_pers["nombre"])
+    problemas.append((trabajador.isna(), "trabajador no existe"))
+
+    # TRIOT y tramo: un solo merge trae también las MUFA y el inicio/fin
+    tramos = df_tr.assign(_t=normalizar(df_tr["triot"]), _r=normalizar(df_tr["tramo"]))
+    tramos = tramos.drop_duplicates(["_t", "_r"])
+    cruce = pd.DataFrame({"_t": normalizar(df["triot"]), "_r": normalizar(df["tramo"])}).merge(
+        tramos, on=["_t", "_r"], how="left", validate="many_to_one"
+    )
+    problemas.append((cruce["triot"].isna(), "TRIOT/tramo no existe"))
+
+    cantidad = pd.to_numeric(df["cantidad"].str.strip().str.replace(",", ".", regex=False),
+                             errors="coerce")
+    problemas.append((cantidad.isna() | (cantidad < 0), "cantidad no válida"))
+    rematado_txt = df["rematado"].str.strip().str.rstrip("%")
+    rematado = pd.to_numeric(rematado_txt.where(rematado_txt != "", "0"), errors="coerce")
+    problemas.append((rematado.isna() | (rematado < 0) | (rematado > 100), "% rematado no válido"))
+
+    inicio = df["inicio"].str.strip()
+    fin = df["fin"].str.strip()
+    validas = pd.DataFrame({
+        "fecha": fecha.dt.strftime("%Y-%m-%d"),
+        "actividad": actividad,
+        "trabajador": trabajador,
+        "triot": cruce["triot"],
+        "tramo": cruce["tramo"],
+        "inicio": inicio.where(inicio != "", cruce["inicio"]),
+        "fin": fin.where(fin != "", cruce["fin"]),
+        "mufa_origen": cruce["mufa_inicio"],
+        "mufa_final": cruce["mufa_fin"],
+        "cantidad": cantidad,
+        "rematado": rematado.round(),
+        "fila": df["fila"],
+    })
+
+    con_error = pd.Series(False, index=df.index)
+    mensajes = pd.Series("", index=df.index)
+    for mascara, mensaje in problemas:
+        mascara = mascara.fillna(True).to_numpy()
+        mensajes[mascara] = mensajes[mascara] + "; " + mensaje
+        con_error |= mascara
+    errores = pd.DataFrame({"fila": df.loc[con_error, "fila"].to_numpy(),
+                            "error": mensajes[con_error].str.lstrip("; ").to_numpy()})
+    return validas[~con_error].reset_index(drop=True), errores
+
+
+def validar_archivo(archivo, nombre: str):
+    """Lee y valida todo el archivo. Devuelve (válidas, errores)."""
+    df_act = catalogos.obtener("actividades")
+    df_pers = catalogos.obtener("personal")
+    df_tr = catalogos.obtener("tramos")
+    validas, errores = [], []
+    for trozo in leer_planilla(archivo, nombre, OBLIGATORIAS):
+        v, e = validar(trozo, df_act, df_pers, df_tr)
+        validas.append(v)
+        errores.append(e)
+    if not validas:
+        return (pd.DataFrame(columns=COLUMNAS_PRODUCCION),
+                pd.DataFrame(columns=["fila", "error"]))
+    return pd.concat(validas, ignore_index=True), pd.concat(errores, ignore_index=True)
+
+
+def separar_solapes(validas: pd.DataFrame, permitir: bool = False):
+    """
+    (filas a importar, cruces de solapes.revisar()). Las filas que se
+    solapan con producción guardada o con otra fila anterior del archivo se
+    dejan fuera, salvo que `permitir` y SOLAPES sea "advertir".
+    """
+    if SOLAPES == "no" or validas.empty:
+        return validas, pd.DataFrame(columns=["fila", "contra", "inicio", "fin", "metros", "exacto"])
+    cruces = solapes.revisar(validas)
+    if permitir and SOLAPES == "advertir":
+        return validas, cruces
+    return validas[~validas["fila"].isin(cruces["fila"])].reset_index(drop=True), cruces
+
+# --- Inserción ---
+
+def insertar(validas: pd.DataFrame, tamano: int | None = None, progreso=None) -> int:
+    """
+    Inserta las filas en tandas de `tamano` (LOTE_INSERCION por defecto).
+    `progreso(insertadas, total)` se llama tras cada tanda. Devuelve el total.
+    """
+    tamano = tamano or LOTE_INSERCION
+    filas = validas[COLUMNAS_PRODUCCION].astype(object).where(validas.notna(), None)
+    filas = filas.to_dict("records")
+    for i in range(0, len(filas), tamano):
+        repo.insertar("produccion", filas[i:i + tamano])
+        if progreso:
+            progreso(min(i + tamano, len(filas)), len(filas))
+    return len(filas)
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("archivo")
+    p.add_argument("--solo-validar", action="store_true")
+    p.add_argument("--permitir-solapes", action="store_true")
+    a = p.parse_args()
+
+    validas, errores = validar_archivo(a.archivo, a.archivo)
+    validas, cruces = separar_solapes(validas, a.permitir_solapes)
+    print(f"Filas válidas: {len(validas)}  Con errores: {len(errores)}  "
+          f"Con solapes: {cruces['fila'].nunique()}")
+    if not errores.empty:
+        print(errores.to_string(index=False))
+    if not cruces.empty:
+        print(cruces.to_string(index=False))
+    if not a.solo_validar and not validas.empty:
+        print(f"Insertadas: {insertar(validas)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Carga masiva de tramos desde el archivo de diseño de un proyecto (CSV o
+Excel), identificados por (triot, tramo): los nuevos se insertan y los
+existentes se actualizan solo si algún dato cambió.
+
+    python importar_tramos.py diseno.xlsx [--solo-revisar]
+"""
+import argparse
+import pandas as pd
+from config import LOTE_INSERCION
+from almacenamiento import repo
+import catalogos
+from planillas import leer_planilla, normalizar
+
+COLUMNAS = ["triot", "tramo", "inicio", "fin", "mufa_inicio", "mufa_fin"]
+CLAVE = ["_t", "_r"]
+
+# --- Comparación con los tramos existentes ---
+
+def _texto(df: pd.DataFrame) -> pd.DataFrame:
+    return df[COLUMNAS].fillna("").astype(str).apply(lambda s: s.str.strip())
+
+
+def comparar(df: pd.DataFrame, existentes: pd.DataFrame):
+    """
+    Compara las filas del archivo con los tramos existentes.
+    Devuelve (nuevos, modificados con su id, cambios, errores): `cambios`
+    describe cada alta o modificación; `errores` trae fila y error.
+    """
+    archivo = _texto(df).assign(fila=df["fila"].to_numpy())
+    archivo["_t"], archivo["_r"] = normalizar(archivo["triot"]), normalizar(archivo["tramo"])
+
+    sin_clave = (archivo["_t"] == "") | (archivo["_r"] == "")
+    repetidas = archivo.duplicated(CLAVE, keep="last") & ~sin_clave
+    errores = pd.concat([
+        pd.DataFrame({"fila": archivo.loc[sin_clave, "fila"], "error": "falta TRIOT o tramo"}),
+        pd.DataFrame({"fila": archivo.loc[repetidas, "fila"],
+                      "error": "TRIOT/tramo repetido en el archivo (se usa la última fila)"}),
+    ], ignore_index=True).sort_values("fila", ignore_index=True)
+    archivo = archivo[~sin_clave & ~repetidas]
+
+    actuales = _texto(existentes).assign(id=existentes["id"].to_numpy())
+    actuales["_t"], actuales["_r"] = normalizar(actuales["triot"]), normalizar(actuales["tramo"])
+    actuales = actuales.drop_duplicates(CLAVE)
+    cruce = archivo.merge(actuales, on=CLAVE, how="left", suffixes=("", "_actual"),
+                          indicator=True, validate="one_to_one")
+
+    nuevos = cruce[cruce["_merge"] == "left_only"]
+    existen = cruce[cruce["_merge"] == "both"]
+    distintos = pd.DataFrame({c: existen[c] != existen[f"{c}_actual"] for c in COLUMNAS})
+    modificados = existen[distintos.any(axis=1)]
+    distintos = distintos.loc[modificados.index]
+
+    detalle = pd.Series("", index=modificados.index)
+    for c in COLUMNAS:
+        m = distintos[c]
+        detalle[m] = (detalle[m] + f"; {c}: " + modificados.loc[m, f"{c}_actual"]
+                      + " → " + modificados.loc[m, c])
+    cambios = pd.concat([
+        nuevos[["fila", "triot", "tramo"]].assign(cambio="nuevo", detalle=""),
+        modificados[["fila", "triot", "tramo"]].assign(cambio="modificado",
+                                                       detalle=detalle.str.lstrip("; ")),
+    ], ignore_index=True).sort_values("fila", ignore_index=True)
+
+    nuevos = nuevos[COLUMNAS].reset_index(drop=True)
+    modificados = modificados[["id"] + COLUMNAS].astype({"id": "int64"}).reset_index(drop=True)
+    return nuevos, modificados, cambios, errores
+
+
+def revisar_archivo(archivo, nombre: str):
+    """
+    Lee el archivo y lo compara con los tramos actuales (una sola lectura de
+    la tabla). Devuelve lo mismo que comparar().
+    """
+    df = pd.concat(leer_planilla(archivo, nombre, ["triot", "tramo"]), ignore_index=True)
+    for col in COLUMNAS:
+        if col not in df.columns:
+            df[col] = ""
+    # Se descarta la copia en memoria: la comparación debe ser contra lo guardado
+    catalogos.invalidar("tramos")
+    return comparar(df, catalogos.obtener("tramos", permitir_vencida=False))
+
+# --- Escritura ---
+
+def aplicar(nuevos: pd.DataFrame, modificados: pd.DataFrame, tamano: int | None = None,
+            progreso=None) -> int:
+    """
+    Inserta los nuevos y actualiza los modificados (por id) en tandas de
+    `tamano` filas. `progreso(hechas, total)` se llama tras cada tanda.
+    Devuelve el número de filas escritas.
+    """
+    tamano = tamano or LOTE_INSERCION
+    total = len(nuevos) + len(modificados)
+    hechas = 0
+    for df, escribir in ((nuevos, lambda filas: repo.insertar("tramos", filas)),
+                         (modificados, lambda filas: repo.upsert("tramos", filas, "id"))):
+        filas = df.to_dict("records")
+        for i in range(0, len(filas), tamano):
+            escribir(filas[i:i + tamano])
+            hechas += len(filas[i:i + tamano])
+            if progreso:
+                progreso(hechas, total)
+    if total:
+        catalogos.invalidar("tramos")
+    return total
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("archivo")
+    p.add_argument("--solo-revisar", action="store_true")
+    a = p.parse_args()
+
+    nuevos, modificados, cambios, errores = revisar_archivo(a.archivo, a.archivo)
+    print(f"Nuevos: {len(nuevos)}  Modificados: {len(modificados)}  Con errores: {len(errores)}")
+    if not cambios.empty:
+        print(cambios.to_string(index=False))
+    if not errores.empty:
+        print(errores.to_string(index=False))
+    if not a.solo_revisar:
+        print(f"Escritos: {aplicar(nuevos, modificados)}")
+
+
+if __name__ == "__main__":
+    main()
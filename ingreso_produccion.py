@@ -1,38 +1,262 @@
 import streamlit as st
 import pandas as pd
-from datetime import date
-from config import supabase
+from datetime import date, timedelta
+from config import SOLAPES
+from almacenamiento import repo
+import catalogos
+import agregados
+import avance
+import solapes
+import importar_produccion
+import grilla
+import edicion_lote
+from lecturas import en_paralelo
 
-# --- Acceso a datos vía Supabase ---
+# --- Acceso a datos ---
+# Los catálogos vienen de la caché compartida del proceso (ver catalogos.py)
 def leer_actividades():
-    resp = supabase.table("actividades").select("descripcion").order("descripcion").execute()
-    return pd.DataFrame(resp.data)
+    return catalogos.obtener("actividades")
 
 def leer_personal():
-    resp = supabase.table("personal").select("nombre").order("nombre").execute()
-    return pd.DataFrame(resp.data)
+    return catalogos.obtener("personal")
 
 def leer_tramos():
-    resp = supabase.table("tramos").select(
-        "triot, tramo, inicio, fin, mufa_inicio, mufa_fin"
-    ).order("triot, tramo").execute()
-    return pd.DataFrame(resp.data)
-
-def leer_produccion():
-    resp = supabase.table("produccion").select("*").execute()
-    return pd.DataFrame(resp.data)
-
-# --- Operaciones CRUD en Supabase ---
-def guardar_produccion(**kwargs):
-    supabase.table("produccion").insert(kwargs).execute()
+    return catalogos.obtener("tramos")
+
+def leer_indice_tramos():
+    """{triot: {tramo: registro}} para los selectores en cascada."""
+    return catalogos.indice_tramos()
+
+# Historial: solo las columnas de la grilla, más reciente primero
+COLUMNAS_HISTORIAL = ["id", "fecha", "actividad", "trabajador", "triot", "tramo",
+                      "cantidad", "rematado"]
+DIAS_HISTORIAL = 7
+
+
+def filtros_historial(desde=None, hasta=None, trabajador=None, actividad=None, triot=None):
+    filtros = []
+    if desde:
+        filtros.append(("fecha", "gte", desde.isoformat()))
+    if hasta:
+        filtros.append(("fecha", "lte", hasta.isoformat()))
+    for col, valor in (("trabajador", trabajador), ("actividad", actividad), ("triot", triot)):
+        if valor:
+            filtros.append((col, "eq", valor))
+    return filtros
+
+
+def leer_produccion(despues=None, tamano=None, **filtros):
+    """Una página del historial con los filtros de filtros_historial()."""
+    return grilla.leer_pagina("produccion", ", ".join(COLUMNAS_HISTORIAL), "fecha", True,
+                              despues, filtros_historial(**filtros), tamano)
+
+
+COLUMNAS_EDICION = ["id", "fecha", "actividad", "trabajador", "triot", "tramo", "inicio", "fin",
+                    "cantidad", "rematado"]
+
+
+def leer_registro(id_prod: int):
+    """Registro completo de producción, para editarlo."""
+    return repo.uno("produccion", "*", [("id", "eq", id_prod)])
+
+def revisar_solape(registro: dict, excluir=(), confirmado=False) -> bool:
+    """
+    True si el registro se puede guardar según SOLAPES; si se solapa con
+    producción ya guardada, muestra con cuáles registros y devuelve False
+    (salvo que el usuario lo haya confirmado y SOLAPES sea "advertir").
+    """
+    if SOLAPES == "no":
+        return True
+    cruces = solapes.buscar(registro["triot"], registro["tramo"], registro["actividad"],
+                            registro["inicio"], registro["fin"], excluir)
+    if cruces.empty or (confirmado and SOLAPES != "bloquear"):
+        return True
+    ids = ", ".join(str(i) for i in cruces["id"])
+    if SOLAPES == "bloquear":
+        st.error(f"⛔ Estos metros ya están registrados para {registro['actividad']} en el "
+                 f"tramo (registros {ids}).")
+    else:
+        st.warning(f"⚠️ Estos metros ya están registrados para {registro['actividad']} en el "
+                   f"tramo (registros {ids}). Marca «Guardar aunque se solape» para "
+                   "guardarlo igual.")
+    st.dataframe(cruces, use_container_width=True, hide_index=True)
+    return False
+
+# --- Operaciones CRUD ---
+def guardar_produccion(confirmado=False, **kwargs) -> bool:
+    if not revisar_solape(kwargs, confirmado=confirmado):
+        return False
+    repo.insertar("produccion", kwargs)
     st.success("✅ Producción registrada.")
     _rerun()
+    return True
 
-def actualizar_produccion(id_prod: int, **kwargs):
-    supabase.table("produccion").update(kwargs).eq("id", id_prod).execute()
+def actualizar_produccion(id_prod: int, confirmado=False, **kwargs):
+    # Como en la grilla: lo que ya está en un estado de pago no se modifica
+    if edicion_lote.ids_facturados([id_prod], "estados_pago_detalle", "produccion_id"):
+        st.error("⛔ El registro ya está incluido en un estado de pago y no se puede modificar.")
+        return
+    if not revisar_solape(kwargs, [id_prod], confirmado):
+        return
+    anterior = repo.uno("produccion", "id, fecha, actividad, trabajador, triot, cantidad",
+                        [("id", "eq", id_prod)])
+    # guardar_lote vuelve a verificarlo al escribir, junto con que la fila exista
+    try:
+        edicion_lote.guardar("produccion", pd.DataFrame(),
+                             pd.DataFrame([{"id": id_prod, **kwargs}]), [])
+    except ValueError as e:
+        st.error(f"⚠️ {e}")
+        return
+    agregados.aplicar_cambio(anterior, {"id": id_prod, **kwargs})
+    avance.recargar([id_prod])
     st.success("✏️ Registro actualizado.")
     _rerun()
 
+def guardar_cambios_produccion(original: pd.DataFrame, nuevas: pd.DataFrame,
+                               modificadas: pd.DataFrame, borradas: list,
+                               permitir_solapes=False) -> list:
+    """
+    Valida contra los catálogos (como la importación, que además completa
+    las MUFA) y contra la producción ya guardada en los mismos metros (ver
+    solapes.py), y guarda en lote los cambios de la grilla de producción. El
+    cubo de agregados.py se ajusta con los deltas y avance.py recarga solo
+    los registros tocados, sin recalcular.
+    Devuelve la lista de errores (vacía si se guardó).
+    """
+    original = original.set_index("id")
+    modificadas = modificadas.copy()
+    if not modificadas.empty:
+        # Si cambió el tramo y no el inicio/fin, se toman los del tramo nuevo
+        antes = original.loc[modificadas["id"]].reset_index(drop=True)
+        otro_tramo = (modificadas["triot"] != antes["triot"]) | (modificadas["tramo"] != antes["tramo"])
+        for col in ("inicio", "fin"):
+            modificadas.loc[otro_tramo & (modificadas[col] == antes[col]), col] = ""
+    filas = pd.concat([
+        nuevas.assign(fila=[f"nueva {i + 1}" for i in range(len(nuevas))]),
+        modificadas.assign(fila="id " + modificadas["id"].astype(str)),
+    ], ignore_index=True)
+    texto = filas.drop(columns="id", errors="ignore").astype(object)
+    texto = texto.where(texto.notna(), "").astype(str)
+    validas, errores = importar_produccion.validar(
+        texto, leer_actividades(), leer_personal(), leer_tramos())
+    mensajes = [f"{f}: {e}" for f, e in zip(errores["fila"], errores["error"])]
+    facturados = edicion_lote.ids_facturados(
+        modificadas["id"].tolist() + list(borradas), "estados_pago_detalle", "produccion_id")
+    if facturados:
+        mensajes.append("No se pueden modificar ni borrar registros ya incluidos en un estado "
+                        f"de pago: {facturados}")
+    if mensajes:
+        return mensajes
+    if SOLAPES != "no" and (SOLAPES == "bloquear" or not permitir_solapes):
+        reemplazadas = modificadas["id"].tolist() + [int(i) for i in borradas]
+        cruces = solapes.revisar(validas, excluir=reemplazadas)
+        mensajes = [f"{f}: se solapa con {c} ({m:,.0f} m{', idéntico' if e else ''})"
+                    for f, c, m, e in zip(cruces["fila"], cruces["contra"], cruces["metros"],
+                                          cruces["exacto"])]
+        if mensajes:
+            return mensajes
+
+    es_nueva = validas["fila"].str.startswith("nueva")
+    cols = importar_produccion.COLUMNAS_PRODUCCION
+    cambiadas = validas[~es_nueva].assign(id=validas.loc[~es_nueva, "fila"].str[3:].astype("int64"))
+    try:
+        edicion_lote.guardar("produccion", validas.loc[es_nueva, cols], cambiadas[["id"] + cols],
+                             borradas)
+    except ValueError as e:
+        return [str(e)]
+
+    dims = ["fecha", "actividad", "trabajador", "triot", "cantidad"]
+    tocadas = cambiadas["id"].tolist() + [int(i) for i in borradas]
+    agregados.aplicar_cambios(
+        original.loc[tocadas, dims].rename_axis("id").reset_index().to_dict("records"),
+        cambiadas[["id"] + dims].to_dict("records"))
+    avance.recargar(tocadas)
+    return []
+
+
+def seccion_edicion_lote(filtros, df_act, df_pers, triots):
+    """Página actual del historial como grilla editable."""
+    filas = grilla.pagina_actual("produccion", COLUMNAS_EDICION, filtros, "fecha", True, "hprod")
+    if filas is None:
+        return
+    df = pd.DataFrame(filas, columns=COLUMNAS_EDICION)
+    nuevas, modificadas, borradas, aplicar = edicion_lote.editor(
+        df, "hprod_editor", COLUMNAS_EDICION[1:],
+        column_config={
+            "actividad": st.column_config.SelectboxColumn(
+                "Actividad", options=df_act["descripcion"].tolist(), required=True),
+            "trabajador": st.column_config.SelectboxColumn(
+                "Trabajador", options=df_pers["nombre"].tolist(), required=True),
+            "triot": st.column_config.SelectboxColumn(
+                "TRIOT", options=triots, required=True),
+            "cantidad": st.column_config.NumberColumn("Cantidad", min_value=0.0),
+            "rematado": st.column_config.NumberColumn("% Rematado", min_value=0, max_value=100),
+        }
+    )
+    permitir = SOLAPES == "advertir" and st.checkbox(
+        "Guardar aunque se solapen", key="hprod_solapes",
+        help="Permite guardar filas cuyos metros ya están registrados para la misma actividad")
+    if aplicar:
+        try:
+            errores = guardar_cambios_produccion(df, nuevas, modificadas, borradas, permitir)
+        except Exception as e:
+            st.error(f"⚠️ Error al guardar la producción: {e}")
+            return
+        if errores:
+            for err in errores:
+                st.error(f"❌ {err}")
+            return
+        edicion_lote.reiniciar("hprod_editor")
+        st.success(f"✅ Producción guardada: {len(nuevas)} nuevos, {len(modificadas)} modificados, "
+                   f"{len(borradas)} eliminados.")
+        _rerun()
+
+def seccion_importar():
+    with st.expander("📤 Importar planilla (CSV / Excel)"):
+        st.caption("Columnas: fecha, actividad, trabajador, triot, tramo, cantidad; "
+                   "opcionales: inicio, fin, rematado. Las MUFA se completan desde el tramo.")
+        archivo = st.file_uploader("Archivo", type=["csv", "xlsx"], key="imp_archivo")
+        if archivo is None:
+            st.session_state.pop('imp_validacion', None)
+            return
+        if st.button("Validar", key="imp_validar"):
+            try:
+                validas, errores = importar_produccion.validar_archivo(archivo, archivo.name)
+                _, cruces = importar_produccion.separar_solapes(validas)
+                st.session_state['imp_validacion'] = (archivo.name, validas, errores, cruces)
+            except Exception as e:
+                st.error(f"⚠️ Error al leer el archivo: {e}")
+        validacion = st.session_state.get('imp_validacion')
+        if validacion is None or validacion[0] != archivo.name:
+            return
+        _, validas, errores, cruces = validacion
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Filas válidas", len(validas))
+        c2.metric("Filas con errores", len(errores))
+        c3.metric("Filas con solapes", cruces["fila"].nunique())
+        if not errores.empty:
+            st.dataframe(errores, use_container_width=True, hide_index=True)
+            st.download_button("Descargar errores", errores.to_csv(index=False),
+                               "errores_importacion.csv", "text/csv")
+        if not cruces.empty:
+            st.caption("Filas cuyos metros ya están registrados para la misma actividad y tramo "
+                       "(en la base o en una fila anterior del archivo):")
+            st.dataframe(cruces, use_container_width=True, hide_index=True)
+            if not (SOLAPES == "advertir" and st.checkbox("Importar también las filas con solapes",
+                                                          key="imp_solapes")):
+                validas = validas[~validas["fila"].isin(cruces["fila"])]
+        if not validas.empty and st.button(f"Importar {len(validas)} filas válidas", key="imp_insertar"):
+            barra = st.progress(0.0)
+            try:
+                n = importar_produccion.insertar(
+                    validas, progreso=lambda i, total: barra.progress(i / total, text=f"{i}/{total}")
+                )
+            except Exception as e:
+                st.error(f"⚠️ Error al importar: {e}")
+            else:
+                st.session_state.pop('imp_validacion', None)
+                st.success(f"✅ {n} registros de producción importados.")
+
 def _rerun():
     if hasattr(st, 'experimental_rerun'):
         st.experimental_rerun()
@@ -46,14 +270,14 @@ def app():
     # Reset formulario tras submit
     if st.session_state.get('reset_form'):
         for k in ['inicio','fin','cantidad','rematado','fecha','actividad',
-                  'trabajador','triot','tramo']:
+                  'trabajador','triot','tramo','forzar_solape']:
             st.session_state.pop(k, None)
         st.session_state['reset_form'] = False
 
-    # Carga catálogos
-    df_act = leer_actividades()
-    df_pers = leer_personal()
-    df_tr  = leer_tramos()
+    # Carga catálogos (en paralelo cuando no están en memoria)
+    r = en_paralelo({"act": leer_actividades, "pers": leer_personal, "tr": leer_indice_tramos})
+    df_act, df_pers, idx_tr = r["act"], r["pers"], r["tr"]
+    triots = list(idx_tr)
 
     # Guards
     if df_act.empty:
@@ -62,7 +286,7 @@ def app():
     if df_pers.empty:
         st.warning("⚠️ Primero registra al menos un trabajador.")
         return
-    if df_tr.empty:
+    if not idx_tr:
         st.warning("⚠️ Primero registra al menos un tramo.")
         return
 
@@ -73,13 +297,12 @@ def app():
         actividad = st.selectbox("Actividad", df_act["descripcion"].tolist(), key="actividad")
         trabajador = st.selectbox("Trabajador", df_pers["nombre"].tolist(), key="trabajador")
 
-        triots = df_tr["triot"].unique().tolist()
         triot = st.selectbox("TRIOT", triots, key="triot")
 
         # Autocompletar Tramo/Mufa
-        df_tri = df_tr[df_tr["triot"] == triot]
-        tramo = st.selectbox("Tramo", df_tri["tramo"].tolist(), key="tramo")
-        fila = df_tri[df_tri["tramo"] == tramo].iloc[0]
+        tramos_triot = idx_tr[triot]
+        tramo = st.selectbox("Tramo", list(tramos_triot), key="tramo")
+        fila = tramos_triot[tramo]
         inicio_val, fin_val = fila["inicio"], fila["fin"]
         mufa_o, mufa_f = fila["mufa_inicio"], fila["mufa_fin"]
 
@@ -90,9 +313,12 @@ def app():
 
         cantidad = st.number_input("Cantidad realizada", min_value=0.0, value=0.0, step=1.0, key="cantidad")
         rematado = st.slider("% Rematado", 0, 100, key="rematado")
+        confirmado = SOLAPES == "advertir" and st.checkbox("Guardar aunque se solape",
+                                                           key="forzar_solape")
 
         if st.form_submit_button("Registrar producción"):
-            guardar_produccion(
+            guardado = guardar_produccion(
+                confirmado=confirmado,
                 fecha=fecha.isoformat(),
                 actividad=actividad,
                 trabajador=trabajador,
@@ -105,20 +331,49 @@ def app():
                 cantidad=float(cantidad),
                 rematado=int(rematado)
             )
-            st.session_state['reset_form'] = True
+            if guardado:
+                st.session_state['reset_form'] = True
+
+    seccion_importar()
 
     st.markdown("---")
     st.subheader("📄 Historial de producción")
-    df_hist = leer_produccion()
-    st.dataframe(df_hist, use_container_width=True)
+    hoy = date.today()
+    f1, f2, f3, f4 = st.columns(4)
+    rango = f1.date_input("Fechas", value=(hoy - timedelta(days=DIAS_HISTORIAL), hoy),
+                          key="hprod_rango")
+    todos = "(Todos)"
+    trabajador_f = f2.selectbox("Trabajador", [todos] + df_pers["nombre"].tolist(), key="hprod_trab")
+    actividad_f = f3.selectbox("Actividad", [todos] + df_act["descripcion"].tolist(), key="hprod_act")
+    triot_f = f4.selectbox("TRIOT", [todos] + triots, key="hprod_triot")
+    # Mientras se elige el rango, date_input devuelve una sola fecha
+    desde, hasta = (tuple(rango) + (None, None))[:2]
+    filtros = filtros_historial(
+        desde, hasta,
+        **{k: v for k, v in (("trabajador", trabajador_f), ("actividad", actividad_f),
+                             ("triot", triot_f)) if v != todos}
+    )
+    if st.toggle("✏️ Edición en lote", key="hprod_lote",
+                 help="Editar, agregar y borrar varias filas de la página y guardarlas juntas"):
+        seccion_edicion_lote(filtros, df_act, df_pers, triots)
+        return
+
+    sel = grilla.tabla_paginada(
+        "produccion", COLUMNAS_HISTORIAL, filtros, "fecha", True, "hprod",
+        etiqueta=lambda f: f"{f['id']} · {f['fecha']} · {f['trabajador']} · {f['actividad']}"
+    )
 
     # Editar registro existente
     st.markdown("---")
     st.subheader("✏️ Editar registro existente")
-    if not df_hist.empty:
-        ids = df_hist["id"].tolist()
-        sel_id = st.selectbox("ID a editar", ids, key="edit_id")
-        record = df_hist[df_hist["id"] == sel_id].iloc[0]
+    if sel is None:
+        st.caption("Elige un registro del historial para editarlo.")
+    else:
+        sel_id = sel["id"]
+        record = leer_registro(sel_id)
+        if record is None:
+            st.warning("⚠️ El registro ya no existe.")
+            return
 
         with st.form("form_edit"):
             fecha_e = st.date_input("Fecha", value=pd.to_datetime(record["fecha"]).date(), key="edit_fecha")
@@ -132,14 +387,13 @@ def app():
             trabajador_e = st.selectbox("Trabajador", pers_list,
                                         index=pers_list.index(record["trabajador"]), key="edit_pers")
 
-            triots = df_tr["triot"].unique().tolist()
             triot_e = st.selectbox("TRIOT", triots,
                                    index=triots.index(record["triot"]), key="edit_triot")
 
-            df_tri2 = df_tr[df_tr["triot"] == triot_e]
-            tramo_e = st.selectbox("Tramo", df_tri2["tramo"].tolist(),
-                                   index=df_tri2["tramo"].tolist().index(record["tramo"]), key="edit_tramo")
-            fila2 = df_tri2[df_tri2["tramo"] == tramo_e].iloc[0]
+            tramos_triot2 = list(idx_tr[triot_e])
+            tramo_e = st.selectbox("Tramo", tramos_triot2,
+                                   index=tramos_triot2.index(record["tramo"]), key="edit_tramo")
+            fila2 = idx_tr[triot_e][tramo_e]
 
             inicio_e = st.text_input("Inicio", value=str(fila2["inicio"]), key="edit_inicio")
             fin_e    = st.text_input("Fin"   , value=str(fila2["fin"])   , key="edit_fin")
@@ -153,10 +407,13 @@ def app():
                                          key="edit_cant")
             rematado_e = st.slider("% Rematado", 0, 100,
                                    value=int(record["rematado"]), key="edit_rem")
+            confirmado_e = SOLAPES == "advertir" and st.checkbox("Guardar aunque se solape",
+                                                                 key="edit_forzar")
 
             if st.form_submit_button("Actualizar registro"):
                 actualizar_produccion(
                     sel_id,
+                    confirmado=confirmado_e,
                     fecha=fecha_e.isoformat(),
                     actividad=actividad_e,
                     trabajador=trabajador_e,
@@ -0,0 +1,108 @@
+import contextvars
+import json
+import time
+
+# --- Registro de consultas por ejecución de la página ---
+# app.py abre un registro al comienzo de cada rerun cuando el panel de
+# rendimiento está activo; el repositorio (almacenamiento.py) anota ahí cada
+# consulta. Sin registro abierto no se mide nada.
+
+_registro = contextvars.ContextVar("registro_consultas", default=None)
+
+
+class _Registro(list):
+    def __init__(self):
+        super().__init__()
+        self.inicio = time.perf_counter()
+
+
+def iniciar_registro():
+    """Abre un registro vacío para la ejecución actual."""
+    _registro.set(_Registro())
+
+
+def activo() -> bool:
+    return _registro.get() is not None
+
+
+def consultas() -> list:
+    """Consultas anotadas en la ejecución actual, en orden de inicio."""
+    registro = _registro.get()
+    return sorted(registro, key=lambda r: r["inicio_ms"]) if registro is not None else []
+
+
+def _describir_filtros(filtros) -> str:
+    partes = []
+    for col, op, valor in filtros:
+        if op == "in":
+            valor = f"[{len(list(valor))} valores]"
+        partes.append(f"{col} {op} {valor}")
+    return ", ".join(partes)
+
+
+def medir(tabla: str, operacion: str, filtros, funcion):
+    """Ejecuta `funcion()` y, si hay un registro abierto, anota la consulta."""
+    registro = _registro.get()
+    if registro is None:
+        return funcion()
+    t0 = time.perf_counter()
+    error = None
+    resultado = None
+    try:
+        resultado = funcion()
+        return resultado
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        fin = time.perf_counter()
+        filas = len(resultado) if isinstance(resultado, list) else None
+        registro.append({
+            "tabla": tabla,
+            "operacion": operacion,
+            "filtros": _describir_filtros(filtros),
+            "inicio_ms": round((t0 - registro.inicio) * 1000, 2),
+            "duracion_ms": round((fin - t0) * 1000, 2),
+            "filas": filas,
+            "bytes": len(json.dumps(resultado, default=str)) if filas is not None else 0,
+            "error": error,
+        })
+
+
+def propagar(funcion):
+    """
+    Envuelve `funcion` para que, al correr en otro hilo (pool de páginas,
+    lecturas en paralelo), anote en el registro de la ejecución que la creó.
+    """
+    registro = _registro.get()
+
+    def envuelta(*args, **kwargs):
+        token = _registro.set(registro)
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            _registro.reset(token)
+    return envuelta
+
+
+# --- Arranque del proceso ---
+# Duración de las etapas de arranque del worker (importaciones, carga de cada
+# sección, primera ejecución completa). Solo se guarda la primera vez que
+# ocurre cada etapa en el proceso, que es la que paga el costo en frío.
+
+_arranque = {}
+
+
+def marcar_arranque(etapa: str, segundos: float):
+    """Anota la duración de `etapa` si es la primera vez que ocurre en el proceso."""
+    _arranque.setdefault(etapa, round(segundos * 1000, 1))
+
+
+def arranque() -> dict:
+    """Etapas de arranque del proceso y su duración en ms, en orden."""
+    return dict(_arranque)
+
+
+def a_jsonl(filas: list) -> str:
+    """Consultas como JSON lines, una por línea."""
+    return "\n".join(json.dumps(f, ensure_ascii=False) for f in filas) + "\n"
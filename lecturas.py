@@ -0,0 +1,68 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as TiempoAgotado
+from config import LECTURAS_CONCURRENCIA, LECTURA_TIMEOUT
+from instrumentacion import propagar
+
+# --- Lecturas independientes en paralelo ---
+# Una página declara las lecturas que no dependen entre sí y en_paralelo()
+# las ejecuta a la vez en un pool compartido por el proceso, acotado a
+# LECTURAS_CONCURRENCIA hilos: la latencia pasa a ser la de la lectura más
+# lenta en vez de la suma de todas. Las consultas quedan anotadas en el
+# panel de rendimiento de la ejecución que las pidió (ver instrumentacion).
+
+_pool = None
+_candado = threading.Lock()
+_hilo = threading.local()
+
+
+def _marcar_hilo():
+    _hilo.en_pool = True
+
+
+def _obtener_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _candado:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=LECTURAS_CONCURRENCIA,
+                                       thread_name_prefix="lectura", initializer=_marcar_hilo)
+        return _pool
+
+
+def en_paralelo(lecturas: dict, timeout: float | None = None) -> dict:
+    """
+    Ejecuta las lecturas (nombre -> función sin argumentos, o (función,
+    timeout) para un plazo propio) y devuelve nombre -> resultado.
+
+    El plazo de cada lectura (`timeout`, LECTURA_TIMEOUT por defecto) se
+    cuenta desde que se pide; si se cumple se lanza TimeoutError. Si una
+    lectura falla se relanza su excepción. Llamada desde una lectura que ya
+    corre en el pool, ejecuta en serie para no quedar esperando al pool.
+    """
+    plazo_comun = LECTURA_TIMEOUT if timeout is None else timeout
+    tareas = {}
+    for nombre, lectura in lecturas.items():
+        funcion, plazo = lectura if isinstance(lectura, tuple) else (lectura, plazo_comun)
+        tareas[nombre] = (funcion, plazo)
+
+    if len(tareas) < 2 or getattr(_hilo, "en_pool", False):
+        return {nombre: funcion() for nombre, (funcion, _) in tareas.items()}
+
+    pool = _obtener_pool()
+    inicio = time.monotonic()
+    futuros = {nombre: pool.submit(propagar(funcion)) for nombre, (funcion, _) in tareas.items()}
+    resultados = {}
+    try:
+        for nombre, futuro in futuros.items():
+            restante = max(0.0, tareas[nombre][1] - (time.monotonic() - inicio))
+            try:
+                resultados[nombre] = futuro.result(timeout=restante)
+            except TiempoAgotado:
+                raise TimeoutError(
+                    f"La lectura {nombre!r} no terminó en {tareas[nombre][1]:g} s"
+                ) from None
+    finally:
+        # Si algo falló, las lecturas que aún no empezaron no se ejecutan
+        for futuro in futuros.values():
+            futuro.cancel()
+    return resultados
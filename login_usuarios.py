@@ -1,6 +1,6 @@
 import streamlit as st
 import hashlib
-from config import supabase
+from almacenamiento import repo
 
 # --- Autenticación vía tabla "usuarios" en Supabase ---
 # La tabla "usuarios" debe existir en tu proyecto Supabase
@@ -8,18 +8,9 @@ from config import supabase
 
 def verificar_credenciales(usuario: str, password: str):
     # Consulta al registro de usuario
-    resp = (
-        supabase
-        .table("usuarios")
-        .select("nombre, usuario, password, rol")
-        .eq("usuario", usuario)
-        .limit(1)
-        .execute()
-    )
-    data = resp.data
-    if not data:
+    user = repo.uno("usuarios", "nombre, usuario, password, rol", [("usuario", "eq", usuario)])
+    if not user:
         return None
-    user = data[0]
     # Comparar hash de la contraseña
     if user["password"] == hashlib.sha256(password.encode()).hexdigest():
         return {"nombre": user["nombre"], "usuario": user["usuario"], "rol": user["rol"]}
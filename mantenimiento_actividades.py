@@ -1,18 +1,13 @@
 import streamlit as st
-from config import supabase
+from almacenamiento import repo
+import catalogos
+from grilla import grilla
 
-# --- Acceso y operaciones sobre la tabla "actividades" en Supabase ---
+# --- Acceso y operaciones sobre la tabla "actividades" ---
 
 def listar_actividades():
     """Devuelve lista de dicts con todas las actividades ordenadas por descripción."""
-    resp = (
-        supabase
-        .table("actividades")
-        .select("id, codigo, descripcion, unidad, grupo, tipo, valor_produccion, valor_venta")
-        .order("descripcion")
-        .execute()
-    )
-    return resp.data or []
+    return catalogos.obtener("actividades").to_dict("records")
 
 
 def agregar_actividad(codigo: str,
@@ -22,7 +17,7 @@ def agregar_actividad(codigo: str,
                      tipo: str,
                      valor_prod: float,
                      valor_venta: float):
-    supabase.table("actividades").insert({
+    repo.insertar("actividades", {
         "codigo": codigo,
         "descripcion": descripcion,
         "unidad": unidad,
@@ -30,7 +25,8 @@ def agregar_actividad(codigo: str,
         "tipo": tipo,
         "valor_produccion": valor_prod,
         "valor_venta": valor_venta
-    }).execute()
+    })
+    catalogos.invalidar("actividades")
     st.success("✅ Actividad registrada.")
     # Recarga la app
     if hasattr(st, 'experimental_rerun'):
@@ -47,7 +43,7 @@ def actualizar_actividad(id_act: int,
                          tipo: str,
                          valor_prod: float,
                          valor_venta: float):
-    supabase.table("actividades").update({
+    repo.actualizar("actividades", {
         "codigo": codigo,
         "descripcion": descripcion,
         "unidad": unidad,
@@ -55,7 +51,8 @@ def actualizar_actividad(id_act: int,
         "tipo": tipo,
         "valor_produccion": valor_prod,
         "valor_venta": valor_venta
-    }).eq("id", id_act).execute()
+    }, [("id", "eq", id_act)])
+    catalogos.invalidar("actividades")
     st.success("✏️ Actividad actualizada.")
     if hasattr(st, 'experimental_rerun'):
         st.experimental_rerun()
@@ -64,7 +61,8 @@ def actualizar_actividad(id_act: int,
 
 
 def eliminar_actividad(id_act: int):
-    supabase.table("actividades").delete().eq("id", id_act).execute()
+    repo.eliminar("actividades", [("id", "eq", id_act)])
+    catalogos.invalidar("actividades")
     st.success("🗑️ Actividad eliminada.")
     if hasattr(st, 'experimental_rerun'):
         st.experimental_rerun()
@@ -105,11 +103,19 @@ def app():
 
     st.markdown("---")
     st.subheader("📄 Actividades registradas")
-    actividades = listar_actividades()
+    act = grilla(
+        "actividades",
+        ["id", "codigo", "descripcion", "unidad", "grupo", "tipo", "valor_produccion", "valor_venta"],
+        buscar_en=["descripcion", "codigo", "grupo"],
+        ordenar_por=["descripcion", "codigo", "grupo", "id"],
+        prefijo="g_act",
+        etiqueta=lambda a: f"{a['codigo']} - {a['descripcion']}"
+    )
 
-    for act in actividades:
+    # Solo la actividad elegida tiene widgets de edición
+    if act:
         act_id = act.get("id")
-        with st.expander(f"🔧 {act.get('codigo')} - {act.get('descripcion')}", expanded=False):
+        with st.container(border=True):
             codigo = st.text_input("Código", value=act.get("codigo"), key=f"cod_{act_id}")
             descripcion = st.text_area("Descripción", value=act.get("descripcion"), key=f"desc_{act_id}")
             unidad = st.text_input("Unidad", value=act.get("unidad"), key=f"uni_{act_id}")
@@ -1,6 +1,7 @@
 import streamlit as st
 import re
-from config import supabase
+from almacenamiento import repo
+import catalogos
 
 # --- Validación de RUT chileno ---
 def validar_rut(rut: str) -> bool:
@@ -24,23 +25,17 @@ def validar_rut(rut: str) -> bool:
 
 # --- Funciones de acceso a datos ---
 def listar_empresas():
-    resp = (
-        supabase
-        .table('empresas')
-        .select('id, nombre, rut, representante, direccion, correo')
-        .order('nombre')
-        .execute()
-    )
-    return resp.data or []
+    return catalogos.obtener('empresas').to_dict('records')
 
 def agregar_empresa(nombre: str, rut: str, representante: str, direccion: str, correo: str):
-    supabase.table('empresas').insert({
+    repo.insertar('empresas', {
         'nombre': nombre.upper(),
         'rut': rut.upper(),
         'representante': representante.title(),
         'direccion': direccion.title(),
         'correo': correo
-    }).execute()
+    })
+    catalogos.invalidar('empresas')
     st.success('✅ Empresa registrada correctamente.')
 
 # --- Interfaz de usuario ---
@@ -82,7 +77,8 @@ def app():
                 st.write(f"**Correo:** {emp['correo']}")
                 if st.button('Eliminar', key=f"del_{emp['id']}"):
                     try:
-                        supabase.table('empresas').delete().eq('id', emp['id']).execute()
+                        repo.eliminar('empresas', [('id', 'eq', emp['id'])])
+                        catalogos.invalidar('empresas')
                         st.success('🗑️ Empresa eliminada.')
                         if hasattr(st, 'rerun'):
                             st.rerun()
@@ -1,43 +1,43 @@
 import streamlit as st
 import pandas as pd
 from datetime import date
-from config import supabase
+from almacenamiento import repo
+import catalogos
+from paginacion import leer_filas
+import edicion_lote
+from registro_gastos import seccion_gastos
 
-# --- Funciones de acceso a datos en Supabase ---
+# --- Funciones de acceso a datos ---
 
 def listar_empresas():
     """Obtiene la lista de nombres de empresas (subcontratos)"""
-    resp = supabase.table("empresas").select("nombre").order("nombre").execute()
-    return [r["nombre"] for r in resp.data]
+    return catalogos.nombres_empresas()
 
 
 def listar_gastos():
     """Devuelve lista de dicts con todos los gastos ordenados por fecha desc"""
-    resp = supabase.table("gastos").select(
-        "id, empresa, detalle, monto, observacion, fecha"
-    ).order("fecha", desc=True).execute()
-    return resp.data or []
+    return leer_filas(
+        "gastos", "id, empresa, detalle, monto, observacion, fecha",
+        orden=[("fecha", True), ("id", True)], clave=None
+    )
 
 
 def agregar_gasto(empresa: str, detalle: str, monto: float, observacion: str):
-    """Inserta un nuevo gasto en Supabase"""
-    supabase.table("gastos").insert({
+    """Inserta un nuevo gasto"""
+    creadas = repo.insertar("gastos", {
         "empresa": empresa,
         "detalle": detalle.title(),
         "monto": monto,
         "observacion": observacion.title(),
         "fecha": date.today().isoformat()
-    }).execute()
+    })
+    if 'gastos_df' in st.session_state:
+        st.session_state['gastos_df'] = edicion_lote.aplicar_local(
+            st.session_state['gastos_df'], creadas, pd.DataFrame(), [])
     st.success("✅ Gasto registrado correctamente.")
     st.experimental_rerun()
 
 
-def eliminar_gasto(id_gasto: int):
-    """Elimina un gasto por ID"""
-    supabase.table("gastos").delete().eq("id", id_gasto).execute()
-    st.success("🗑️ Gasto eliminado.")
-    st.experimental_rerun()
-
 # --- Interfaz de usuario ---
 def app():
     st.subheader("💸 Registro de Gastos por Empresa")
@@ -63,16 +63,8 @@ def app():
     st.divider()
     st.subheader("📋 Gastos Registrados")
 
-    gastos = listar_gastos()
-    if gastos:
-        for g in gastos:
-            with st.expander(f"{g['empresa']} - {g['detalle']} - ${g['monto']:.0f}"):
-                st.write(f"**Fecha:** {g['fecha']}")
-                st.write(f"**Observación:** {g['observacion']}")
-                if st.button("Eliminar", key=f"del_{g['id']}"):
-                    eliminar_gasto(g['id'])
-    else:
-        st.info("No hay gastos registrados.")
+    # Misma grilla editable que registro_gastos
+    seccion_gastos()
 
 if __name__ == '__main__':
     app()
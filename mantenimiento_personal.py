@@ -1,43 +1,34 @@
 import streamlit as st
 import re
 import pandas as pd
-from config import supabase
+from almacenamiento import repo
+import catalogos
+from grilla import grilla
 
 # --- Validación de RUT chileno ---
 def es_rut_valido(rut: str) -> bool:
     rut_clean = rut.replace('.', '').replace('-', '').upper()
     return bool(re.match(r"^\d{7,8}[0-9K]$", rut_clean))
 
-# --- Funciones de acceso a datos en Supabase ---
+# --- Funciones de acceso a datos ---
 
 def listar_empresas():
-    resp = (
-        supabase.table("empresas")
-        .select("nombre")
-        .order("nombre")
-        .execute()
-    )
-    return [r["nombre"] for r in resp.data]
+    return catalogos.nombres_empresas()
 
 
 def listar_personal():
-    resp = (
-        supabase.table("personal")
-        .select("id, nombre, rut, cargo, empresa")
-        .order("nombre")
-        .execute()
-    )
-    return resp.data or []
+    return catalogos.obtener("personal").to_dict("records")
 
 # --- CRUD de personal ---
 
 def agregar_personal(nombre: str, rut: str, cargo: str, empresa: str):
-    supabase.table("personal").insert({
+    repo.insertar("personal", {
         "nombre": nombre.strip(),
         "rut": rut.upper().strip(),
         "cargo": cargo.strip(),
         "empresa": empresa
-    }).execute()
+    })
+    catalogos.invalidar("personal")
     st.success("✅ Personal registrado.")
     # Recarga la app
     if hasattr(st, 'experimental_rerun'):
@@ -47,12 +38,13 @@ def agregar_personal(nombre: str, rut: str, cargo: str, empresa: str):
 
 
 def actualizar_personal(id_pers: int, nombre: str, rut: str, cargo: str, empresa: str):
-    supabase.table("personal").update({
+    repo.actualizar("personal", {
         "nombre": nombre.strip(),
         "rut": rut.upper().strip(),
         "cargo": cargo.strip(),
         "empresa": empresa
-    }).eq("id", id_pers).execute()
+    }, [("id", "eq", id_pers)])
+    catalogos.invalidar("personal")
     st.success("✏️ Personal actualizado.")
     if hasattr(st, 'experimental_rerun'):
         st.experimental_rerun()
@@ -61,7 +53,8 @@ def actualizar_personal(id_pers: int, nombre: str, rut: str, cargo: str, empresa
 
 
 def eliminar_personal(id_pers: int):
-    supabase.table("personal").delete().eq("id", id_pers).execute()
+    repo.eliminar("personal", [("id", "eq", id_pers)])
+    catalogos.invalidar("personal")
     st.success("🗑️ Personal eliminado.")
     if hasattr(st, 'experimental_rerun'):
         st.experimental_rerun()
@@ -95,10 +88,18 @@ def app():
     st.markdown("---")
     st.subheader("📋 Personal registrado")
 
-    personal = listar_personal()
-    for pers in personal:
+    pers = grilla(
+        "personal", ["id", "nombre", "rut", "cargo", "empresa"],
+        buscar_en=["nombre", "rut", "empresa", "cargo"],
+        ordenar_por=["nombre", "empresa", "rut", "id"],
+        prefijo="g_pers",
+        etiqueta=lambda p: f"{p['nombre']} - {p['rut']}"
+    )
+
+    # Solo el trabajador elegido tiene widgets de edición
+    if pers:
         id_pers = pers.get("id")
-        with st.expander(f"🔧 {pers.get('nombre')} - {pers.get('rut')}"):
+        with st.container(border=True):
             nombre = st.text_input("Nombre", value=pers.get("nombre"), key=f"nom_{id_pers}")
             rut = st.text_input("RUT", value=pers.get("rut"), key=f"rut_{id_pers}")
             cargo = st.text_input("Cargo", value=pers.get("cargo"), key=f"car_{id_pers}")
@@ -1,51 +1,92 @@
 import streamlit as st
-from config import supabase
+from almacenamiento import repo
+import catalogos
+import importar_tramos
+from grilla import grilla
 
-# --- Funciones de acceso a datos en Supabase ---
+# --- Funciones de acceso a datos ---
 
 def listar_tramos():
     """Devuelve lista de dicts con todos los tramos ordenados por triot y tramo."""
-    resp = (
-        supabase.table("tramos")
-        .select("id, triot, tramo, inicio, fin, mufa_inicio, mufa_fin")
-        .order("triot")
-        .order("tramo")
-        .execute()
-    )
-    return resp.data or []
+    return catalogos.obtener("tramos").to_dict("records")
 
 
 def agregar_tramo(triot: str, tramo: str, inicio: str, fin: str, mufa_inicio: str, mufa_fin: str):
-    """Inserta un nuevo tramo en Supabase."""
-    supabase.table("tramos").insert({
+    """Inserta un nuevo tramo."""
+    repo.insertar("tramos", {
         "triot": triot,
         "tramo": tramo,
         "inicio": inicio,
         "fin": fin,
         "mufa_inicio": mufa_inicio,
         "mufa_fin": mufa_fin
-    }).execute()
+    })
+    catalogos.invalidar("tramos")
     st.success("✅ Tramo registrado correctamente.")
 
 
 def actualizar_tramo(idt: int, triot: str, tramo: str, inicio: str, fin: str, mufa_inicio: str, mufa_fin: str):
     """Actualiza un tramo existente."""
-    supabase.table("tramos").update({
+    repo.actualizar("tramos", {
         "triot": triot,
         "tramo": tramo,
         "inicio": inicio,
         "fin": fin,
         "mufa_inicio": mufa_inicio,
         "mufa_fin": mufa_fin
-    }).eq("id", idt).execute()
+    }, [("id", "eq", idt)])
+    catalogos.invalidar("tramos")
     st.success("✏️ Tramo actualizado.")
 
 
 def eliminar_tramo(idt: int):
     """Elimina un tramo."""
-    supabase.table("tramos").delete().eq("id", idt).execute()
+    repo.eliminar("tramos", [("id", "eq", idt)])
+    catalogos.invalidar("tramos")
     st.success("🗑️ Tramo eliminado.")
 
+# --- Carga masiva ---
+
+def seccion_importar():
+    with st.expander("📤 Importar tramos (archivo de diseño)"):
+        st.caption("Columnas: triot, tramo, inicio, fin, mufa_inicio, mufa_fin. "
+                   "Los tramos existentes (mismo TRIOT y tramo) se actualizan.")
+        archivo = st.file_uploader("Archivo", type=["csv", "xlsx"], key="imp_tramos_archivo")
+        if archivo is None:
+            st.session_state.pop('imp_tramos', None)
+            return
+        if st.button("Revisar cambios", key="imp_tramos_revisar"):
+            try:
+                st.session_state['imp_tramos'] = (
+                    archivo.name, *importar_tramos.revisar_archivo(archivo, archivo.name)
+                )
+            except Exception as e:
+                st.error(f"⚠️ Error al leer el archivo: {e}")
+        revision = st.session_state.get('imp_tramos')
+        if revision is None or revision[0] != archivo.name:
+            return
+        _, nuevos, modificados, cambios, errores = revision
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Nuevos", len(nuevos))
+        c2.metric("Modificados", len(modificados))
+        c3.metric("Con errores", len(errores))
+        if not cambios.empty:
+            st.dataframe(cambios, use_container_width=True, hide_index=True)
+        if not errores.empty:
+            st.dataframe(errores, use_container_width=True, hide_index=True)
+        if not cambios.empty and st.button("Aplicar cambios", key="imp_tramos_aplicar"):
+            barra = st.progress(0.0)
+            try:
+                n = importar_tramos.aplicar(
+                    nuevos, modificados,
+                    progreso=lambda i, total: barra.progress(i / total, text=f"{i}/{total}")
+                )
+            except Exception as e:
+                st.error(f"⚠️ Error al aplicar los cambios: {e}")
+            else:
+                st.session_state.pop('imp_tramos', None)
+                st.success(f"✅ {n} tramos guardados ({len(nuevos)} nuevos, {len(modificados)} modificados).")
+
 # --- Interfaz de usuario ---
 
 def app():
@@ -65,13 +106,23 @@ def app():
             else:
                 st.warning("⚠️ Ingresa al menos TRIOT y Tramo.")
 
+    seccion_importar()
+
     st.markdown("---")
     st.subheader("📄 Tramos registrados")
 
-    tramos = listar_tramos()
-    for t in tramos:
+    t = grilla(
+        "tramos", ["id", "triot", "tramo", "inicio", "fin", "mufa_inicio", "mufa_fin"],
+        buscar_en=["triot", "tramo", "mufa_inicio", "mufa_fin"],
+        ordenar_por=["triot", "tramo", "id"],
+        prefijo="g_tramos",
+        etiqueta=lambda t: f"{t['triot']} - Tramo {t['tramo']}"
+    )
+
+    # Solo el tramo elegido tiene widgets de edición
+    if t:
         tid = t.get("id")
-        with st.expander(f"🔧 {t.get('triot')} - Tramo {t.get('tramo')}"):
+        with st.container(border=True):
             triot = st.text_input("TRIOT", value=t.get("triot"), key=f"tr_{tid}")
             tramo = st.text_input("Tramo", value=t.get("tramo"), key=f"tt_{tid}")
             inicio = st.text_input("Inicio", value=t.get("inicio"), key=f"i_{tid}")
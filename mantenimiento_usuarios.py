@@ -1,19 +1,17 @@
 import streamlit as st
 import hashlib
-from config import supabase
+from almacenamiento import repo
+from paginacion import leer_filas
+from grilla import grilla
 
-# --- Funciones de acceso a datos en Supabase ---
+# --- Funciones de acceso a datos ---
 
 def listar_usuarios():
     """Devuelve lista de dicts con id, nombre, usuario y rol."""
-    resp = (
-        supabase
-        .table("usuarios")
-        .select("id, nombre, usuario, rol")
-        .order("usuario")
-        .execute()
+    return leer_filas(
+        "usuarios", "id, nombre, usuario, rol",
+        orden=["usuario", "id"], clave=None
     )
-    return resp.data or []
 
 def encriptar_contrasena(contrasena: str) -> str:
     """Hash SHA-256 de contraseña"""
@@ -22,12 +20,12 @@ def encriptar_contrasena(contrasena: str) -> str:
 def agregar_usuario(nombre: str, usuario: str, contrasena: str, rol: str):
     """Inserta un nuevo usuario."""
     try:
-        supabase.table("usuarios").insert({
+        repo.insertar("usuarios", {
             "nombre": nombre.strip(),
             "usuario": usuario.strip(),
             "password": encriptar_contrasena(contrasena),
             "rol": rol
-        }).execute()
+        })
         st.success("✅ Usuario agregado correctamente.")
     except Exception as e:
         st.error(f"❌ Error al agregar usuario: {e}")
@@ -37,12 +35,12 @@ def actualizar_usuario(id_usuario: int, nuevo_usuario: str, nueva_contrasena: st
     datos = {"usuario": nuevo_usuario.strip(), "rol": nuevo_rol}
     if nueva_contrasena:
         datos["password"] = encriptar_contrasena(nueva_contrasena)
-    supabase.table("usuarios").update(datos).eq("id", id_usuario).execute()
+    repo.actualizar("usuarios", datos, [("id", "eq", id_usuario)])
     st.success("✅ Usuario actualizado.")
 
 def eliminar_usuario(id_usuario: int):
     """Elimina usuario por ID."""
-    supabase.table("usuarios").delete().eq("id", id_usuario).execute()
+    repo.eliminar("usuarios", [("id", "eq", id_usuario)])
     st.success("🗑️ Usuario eliminado.")
 
 
@@ -67,10 +65,18 @@ def app():
     st.markdown("---")
     st.subheader("👥 Usuarios registrados")
 
-    usuarios = listar_usuarios()
-    for u in usuarios:
+    u = grilla(
+        "usuarios", ["id", "nombre", "usuario", "rol"],
+        buscar_en=["usuario", "nombre", "rol"],
+        ordenar_por=["usuario", "nombre", "rol", "id"],
+        prefijo="g_usr",
+        etiqueta=lambda u: f"{u['usuario']} ({u['rol']})"
+    )
+
+    # Solo el usuario elegido tiene widgets de edición
+    if u:
         uid = u.get("id")
-        with st.expander(f"{u.get('usuario')} ({u.get('rol')})"):
+        with st.container(border=True):
             nombre = st.text_input("Nombre completo",
                                    value=u.get("nombre"),
                                    key=f"nom_{uid}")
@@ -0,0 +1,103 @@
+import sqlite3
+import sys
+from config import SQLITE_PATH
+from crear_vistas_estado_pago import crear_vistas
+
+# --- Migración del esquema SQLite local ---
+# Equivalente local de los scripts de sql/ para Supabase: columnas, vistas,
+# índices, triggers y secuencias que necesita almacenamiento.RepositorioSQLite.
+# Se ejecuta a mano (y lo hace generar_datos.py) y se puede repetir sin
+# efecto. RepositorioSQLite no modifica la base: si no está migrada, lo avisa.
+#
+#     python migrar_sqlite.py [ruta.db]
+
+# Sube cuando se agrega un paso; queda en PRAGMA user_version
+VERSION = 1
+
+
+def version(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _columnas(conn, tabla: str) -> set:
+    return {r[1] for r in conn.execute(f"PRAGMA table_info({tabla})")}
+
+
+def _usuarios(conn):
+    # La tabla local de usuarios es anterior a la de Supabase
+    cols = _columnas(conn, "usuarios")
+    if cols:
+        for col in ("nombre", "password"):
+            if col not in cols:
+                conn.execute(f"ALTER TABLE usuarios ADD COLUMN {col} TEXT")
+
+
+def _marcas_produccion(conn):
+    """
+    Equivalente local de sql/sincronizacion_produccion.sql (copia_local.py).
+    SQLite no admite ALTER ... DEFAULT con la hora actual, así que la
+    marca la ponen triggers; las filas anteriores quedan sin marca.
+    """
+    ahora = "strftime('%Y-%m-%dT%H:%M:%f', 'now')"
+    cols = _columnas(conn, "produccion")
+    if not cols:
+        return
+    if "actualizado_en" not in cols:
+        conn.execute("ALTER TABLE produccion ADD COLUMN actualizado_en TEXT")
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_produccion_creado AFTER INSERT ON produccion
+        FOR EACH ROW WHEN NEW.actualizado_en IS NULL BEGIN
+            UPDATE produccion SET actualizado_en = {ahora} WHERE id = NEW.id;
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_produccion_actualizado AFTER UPDATE ON produccion
+        FOR EACH ROW WHEN NEW.actualizado_en IS OLD.actualizado_en BEGIN
+            UPDATE produccion SET actualizado_en = {ahora} WHERE id = NEW.id;
+        END
+    """)
+    conn.execute("CREATE TABLE IF NOT EXISTS produccion_borrados "
+                 "(id INTEGER PRIMARY KEY, borrado_en TEXT)")
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_produccion_borrada AFTER DELETE ON produccion
+        FOR EACH ROW BEGIN
+            INSERT OR REPLACE INTO produccion_borrados (id, borrado_en) VALUES (OLD.id, {ahora});
+        END
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_produccion_actualizado_en "
+                 "ON produccion (actualizado_en)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_produccion_borrados_borrado_en "
+                 "ON produccion_borrados (borrado_en)")
+
+
+def _secuencias(conn):
+    # Equivalente local de estados_pago_correlativo_seq: último número usado
+    conn.execute("CREATE TABLE IF NOT EXISTS secuencias (nombre TEXT PRIMARY KEY, valor INTEGER)")
+    conn.execute("""
+        INSERT OR IGNORE INTO secuencias (nombre, valor)
+        SELECT 'estados_pago', COALESCE(MAX(CAST(SUBSTR(correlativo, 6) AS INTEGER)), 0)
+        FROM estados_pago WHERE correlativo LIKE 'EGTD-%'
+    """)
+
+
+def migrar(conn):
+    """Lleva la base abierta en `conn` al esquema VERSION."""
+    with conn:
+        _usuarios(conn)
+    crear_vistas(conn)
+    with conn:
+        # Historial de producción (ingreso_produccion): orden por fecha e id
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_produccion_fecha_id ON produccion (fecha, id)")
+        _marcas_produccion(conn)
+        _secuencias(conn)
+        conn.execute(f"PRAGMA user_version = {VERSION}")
+    # Cada hilo de Streamlit tiene su conexión: lectores y escritor a la vez
+    conn.execute("PRAGMA journal_mode=WAL")
+
+
+if __name__ == "__main__":
+    ruta = sys.argv[1] if len(sys.argv) > 1 else SQLITE_PATH
+    conn = sqlite3.connect(ruta)
+    migrar(conn)
+    conn.close()
+    print(f"✅ Base {ruta} migrada a la versión {VERSION}.")
@@ -0,0 +1,88 @@
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from config import PAGINA_TAMANO, PAGINA_CONCURRENCIA
+from almacenamiento import repo
+from instrumentacion import propagar
+import esquemas
+
+# --- Lectura paginada de tablas grandes ---
+# PostgREST corta cada respuesta en "max rows" filas, así que una sola
+# consulta puede devolver datos incompletos sin avisar. Estas funciones
+# reciben la tabla, columnas y filtros (ver almacenamiento.py) y piden los
+# datos por páginas.
+
+
+def _paginas_keyset(tabla, columnas, filtros, tamano, clave, desde):
+    ultimo = desde
+    while True:
+        extra = [(clave, "gt", ultimo)] if ultimo is not None else []
+        filas = repo.seleccionar(tabla, columnas, list(filtros) + extra,
+                                 orden=[clave], limite=tamano)
+        if filas:
+            yield filas
+        if len(filas) < tamano:
+            return
+        ultimo = filas[-1][clave]
+
+
+def _paginas_rango(tabla, columnas, filtros, orden, tamano, concurrentes):
+    def pagina(n):
+        return repo.seleccionar(tabla, columnas, filtros, orden,
+                                limite=tamano, desde=n * tamano)
+
+    filas = pagina(0)
+    if filas:
+        yield filas
+    if len(filas) < tamano:
+        return
+
+    # Las páginas siguientes se piden en tandas de `concurrentes` a la vez
+    siguiente = 1
+    with ThreadPoolExecutor(max_workers=concurrentes) as pool:
+        while True:
+            tanda = list(pool.map(propagar(pagina), range(siguiente, siguiente + concurrentes)))
+            siguiente += concurrentes
+            for filas in tanda:
+                if filas:
+                    yield filas
+                if len(filas) < tamano:
+                    return
+
+
+def iterar_paginas(tabla, columnas="*", filtros=(), orden=(), tamano_pagina=None,
+                   clave="id", concurrentes=None, desde=None):
+    """
+    Generador de páginas (listas de dicts).
+
+    Con `clave` (por defecto "id") pagina por keyset: ordena por esa columna y
+    pide las filas con clave mayor a la última recibida (o a `desde`, si se
+    indica); `orden` se ignora. Con clave=None pagina por offset, con el
+    `orden` indicado, y pide hasta `concurrentes` páginas en paralelo.
+    """
+    tamano = tamano_pagina or PAGINA_TAMANO
+    if clave:
+        return _paginas_keyset(tabla, columnas, filtros, tamano, clave, desde)
+    return _paginas_rango(tabla, columnas, filtros, orden, tamano,
+                          concurrentes or PAGINA_CONCURRENCIA)
+
+
+def leer_filas(tabla, columnas="*", filtros=(), **kwargs) -> list:
+    """Todas las filas de la consulta como lista de dicts."""
+    filas = []
+    for pagina in iterar_paginas(tabla, columnas, filtros, **kwargs):
+        filas.extend(pagina)
+    return filas
+
+
+def leer_dataframe(tabla, columnas="*", filtros=(), tipar=True, **kwargs) -> pd.DataFrame:
+    """
+    Todas las filas de la consulta como DataFrame, armado página a página.
+    Si `columnas` es una lista explícita, el resultado la conserva aunque no
+    haya filas. Con `tipar`, las columnas toman los tipos del esquema de la
+    tabla (ver esquemas.py).
+    """
+    nombres = None if columnas.strip() == "*" else [c.strip() for c in columnas.split(",")]
+    trozos = [pd.DataFrame(pagina, columns=nombres)
+              for pagina in iterar_paginas(tabla, columnas, filtros, **kwargs)]
+    df = pd.concat(trozos, ignore_index=True) if trozos else pd.DataFrame(columns=nombres)
+    return esquemas.tipar(df, tabla) if tipar else df
@@ -0,0 +1,259 @@
+import numpy as np
+import pandas as pd
+from fpdf import FPDF
+
+# --- Generación de PDF del estado de pago ---
+# Módulo sin acceso a datos, para poder renderizar en procesos aparte.
+#
+# Las líneas de producción y gastos van en una tabla paginada: cada fila se
+# arma como texto de ancho fijo (fuente Courier) con operaciones vectoriales
+# de pandas y se emite con una sola celda, y el encabezado de la tabla se
+# repite en cada página.
+
+# Cambia cuando cambia el aspecto del PDF (invalida PDFs ya generados)
+PLANTILLA_VERSION = 2
+
+LOTE_FILAS = 5000        # filas formateadas a la vez
+ALTO_FILA = 4
+FUENTE_TABLA = 7.5       # Courier 7.5 pt: ~119 caracteres en 190 mm
+
+# (columna, título, ancho en caracteres, formato)
+COLUMNAS_PRODUCCION = [
+    ("id", "ID", 7, "entero"),
+    ("fecha", "Fecha", 10, "fecha"),
+    ("actividad", "Actividad", 28, "texto"),
+    ("trabajador", "Trabajador", 24, "texto"),
+    ("triot", "TRIOT", 10, "texto"),
+    ("cantidad", "Cant.", 9, "decimal"),
+    ("valor_produccion", "Valor unit.", 10, "monto"),
+    ("Monto Producción", "Monto", 13, "monto"),
+]
+COLUMNAS_GASTOS = [
+    ("id", "ID", 7, "entero"),
+    ("descripcion", "Descripción", 80, "texto"),
+    ("monto", "Monto", 13, "monto"),
+]
+AGRUPACIONES = {"actividad": "Actividad", "triot": "TRIOT"}
+
+
+def _miles(enteros: pd.Series) -> pd.Series:
+    return enteros.astype(str).str.replace(r"\B(?=(\d{3})+(?!\d))", ",", regex=True)
+
+
+def _formatear(serie: pd.Series, formato: str, ancho: int) -> pd.Series:
+    """Columna como texto de `ancho` caracteres, sin recorrer fila a fila."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        # Cada categoría se formatea una sola vez; los nulos quedan en blanco
+        textos = _formatear(pd.Series(serie.cat.categories.astype(object)), formato, ancho)
+        # El código -1 (nulo) toma el último elemento: el texto en blanco
+        textos = np.append(textos.to_numpy(dtype=object), " " * ancho)
+        return pd.Series(textos[serie.cat.codes.to_numpy()], index=serie.index)
+    if formato == "fecha" and pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.dt.strftime("%Y-%m-%d").fillna("").str.ljust(ancho)
+    if formato in ("texto", "fecha"):
+        txt = serie.fillna("").astype(str).str.slice(0, ancho)
+        # Las fuentes base de FPDF solo aceptan latin-1
+        txt = txt.str.encode("latin-1", "replace").str.decode("latin-1")
+        return txt.str.ljust(ancho)
+    num = pd.to_numeric(serie, errors="coerce").fillna(0)
+    if formato == "entero":
+        txt = num.astype("int64").astype(str)
+    elif formato == "monto":
+        txt = "$" + _miles(num.round().astype("int64"))
+    else:
+        txt = num.round(2).astype(str).str.replace(r"\.0$", "", regex=True)
+    return txt.str.slice(0, ancho).str.rjust(ancho)
+
+
+def _lineas(df: pd.DataFrame, columnas) -> pd.Series:
+    """Filas de la tabla como texto de ancho fijo."""
+    partes = [
+        _formatear(df[col], fmt, ancho) if col in df.columns else pd.Series(" " * ancho, index=df.index)
+        for col, _, ancho, fmt in columnas
+    ]
+    linea = partes[0]
+    for p in partes[1:]:
+        linea = linea + " " + p
+    return linea
+
+
+def _encabezado(columnas) -> str:
+    return " ".join(
+        titulo.ljust(ancho) if fmt == "texto" else titulo.rjust(ancho)
+        for _, titulo, ancho, fmt in columnas
+    )
+
+
+class _Acumulador:
+    """
+    Texto que crece por `+=` sin copiarse. FPDF arma cada página y el
+    documento completo con `str += ...`, lo que copia todo lo acumulado en
+    cada instrucción y vuelve cuadrático el costo de un PDF de cientos de
+    páginas; aquí los trozos se guardan en una lista y se unen al final.
+    Reemplaza `pages` y `buffer`, atributos internos de pyfpdf 1.7.2: por
+    eso requirements.txt fija esa versión.
+    """
+    __slots__ = ("trozos", "largo")
+
+    def __init__(self, texto=""):
+        self.trozos = [texto]
+        self.largo = len(texto)
+
+    def __iadd__(self, s):
+        self.trozos.append(s)
+        self.largo += len(s)
+        return self
+
+    def __len__(self):
+        return self.largo
+
+    def __str__(self):
+        return "".join(self.trozos)
+
+    def replace(self, viejo, nuevo):
+        return str(self).replace(viejo, nuevo)
+
+    def encode(self, *args):
+        return str(self).encode(*args)
+
+
+class _Paginas(dict):
+    def __setitem__(self, n, contenido):
+        if not isinstance(contenido, _Acumulador):
+            contenido = _Acumulador(contenido)
+        super().__setitem__(n, contenido)
+
+
+class _PDFEstado(FPDF):
+    """FPDF que repite el encabezado de la tabla en curso al cambiar de página."""
+
+    def __init__(self, corr):
+        super().__init__(orientation="P", unit="mm", format="A4")
+        self.pages = _Paginas()
+        self.buffer = _Acumulador()
+        self.corr = corr
+        self.encabezado_tabla = None
+
+    def header(self):
+        if self.encabezado_tabla:
+            self._fila_encabezado()
+
+    def footer(self):
+        self.set_y(-12)
+        self.set_font('Helvetica', '', 8)
+        self.cell(0, 5, f'Estado de Pago {self.corr} - Página {self.page_no()}/{{nb}}', align='R')
+
+    def _fila_encabezado(self):
+        self.set_font('Courier', 'B', FUENTE_TABLA)
+        self.cell(0, ALTO_FILA + 1, self.encabezado_tabla, border='B', ln=1)
+        self.set_font('Courier', '', FUENTE_TABLA)
+
+    def tabla(self, df: pd.DataFrame, columnas, agrupar_por=None, col_monto=None):
+        """Emite `df` como tabla; con `agrupar_por`, agrega subtotales por grupo."""
+        self.encabezado_tabla = _encabezado(columnas)
+        self._fila_encabezado()
+        if agrupar_por and agrupar_por in df.columns:
+            for valor, grupo in df.groupby(agrupar_por, sort=True, dropna=False, observed=True):
+                self.set_font('Helvetica', 'B', 8)
+                self.cell(0, ALTO_FILA + 1, f"{AGRUPACIONES.get(agrupar_por, agrupar_por)}: {valor}", ln=1)
+                self._filas(grupo, columnas)
+                self._subtotal(grupo, col_monto)
+        else:
+            self._filas(df, columnas)
+        self.encabezado_tabla = None
+
+    def _filas(self, df, columnas):
+        self.set_font('Courier', '', FUENTE_TABLA)
+        for inicio in range(0, len(df), LOTE_FILAS):
+            for linea in _lineas(df.iloc[inicio:inicio + LOTE_FILAS], columnas):
+                self.cell(0, ALTO_FILA, linea, ln=1)
+
+    def _subtotal(self, grupo, col_monto):
+        partes = [f"{len(grupo)} líneas"]
+        if "cantidad" in grupo.columns:
+            partes.append(f"Cant.: {pd.to_numeric(grupo['cantidad']).sum():,.2f}")
+        if col_monto:
+            partes.append(f"Subtotal: ${pd.to_numeric(grupo[col_monto]).sum():,.0f}")
+        self.set_font('Helvetica', 'B', 8)
+        self.cell(0, ALTO_FILA + 1, "  |  ".join(partes), border='T', ln=1, align='R')
+        self.ln(1)
+
+
+def generar_pdf_bytes(corr, empresa, fecha, df_prod, df_g, tot_p, tot_g, neto,
+                      agrupar_por=None):
+    """
+    PDF del estado de pago. `agrupar_por` ("actividad" o "triot") agrupa la
+    producción con subtotales; por defecto va en el orden recibido.
+    """
+    pdf = _PDFEstado(corr)
+    pdf.alias_nb_pages()
+    pdf.add_page()
+    pdf.set_auto_page_break(True, 15)
+
+    # Título
+    pdf.set_font('Helvetica', 'B', 18)
+    pdf.cell(0, 10, f'Estado de Pago {corr}', ln=True, align='C')
+    pdf.ln(5)
+
+    # Empresa y Fecha
+    pdf.set_font('Helvetica', 'B', 12)
+    pdf.cell(100, 6, f'Empresa: {empresa}', ln=0)
+    pdf.cell(0, 6, f'Fecha: {fecha}', ln=1)
+    pdf.ln(3)
+
+    # Separador de texto
+    pdf.set_font('Helvetica', '', 12)
+    pdf.cell(0, 4, '-' * 100, ln=1)
+    pdf.ln(5)
+
+    # Sección Producción
+    pdf.set_font('Helvetica', 'B', 12)
+    pdf.cell(0, 6, 'Producción', ln=1)
+    pdf.ln(2)
+    if not df_prod.empty:
+        pdf.tabla(df_prod, COLUMNAS_PRODUCCION, agrupar_por, col_monto="Monto Producción")
+    pdf.ln(2)
+    # Total Producción
+    pdf.set_font('Helvetica', 'B', 12)
+    pdf.cell(0, 6, f"Total Producción: ${tot_p:,.0f}", ln=1)
+    pdf.ln(5)
+    # Separador de texto
+    pdf.set_font('Helvetica', '', 12)
+    pdf.cell(0, 4, '-' * 100, ln=1)
+    pdf.ln(5)
+
+    # Sección Gastos
+    if not df_g.empty:
+        pdf.set_font('Helvetica', 'B', 12)
+        pdf.cell(0, 6, 'Gastos', ln=1)
+        pdf.ln(2)
+        pdf.tabla(df_g, COLUMNAS_GASTOS)
+        pdf.ln(2)
+        # Total Gastos
+        pdf.set_font('Helvetica', 'B', 12)
+        pdf.cell(0, 6, f"Total Gastos: ${tot_g:,.0f}", ln=1)
+        pdf.ln(5)
+        # Separador de texto
+        pdf.set_font('Helvetica', '', 12)
+        pdf.cell(0, 4, '-' * 100, ln=1)
+        pdf.ln(5)
+
+    # Neto a Pagar
+    pdf.set_font('Helvetica', 'B', 14)
+    pdf.cell(0, 8, f"Neto a Pagar: ${neto:,.0f}", ln=1)
+    pdf.ln(10)
+
+    # Bloque Autorización
+    pdf.set_font('Helvetica', 'B', 12)
+    pdf.cell(0, 6, 'SE AUTORIZA A FACTURAR A', ln=1)
+    pdf.ln(2)
+    pdf.set_font('Helvetica', '', 11)
+    pdf.cell(0, 6, 'SOMYL S.A. | RUT: 76.002.581-K', ln=1)
+    pdf.multi_cell(0, 6, 'Dirección: Puerta Oriente 361 Of. 311 B, Torre B, Colina')
+    pdf.ln(2)
+    pdf.cell(0, 6, 'AUTORIZA: Luis Medina', ln=1)
+    pdf.cell(0, 6, 'CORREO: lmedina@somyl.com', ln=1)
+    pdf.ln(2)
+    pdf.multi_cell(0, 6, 'ENVIAR FACTURA A: cynthia.miranda@somyl.com; carlos.alegria@somyl.com')
+
+    return pdf.output(dest='S').encode('latin1')
@@ -0,0 +1,38 @@
+import os
+import pandas as pd
+
+# --- Lectura de planillas CSV / Excel para importaciones masivas ---
+
+LOTE_LECTURA = 5000
+
+
+def leer_planilla(archivo, nombre: str, obligatorias, tamano: int = LOTE_LECTURA):
+    """
+    Generador de trozos (DataFrames de texto) del archivo. `archivo` es una
+    ruta o un objeto tipo archivo; `nombre` decide el formato por extensión.
+    Los encabezados se pasan a minúsculas y cada trozo trae la columna `fila`
+    con el número de línea en la planilla. Falla si falta alguna columna de
+    `obligatorias`.
+    """
+    extension = os.path.splitext(nombre)[1].lower()
+    if extension == ".csv":
+        trozos = pd.read_csv(archivo, dtype=str, keep_default_na=False,
+                             sep=None, engine="python", chunksize=tamano)
+    elif extension in (".xlsx", ".xls"):
+        # Excel no se puede leer por partes; se trocea después de leerlo
+        df = pd.read_excel(archivo, dtype=str, keep_default_na=False)
+        trozos = (df.iloc[i:i + tamano] for i in range(0, len(df), tamano))
+    else:
+        raise ValueError(f"Formato no soportado: {extension or nombre}")
+    for trozo in trozos:
+        trozo = trozo.rename(columns=lambda c: str(c).strip().lower())
+        faltan = [c for c in obligatorias if c not in trozo.columns]
+        if faltan:
+            raise ValueError(f"Faltan columnas: {', '.join(faltan)}")
+        # Línea 1 es el encabezado
+        yield trozo.assign(fila=trozo.index + 2)
+
+
+def normalizar(serie: pd.Series) -> pd.Series:
+    """Texto sin espacios al borde y en mayúsculas, para comparar claves."""
+    return serie.fillna("").astype(str).str.strip().str.upper()
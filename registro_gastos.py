@@ -1,33 +1,54 @@
 import streamlit as st
 import pandas as pd
-from config import supabase
+from almacenamiento import repo
+import catalogos
+from paginacion import leer_filas
+import edicion_lote
 from datetime import date
 
-# --- Funciones de acceso a datos en Supabase ---
+COLUMNAS_GASTOS = ["id", "empresa", "detalle", "monto", "observacion", "fecha"]
+
+# --- Funciones de acceso a datos ---
 
 def listar_empresas():
     """Obtiene lista de nombres de subcontratos"""
-    resp = supabase.table("empresas").select("nombre").order("nombre").execute()
-    return [r["nombre"] for r in resp.data]
+    return catalogos.nombres_empresas()
 
 
 def listar_gastos():
     """Devuelve lista de dicts con todos los gastos"""
-    resp = supabase.table("gastos").select(
-        "id, empresa, detalle, monto, observacion, fecha"
-    ).order("fecha", desc=True).execute()
-    return resp.data or []
+    return leer_filas(
+        "gastos", "id, empresa, detalle, monto, observacion, fecha",
+        orden=[("fecha", True), ("id", True)], clave=None
+    )
+
+
+def gastos_en_memoria() -> pd.DataFrame:
+    """
+    Gastos de la sesión: se leen una vez y después se actualizan con los
+    cambios hechos desde esta página (ver edicion_lote.aplicar_local).
+    """
+    if 'gastos_df' not in st.session_state:
+        st.session_state['gastos_df'] = pd.DataFrame(listar_gastos(), columns=COLUMNAS_GASTOS)
+    return st.session_state['gastos_df']
+
+
+def recargar_gastos():
+    st.session_state.pop('gastos_df', None)
 
 
 def agregar_gasto(empresa: str, detalle: str, monto: float, observacion: str):
-    """Inserta un nuevo gasto en Supabase"""
-    supabase.table("gastos").insert({
+    """Inserta un nuevo gasto"""
+    creadas = repo.insertar("gastos", {
         "empresa": empresa,
         "detalle": detalle.strip(),
         "monto": monto,
         "observacion": observacion.strip(),
         "fecha": date.today().isoformat()
-    }).execute()
+    })
+    if 'gastos_df' in st.session_state:
+        st.session_state['gastos_df'] = edicion_lote.aplicar_local(
+            st.session_state['gastos_df'], creadas, pd.DataFrame(), [])
     st.success("✅ Gasto registrado correctamente.")
     # Recarga la app sin usar key
     if hasattr(st, 'experimental_rerun'):
@@ -36,13 +57,75 @@ def agregar_gasto(empresa: str, detalle: str, monto: float, observacion: str):
         st.rerun()
 
 
-def eliminar_gasto(id_gasto: int):
-    """Elimina un gasto por ID"""
-    supabase.table("gastos").delete().eq("id", id_gasto).execute()
-    st.success("🗑️ Gasto eliminado.")
-    if hasattr(st, 'experimental_rerun'):
-        st.experimental_rerun()
-    elif hasattr(st, 'rerun'):
+def guardar_cambios_gastos(nuevas: pd.DataFrame, modificadas: pd.DataFrame, borradas: list):
+    """
+    Valida y guarda los cambios de la grilla de gastos en lote y los aplica
+    a la copia de la sesión. Devuelve la lista de errores (vacía si se guardó).
+    """
+    errores = []
+    empresas = set(listar_empresas())
+    for nombre, df in (("nueva", nuevas), ("modificada", modificadas)):
+        if df.empty:
+            continue
+        monto = pd.to_numeric(df["monto"], errors="coerce")
+        if (~df["empresa"].isin(empresas)).any():
+            errores.append(f"Hay filas {nombre}s sin empresa válida.")
+        if (df["detalle"].fillna("").astype(str).str.strip() == "").any():
+            errores.append(f"Hay filas {nombre}s sin detalle.")
+        if (monto.isna() | (monto <= 0)).any():
+            errores.append(f"Hay filas {nombre}s con monto no válido.")
+    facturados = edicion_lote.ids_facturados(
+        modificadas["id"].tolist() + list(borradas), "estados_pago_gastos", "gasto_id")
+    if facturados:
+        errores.append("No se pueden modificar ni borrar gastos ya incluidos en un estado de "
+                       f"pago: {facturados}")
+    if errores:
+        return errores
+
+    nuevas = nuevas.assign(
+        detalle=nuevas["detalle"].astype(str).str.strip(),
+        observacion=nuevas["observacion"].fillna("").astype(str).str.strip(),
+        fecha=date.today().isoformat()
+    )
+    try:
+        creadas = edicion_lote.guardar("gastos", nuevas, modificadas, borradas)
+    except ValueError as e:
+        return [str(e)]
+    st.session_state['gastos_df'] = edicion_lote.aplicar_local(
+        gastos_en_memoria(), creadas, modificadas, borradas)
+    return []
+
+
+def seccion_gastos():
+    """Grilla editable de gastos: agregar, corregir y borrar varias filas a la vez."""
+    c1, c2 = st.columns([4, 1])
+    c1.caption("Edita las celdas, agrega filas al final o selecciónalas para borrarlas; "
+               "luego aplica los cambios.")
+    if c2.button("🔄 Recargar", key="gastos_recargar"):
+        recargar_gastos()
+    gastos = gastos_en_memoria()
+    if gastos.empty:
+        st.info("No hay gastos registrados.")
+    nuevas, modificadas, borradas, aplicar = edicion_lote.editor(
+        gastos, "gastos_editor", ["empresa", "detalle", "monto", "observacion"],
+        column_config={
+            "empresa": st.column_config.SelectboxColumn("Empresa", options=listar_empresas()),
+            "monto": st.column_config.NumberColumn("Monto", min_value=0.0, step=100.0),
+        }
+    )
+    if aplicar:
+        try:
+            errores = guardar_cambios_gastos(nuevas, modificadas, borradas)
+        except Exception as e:
+            st.error(f"⚠️ Error al guardar los gastos: {e}")
+            return
+        if errores:
+            for err in errores:
+                st.error(f"❌ {err}")
+            return
+        edicion_lote.reiniciar("gastos_editor")
+        st.success(f"✅ Gastos guardados: {len(nuevas)} nuevos, {len(modificadas)} modificados, "
+                   f"{len(borradas)} eliminados.")
         st.rerun()
 
 # --- Interfaz de usuario ---
@@ -71,16 +154,7 @@ def app():
     st.markdown("---")
     st.subheader("📋 Gastos Registrados")
 
-    gastos = listar_gastos()
-    if gastos:
-        for g in gastos:
-            with st.expander(f"{g['empresa']} - {g['detalle']} - ${g['monto']:.0f}"):
-                st.write(f"**Fecha:** {g['fecha']}")
-                st.write(f"**Observación:** {g['observacion']}")
-                if st.button("Eliminar", key=f"del_{g['id']}"):
-                    eliminar_gasto(g['id'])
-    else:
-        st.info("No hay gastos registrados.")
+    seccion_gastos()
 
 if __name__ == '__main__':
     app()
@@ -0,0 +1,141 @@
+import random
+import threading
+import time
+from config import (DB_CONEXIONES, DB_KEEPALIVE, DB_TIMEOUT_CONEXION, DB_TIMEOUT_LECTURA,
+                    DB_TIMEOUT_ESCRITURA, DB_REINTENTOS, DB_REINTENTO_BASE, DB_REINTENTO_TOPE,
+                    DB_CIRCUITO_FALLOS, DB_CIRCUITO_ESPERA)
+
+# --- Acceso resiliente a la base de datos ---
+# - Un solo cliente HTTP por proceso, con conexiones keep-alive reutilizadas
+#   y un pool de DB_CONEXIONES (suficiente para lecturas.py y paginacion.py).
+# - Plazos por operación: las lecturas (GET) y las escrituras tienen su
+#   propio timeout de lectura de respuesta.
+# - Las lecturas, que son idempotentes, se reintentan ante fallas
+#   transitorias con espera exponencial y jitter ("full jitter").
+# - Un cortocircuito: tras DB_CIRCUITO_FALLOS operaciones fallidas seguidas
+#   (contando cada una una vez, después de sus reintentos) deja de llamar
+#   a la base durante DB_CIRCUITO_ESPERA segundos y falla de inmediato con
+#   CircuitoAbierto; luego deja pasar una operación de prueba. Mientras
+#   está abierto, catalogos.py sirve la última copia que tenga.
+
+_CODIGOS_TRANSITORIOS = {"408", "429", "500", "502", "503", "504", "520", "522", "524"}
+
+
+class CircuitoAbierto(Exception):
+    """La base de datos falló repetidamente y no se está consultando."""
+
+
+def es_transitorio(e: Exception) -> bool:
+    """True si la falla puede resolverse sola (red, sobrecarga del servidor)."""
+    if isinstance(e, CircuitoAbierto):
+        return True
+    try:
+        import httpx
+        from postgrest.exceptions import APIError
+    except ImportError:
+        return False
+    if isinstance(e, httpx.TransportError):
+        return True
+    return isinstance(e, APIError) and str(e.code) in _CODIGOS_TRANSITORIOS
+
+
+# --- Cliente HTTP ---
+
+def _plazo_por_operacion(request):
+    # httpx toma el timeout de cada petición de request.extensions
+    leer = DB_TIMEOUT_LECTURA if request.method in ("GET", "HEAD") else DB_TIMEOUT_ESCRITURA
+    request.extensions["timeout"] = {"connect": DB_TIMEOUT_CONEXION, "read": leer,
+                                     "write": DB_TIMEOUT_ESCRITURA, "pool": DB_TIMEOUT_CONEXION}
+
+
+def cliente_http():
+    """httpx.Client compartido, para ClientOptions(httpx_client=...)."""
+    import httpx
+    return httpx.Client(
+        limits=httpx.Limits(max_connections=DB_CONEXIONES,
+                            max_keepalive_connections=DB_CONEXIONES,
+                            keepalive_expiry=DB_KEEPALIVE),
+        timeout=httpx.Timeout(DB_TIMEOUT_LECTURA, connect=DB_TIMEOUT_CONEXION),
+        event_hooks={"request": [_plazo_por_operacion]},
+        follow_redirects=True,
+    )
+
+
+# --- Cortocircuito ---
+
+class Circuito:
+    """
+    Cuenta las operaciones seguidas que fallaron de forma transitoria (ya
+    agotados sus reintentos) y corta las llamadas al llegar al límite.
+    """
+
+    def __init__(self, fallos_max: int = DB_CIRCUITO_FALLOS, espera: float = DB_CIRCUITO_ESPERA):
+        self.fallos_max = fallos_max
+        self.espera = espera
+        self.fallos = 0
+        self.abierto_desde = None
+        self._probando = False
+        self._candado = threading.Lock()
+
+    @property
+    def abierto(self) -> bool:
+        return self.abierto_desde is not None
+
+    @property
+    def probando(self) -> bool:
+        return self._probando
+
+    def permitir(self):
+        """Lanza CircuitoAbierto si no se debe llamar a la base ahora."""
+        with self._candado:
+            if self.abierto_desde is None:
+                return
+            restante = self.espera - (time.monotonic() - self.abierto_desde)
+            if restante > 0 or self._probando:
+                raise CircuitoAbierto(
+                    f"Base de datos no disponible; se reintentará en {max(restante, 0):.0f} s")
+            # Semiabierto: esta operación es la prueba
+            self._probando = True
+
+    def exito(self):
+        with self._candado:
+            self.fallos = 0
+            self.abierto_desde = None
+            self._probando = False
+
+    def falla(self):
+        with self._candado:
+            self.fallos += 1
+            if self._probando or self.fallos >= self.fallos_max:
+                self.abierto_desde = time.monotonic()
+            self._probando = False
+
+
+circuito = Circuito()
+
+
+def ejecutar(funcion, reintentar: bool, circ: Circuito | None = None):
+    """
+    Ejecuta `funcion()` pasando por el cortocircuito y, si `reintentar`,
+    con hasta DB_REINTENTOS reintentos ante fallas transitorias.
+    """
+    circ = circ or circuito
+    intento = 0
+    while True:
+        circ.permitir()
+        try:
+            resultado = funcion()
+        except Exception as e:
+            if not es_transitorio(e):
+                # La base respondió (p. ej. una restricción violada): no es una caída
+                circ.exito()
+                raise
+            # La operación de prueba del circuito semiabierto no se reintenta
+            if not reintentar or intento >= DB_REINTENTOS or circ.probando:
+                circ.falla()
+                raise
+            time.sleep(random.uniform(0, min(DB_REINTENTO_TOPE, DB_REINTENTO_BASE * 2 ** intento)))
+            intento += 1
+        else:
+            circ.exito()
+            return resultado
@@ -1,74 +1,93 @@
 import streamlit as st
 import pandas as pd
-from config import supabase
+from datetime import date, timedelta
+import agregados
 
-# --- Funciones de acceso a datos en Supabase ---
+# Columnas del cubo (agregados.py) como se muestran en la tabla
+ETIQUETAS = {
+    "fecha": "Fecha",
+    "empresa": "Subcontrato",
+    "triot": "TRIOT",
+    "actividad": "Actividad Realizada",
+    "cantidad": "Realizado QTY",
+    "monto_produccion": "Monto de Producción",
+    "monto_venta": "Monto de Venta",
+}
+PERIODOS = ["Todo", "Esta semana", "Este mes", "Rango"]
 
-def leer_produccion():
-    """Obtiene actividad y cantidad desde la tabla 'produccion'."""
-    resp = (
-        supabase
-        .table("produccion")
-        .select("actividad, cantidad")
-        .execute()
-    )
-    return pd.DataFrame(resp.data)
+# --- Cálculo del resumen ---
 
+def rango_periodo(periodo: str, hoy: date | None = None):
+    """(desde, hasta) de un período de PERIODOS; None es sin límite."""
+    hoy = hoy or date.today()
+    if periodo == "Esta semana":
+        return hoy - timedelta(days=hoy.weekday()), hoy
+    if periodo == "Este mes":
+        return hoy.replace(day=1), hoy
+    return None, None
 
-def leer_actividades():
-    """Obtiene descripción y valores unitarios desde la tabla 'actividades'."""
-    resp = (
-        supabase
-        .table("actividades")
-        .select("descripcion, valor_produccion, valor_venta")
-        .execute()
-    )
-    return pd.DataFrame(resp.data)
+
+def calcular_resumen(desde=None, hasta=None, empresas=(), triots=(), actividades=(),
+                     por=("actividad",)):
+    """
+    Tabla con cantidad, monto de producción y de venta, sumados por las
+    dimensiones de `por` (fecha, empresa, triot, actividad) dentro de los
+    filtros. Se calcula rebanando el cubo diario, sin leer la producción.
+    """
+    resumen = agregados.consultar(desde, hasta, empresas, triots, actividades, por)
+    if resumen.empty:
+        return pd.DataFrame()
+    if "fecha" in resumen.columns:
+        resumen["fecha"] = resumen["fecha"].dt.date
+    return resumen.rename(columns=ETIQUETAS)
 
 # --- Módulo de Resumen de Producción ---
 
 def app():
-    st.subheader("📊 Resumen de Producción por Actividad")
-
-    # 1) Obtener datos
-    df_prod = leer_produccion()
-    df_act = leer_actividades()
+    st.subheader("📊 Resumen de Producción")
 
-    if df_prod.empty:
+    cubo = agregados.cubo()
+    if cubo.empty:
         st.info("No hay datos de producción registrados.")
         return
 
-    # 2) Agrupar y sumar
-    resumen = df_prod.groupby("actividad", as_index=False).sum()
+    # Filtros
+    c1, c2 = st.columns(2)
+    periodo = c1.selectbox("Período", PERIODOS, key="res_periodo")
+    desde, hasta = rango_periodo(periodo)
+    if periodo == "Rango":
+        rango = c2.date_input("Desde / hasta", value=(date.today() - timedelta(days=30), date.today()),
+                              key="res_rango")
+        desde, hasta = (rango[0], rango[-1]) if rango else (None, None)
+    f1, f2, f3 = st.columns(3)
+    empresas = f1.multiselect("Subcontrato", sorted(cubo["empresa"].cat.categories), key="res_empresas")
+    triots = f2.multiselect("TRIOT", sorted(cubo["triot"].cat.categories), key="res_triots")
+    actividades = f3.multiselect("Actividad", sorted(cubo["actividad"].cat.categories),
+                                 key="res_actividades")
+    # Detalle: cada dimensión agregada abre un nivel más
+    por = st.multiselect("Agrupar por", agregados.DIMENSIONES, default=["actividad"],
+                         format_func=ETIQUETAS.get, key="res_por")
 
-    # 3) Unir con valores unitarios
-    resumen = resumen.merge(
-        df_act,
-        left_on="actividad", right_on="descripcion",
-        how="left"
-    )
-
-    # 4) Calcular montos
-    resumen["Monto de Producción"] = resumen["cantidad"] * resumen["valor_produccion"]
-    resumen["Monto de Venta"] = resumen["cantidad"] * resumen["valor_venta"]
+    tabla = calcular_resumen(desde, hasta, empresas, triots, actividades, por)
+    if tabla.empty:
+        st.info("No hay producción con estos filtros.")
+        return
 
-    # 5) Preparar tabla final
-    tabla = resumen[[
-        "actividad", "cantidad",
-        "Monto de Producción", "Monto de Venta"
-    ]].rename(columns={
-        "actividad": "Actividad Realizada",
-        "cantidad": "Realizado QTY"
-    })
+    m1, m2, m3 = st.columns(3)
+    total_p = tabla["Monto de Producción"].sum()
+    total_v = tabla["Monto de Venta"].sum()
+    m1.metric("Monto de Producción", f"$ {total_p:,.0f}")
+    m2.metric("Monto de Venta", f"$ {total_v:,.0f}")
+    m3.metric("Venta - Producción", f"$ {total_v - total_p:,.0f}")
 
-    # 6) Mostrar con formato
+    # Mostrar con formato
     st.dataframe(
         tabla.style.format({
             "Realizado QTY": "{:.0f}",
             "Monto de Producción": "$ {:,.0f}",
             "Monto de Venta": "$ {:,.0f}"
         }),
-        use_container_width=True
+        use_container_width=True, hide_index=True
     )
 
 if __name__ == "__main__":
@@ -0,0 +1,205 @@
+"""
+Servidor de prueba que imita la API REST de Supabase (PostgREST) sobre un
+archivo SQLite, con latencia y fallas inyectadas, para probar la app y
+resiliencia.py sin tocar la base real.
+
+    python servidor_prueba.py --db productividad_fibra.db --puerto 54321 \
+        --latencia 80 --fallos 0.2 --tipo-fallo mixto
+
+    SUPABASE_URL=http://localhost:54321 SUPABASE_KEY=prueba streamlit run app.py
+
+Las condiciones se cambian en caliente con
+    curl -X POST localhost:54321/_control -d '{"fallos": 1, "tipo_fallo": "503"}'
+"""
+import argparse
+import csv
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+from almacenamiento import RepositorioSQLite
+
+TIPOS_FALLO = ("503", "corte", "lento", "mixto")
+_PARAMETROS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+# --- Traducción de la consulta PostgREST a filtros del repositorio ---
+
+def _valor_in(texto: str) -> list:
+    # in.(1,2,"a,b")
+    interior = texto.strip()[1:-1]
+    return next(csv.reader([interior], skipinitialspace=True)) if interior else []
+
+
+def traducir(consulta: str):
+    """(columnas, filtros, orden, limite, desde, parámetros) de la query string."""
+    columnas, filtros, orden, limite, desde, extra = "*", [], [], None, None, {}
+    for nombre, valor in parse_qsl(consulta, keep_blank_values=True):
+        if nombre == "select":
+            columnas = valor or "*"
+        elif nombre == "order":
+            for parte in valor.split(","):
+                col, _, sentido = parte.partition(".")
+                orden.append((col, sentido.startswith("desc")))
+        elif nombre == "limit":
+            limite = int(valor)
+        elif nombre == "offset":
+            desde = int(valor)
+        elif nombre in _PARAMETROS:
+            extra[nombre] = valor
+        else:
+            op, _, dato = valor.partition(".")
+            if op == "in":
+                filtros.append((nombre, "in", _valor_in(dato)))
+            else:
+                filtros.append((nombre, op, dato.replace("*", "%") if op == "ilike" else dato))
+    return columnas, filtros, orden, limite, desde, extra
+
+
+# --- Servidor ---
+
+class _Manejador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"       # keep-alive, como Supabase
+
+    def log_message(self, formato, *args):
+        if self.server.verboso:
+            super().log_message(formato, *args)
+
+    def _responder(self, estado: int, cuerpo):
+        datos = json.dumps(cuerpo, default=str).encode("utf-8")
+        try:
+            self.send_response(estado)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(datos)))
+            self.end_headers()
+            self.wfile.write(datos)
+        except (BrokenPipeError, ConnectionResetError):
+            # El cliente se cansó de esperar (timeout)
+            self.close_connection = True
+
+    def _error(self, estado: int, codigo: str, mensaje: str):
+        self._responder(estado, {"message": mensaje, "code": codigo, "hint": None, "details": None})
+
+    def _cuerpo(self):
+        largo = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(largo) or b"null") if largo else None
+
+    def _inyectar_falla(self) -> bool:
+        """Aplica latencia y, con probabilidad `fallos`, una falla. True si ya respondió."""
+        s = self.server
+        time.sleep(max(0.0, random.gauss(s.latencia, s.latencia * 0.25)) / 1000)
+        if random.random() >= s.fallos:
+            return False
+        tipo = random.choice(TIPOS_FALLO[:3]) if s.tipo_fallo == "mixto" else s.tipo_fallo
+        if tipo == "503":
+            self._error(503, "503", "Service Unavailable")
+        elif tipo == "corte":
+            self.close_connection = True
+            self.connection.close()
+        else:
+            time.sleep(s.lento)
+            self._error(504, "504", "Gateway Timeout")
+        return True
+
+    def _atender(self, metodo: str):
+        url = urlsplit(self.path)
+        if url.path == "/_control":
+            cambios = self._cuerpo() or {}
+            with self.server.candado:
+                for k in ("latencia", "fallos", "tipo_fallo", "lento"):
+                    if k in cambios:
+                        setattr(self.server, k, cambios[k])
+            return self._responder(200, {k: getattr(self.server, k)
+                                         for k in ("latencia", "fallos", "tipo_fallo", "lento")})
+        if not url.path.startswith("/rest/v1/"):
+            return self._error(404, "PGRST125", "no encontrado")
+        cuerpo = self._cuerpo()
+        if self._inyectar_falla():
+            return
+        repo = self.server.repo
+        recurso = url.path[len("/rest/v1/"):]
+        columnas, filtros, orden, limite, desde, extra = traducir(url.query)
+        try:
+            if recurso.startswith("rpc/"):
+                return self._responder(200, self._rpc(recurso[4:], cuerpo or {}))
+            if metodo == "GET":
+                return self._responder(200, repo.seleccionar(recurso, columnas, filtros, orden,
+                                                             limite, desde))
+            if metodo == "POST":
+                filas = cuerpo if isinstance(cuerpo, list) else [cuerpo]
+                if "on_conflict" in extra:
+                    repo.upsert(recurso, filas, extra["on_conflict"])
+                    return self._responder(201, [])
+                return self._responder(201, repo.insertar(recurso, filas))
+            if metodo == "PATCH":
+                repo.actualizar(recurso, cuerpo, filtros)
+            elif metodo == "DELETE":
+                repo.eliminar(recurso, filtros)
+            return self._responder(200, [])
+        except Exception as e:
+            self._error(400, "P0001", str(e))
+
+    def _rpc(self, funcion: str, p: dict):
+        repo = self.server.repo
+        if funcion == "siguiente_correlativo":
+            return repo.siguiente_correlativo()
+        if funcion == "crear_estado_pago":
+            return repo.crear_estado_pago(p["p_empresa"], p["p_fecha"], p["p_total_produccion"],
+                                          p["p_total_gastos"], p["p_neto"],
+                                          p["p_produccion_ids"], p["p_gasto_ids"])
+        if funcion == "guardar_lote":
+            return repo.guardar_lote(p["p_tabla"], p["p_nuevas"], p["p_modificadas"], p["p_borradas"])
+        raise ValueError(f"Función desconocida: {funcion}")
+
+    def do_GET(self):
+        self._atender("GET")
+
+    def do_POST(self):
+        self._atender("POST")
+
+    def do_PATCH(self):
+        self._atender("PATCH")
+
+    def do_DELETE(self):
+        self._atender("DELETE")
+
+
+def servir(db: str, puerto: int = 0, latencia: float = 0, fallos: float = 0,
+           tipo_fallo: str = "503", lento: float = 30, verboso: bool = False) -> ThreadingHTTPServer:
+    """
+    Arranca el servidor en un hilo y lo devuelve; su URL base es
+    f"http://127.0.0.1:{servidor.server_port}". `latencia` en ms, `fallos`
+    es la probabilidad de falla por petición y `lento` los segundos que
+    tarda una respuesta del tipo "lento". Se detiene con shutdown().
+    """
+    servidor = ThreadingHTTPServer(("127.0.0.1", puerto), _Manejador)
+    servidor.daemon_threads = True
+    servidor.repo = RepositorioSQLite(db)
+    servidor.latencia, servidor.fallos, servidor.tipo_fallo = latencia, fallos, tipo_fallo
+    servidor.lento, servidor.verboso = lento, verboso
+    servidor.candado = threading.Lock()
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--db", default="productividad_fibra.db")
+    p.add_argument("--puerto", type=int, default=54321)
+    p.add_argument("--latencia", type=float, default=0, help="ms por petición")
+    p.add_argument("--fallos", type=float, default=0, help="probabilidad de falla (0 a 1)")
+    p.add_argument("--tipo-fallo", choices=TIPOS_FALLO, default="503")
+    p.add_argument("--lento", type=float, default=30, help="segundos de una respuesta lenta")
+    a = p.parse_args()
+
+    servidor = servir(a.db, a.puerto, a.latencia, a.fallos, a.tipo_fallo, a.lento, verboso=True)
+    print(f"Escuchando en http://127.0.0.1:{servidor.server_port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
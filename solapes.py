@@ -0,0 +1,230 @@
+"""
+Producción que se solapa en metros con otra de la misma actividad en el
+mismo tramo (duplicados o metros ya registrados por otra cuadrilla).
+
+    python solapes.py [--actividad "INSTALACION DE CABLE"] [--csv solapes.csv]
+"""
+import argparse
+import threading
+import numpy as np
+import pandas as pd
+from config import SOLAPE_MINIMO
+from esquemas import metros
+import avance
+
+# --- Índice de intervalos por (triot, tramo, actividad) ---
+# Los intervalos se ordenan por (clave, inicio) en arreglos únicos y, dentro
+# de cada clave, se guarda el máximo acumulado de sus fines. Un intervalo
+# [a, b] se cruza con algún registro si hay uno con inicio <= b y fin >= a:
+# el primero se ubica con una búsqueda binaria sobre los inicios y el
+# segundo sobre el máximo acumulado (que es creciente), así que saber si
+# hay cruce cuesta O(log n) y listar los k cruces O(log n + k). El índice
+# se arma con los intervalos de avance.py; las filas nuevas que aparecen
+# después van a un índice pequeño por clave que se consulta junto con él.
+
+_CLAVE = ["triot", "tramo", "actividad"]
+_COLUMNAS = _CLAVE + ["inicio", "fin"]
+
+
+def _finitos(iv: pd.DataFrame) -> pd.DataFrame:
+    return iv[np.isfinite(iv["inicio"].to_numpy()) & np.isfinite(iv["fin"].to_numpy())]
+
+
+def _cruces(a_ord, b_ord, maximo, a: float, b: float):
+    """Posiciones (en arreglos ordenados por inicio) con inicio <= b y fin >= a."""
+    hasta = np.searchsorted(a_ord, b, side="right")
+    desde = np.searchsorted(maximo, a, side="left")
+    if desde >= hasta:
+        return np.empty(0, dtype=int)
+    pos = np.arange(desde, hasta)
+    return pos[b_ord[pos] >= a]
+
+
+class _Indice:
+    """Intervalos de todas las claves en arreglos ordenados por (clave, inicio)."""
+
+    def __init__(self, iv: pd.DataFrame):
+        iv = _finitos(iv)
+        g = iv.groupby(_CLAVE, sort=False).ngroup().to_numpy()
+        iv, g = iv[g >= 0], g[g >= 0]
+        a, b = iv["inicio"].to_numpy(), iv["fin"].to_numpy()
+        orden = np.lexsort((a, g))
+        g, self.a, self.b = g[orden], a[orden], b[orden]
+        self.ids = iv["id"].to_numpy()[orden]
+        cortes = np.flatnonzero(np.r_[True, g[1:] != g[:-1]]) if len(g) else np.empty(0, int)
+        fines = np.r_[cortes[1:], len(g)].astype(int)
+        # Máximo acumulado por clave con un solo accumulate (cada clave en
+        # su propia franja, como en avance.py)
+        if len(g):
+            base = self.a.min()
+            franja = self.b.max() - base + 1
+            self.maximo = np.maximum.accumulate(self.b - base + g * franja) - g * franja + base
+        else:
+            self.maximo = self.b.copy()
+        claves = iv.iloc[orden[cortes]][_CLAVE].itertuples(index=False, name=None)
+        self.rangos = dict(zip(claves, zip(cortes.tolist(), fines.tolist())))
+        self.nuevas = {}    # clave -> (ids, inicio, fin, máximo) de filas posteriores
+
+    def agregar(self, iv: pd.DataFrame):
+        """Suma filas nuevas al índice pequeño de su clave."""
+        iv = _finitos(iv)
+        for clave, idx in iv.groupby(_CLAVE, sort=False).indices.items():
+            ids, a, b = (iv[c].to_numpy()[idx] for c in ("id", "inicio", "fin"))
+            if clave in self.nuevas:
+                previos = self.nuevas[clave]
+                ids, a, b = (np.concatenate([p, x]) for p, x in zip(previos[:3], (ids, a, b)))
+            orden = np.argsort(a, kind="stable")
+            ids, a, b = ids[orden], a[orden], b[orden]
+            self.nuevas[clave] = (ids, a, b, np.maximum.accumulate(b))
+
+    def cruces(self, clave, a: float, b: float):
+        """(ids, inicios, fines) de los intervalos de `clave` que tocan [a, b]."""
+        partes = []
+        if clave in self.rangos:
+            d, h = self.rangos[clave]
+            pos = d + _cruces(self.a[d:h], self.b[d:h], self.maximo[d:h], a, b)
+            partes.append((self.ids[pos], self.a[pos], self.b[pos]))
+        if clave in self.nuevas:
+            ids, x, y, maximo = self.nuevas[clave]
+            pos = _cruces(x, y, maximo, a, b)
+            partes.append((ids[pos], x[pos], y[pos]))
+        if not partes:
+            return np.empty(0, dtype="int64"), np.empty(0), np.empty(0)
+        return tuple(np.concatenate(c) for c in zip(*partes))
+
+
+_candado = threading.Lock()
+_indice = None
+_generacion = None     # generación de avance.py con que se armó
+_ultimo_id = 0
+
+
+def _al_dia() -> _Indice:
+    global _indice, _generacion, _ultimo_id
+    generacion, iv = avance.instantanea()
+    with _candado:
+        if _indice is None or generacion != _generacion:
+            _indice = _Indice(iv)
+        else:
+            nuevas = iv[iv["id"].to_numpy() > _ultimo_id]
+            if len(nuevas):
+                _indice.agregar(nuevas)
+        _generacion = generacion
+        _ultimo_id = int(iv["id"].max()) if len(iv) else 0
+        return _indice
+
+
+def _metros(valor) -> float:
+    return float(metros(pd.Series([valor]))[0])
+
+
+def buscar(triot: str, tramo: str, actividad: str, inicio, fin, excluir=()) -> pd.DataFrame:
+    """
+    Registros guardados de la misma actividad y tramo que se solapan con
+    [inicio, fin] en al menos SOLAPE_MINIMO metros, o que son idénticos.
+    Columnas: id, inicio, fin, metros (del solape) y exacto. `excluir` son
+    ids que no cuentan (el mismo registro, al editarlo).
+    """
+    a, b = _metros(inicio), _metros(fin)
+    vacio = pd.DataFrame(columns=["id", "inicio", "fin", "metros", "exacto"])
+    if not (np.isfinite(a) and np.isfinite(b)):
+        return vacio
+    a, b = min(a, b), max(a, b)
+    ids, x, y = _al_dia().cruces((triot, tramo, actividad), a, b)
+    r = pd.DataFrame({"id": ids, "inicio": x, "fin": y})
+    r["metros"] = np.minimum(r["fin"], b) - np.maximum(r["inicio"], a)
+    r["exacto"] = (r["inicio"] == a) & (r["fin"] == b)
+    r = r[(r["exacto"] | (r["metros"] >= SOLAPE_MINIMO)) & ~r["id"].isin(list(excluir))]
+    return r.reset_index(drop=True)
+
+
+def revisar(df: pd.DataFrame, excluir=()) -> pd.DataFrame:
+    """
+    Revisa en lote filas por guardar (triot, tramo, actividad, inicio, fin y
+    una etiqueta `fila`) contra lo guardado y entre ellas mismas. Devuelve
+    una fila por cruce: fila, contra ("id N" o la etiqueta de otra fila),
+    inicio, fin, metros y exacto. `excluir` son ids que se están
+    reemplazando (filas editadas).
+    """
+    excluir = set(int(i) for i in excluir)
+    indice = _al_dia()
+    a = metros(df["inicio"])
+    b = metros(df["fin"])
+    a, b = np.fmin(a, b), np.fmax(a, b)
+    claves = list(zip(df["triot"], df["tramo"], df["actividad"]))
+    vistas = {}     # clave -> [(a, b, fila)] de las filas anteriores del lote
+    cruces = []
+    for clave, ai, bi, fila in zip(claves, a, b, df["fila"]):
+        if not (np.isfinite(ai) and np.isfinite(bi)):
+            continue
+        candidatos = [(f"id {i}", x, y) for i, x, y in zip(*indice.cruces(clave, ai, bi))
+                      if int(i) not in excluir]
+        candidatos += [(otra, x, y) for x, y, otra in vistas.get(clave, ()) if x <= bi and y >= ai]
+        for contra, x, y in candidatos:
+            solape = min(y, bi) - max(x, ai)
+            exacto = x == ai and y == bi
+            if exacto or solape >= SOLAPE_MINIMO:
+                cruces.append((fila, contra, x, y, solape, exacto))
+        vistas.setdefault(clave, []).append((ai, bi, fila))
+    return pd.DataFrame(cruces, columns=["fila", "contra", "inicio", "fin", "metros", "exacto"])
+
+
+def revisar_existentes(actividades=()) -> pd.DataFrame:
+    """
+    Solapes entre los registros ya guardados, sin recorrer fila a fila:
+    cada registro que se cruza con uno anterior (por inicio) de su misma
+    clave, con el id de aquel que llega más lejos. Columnas: id, triot,
+    tramo, actividad, inicio, fin, contra, metros y exacto.
+    """
+    iv = _finitos(avance.intervalos(actividades))
+    columnas = ["id"] + _COLUMNAS + ["contra", "metros", "exacto"]
+    if iv.empty:
+        return pd.DataFrame(columns=columnas)
+    g = iv.groupby(_CLAVE, sort=False).ngroup().to_numpy()
+    a, b = iv["inicio"].to_numpy(), iv["fin"].to_numpy()
+    orden = np.lexsort((b, a, g))
+    g, a, b = g[orden], a[orden], b[orden]
+
+    # Máximo acumulado de fin por clave (cada clave en su propia franja,
+    # como en avance.py) y la posición del registro que lo alcanza
+    base = a.min()
+    franja = b.max() - base + 1
+    desplazado = b - base + g * franja
+    maximo = np.maximum.accumulate(desplazado)
+    quien = np.maximum.accumulate(np.where(desplazado == maximo, np.arange(len(b)), 0))
+    previo = np.full(len(b), -np.inf)
+    previo[1:] = maximo[:-1] - g[1:] * franja + base
+    primero = np.ones(len(b), dtype=bool)
+    primero[1:] = g[1:] != g[:-1]
+    previo[primero] = -np.inf
+
+    solape = np.minimum(previo, b) - a
+    exacto = np.zeros(len(b), dtype=bool)
+    exacto[1:] = ~primero[1:] & (a[1:] == a[:-1]) & (b[1:] == b[:-1])
+    hay = exacto | (~primero & (solape >= SOLAPE_MINIMO))
+    pos = np.flatnonzero(hay)
+    filas = iv.iloc[orden[pos]]
+    contra = iv["id"].to_numpy()[orden[quien[pos - 1]]]
+    # Un duplicado exacto apunta al registro idéntico anterior
+    contra = np.where(exacto[pos], iv["id"].to_numpy()[orden[pos - 1]], contra)
+    return filas.assign(contra=contra, metros=np.maximum(solape[pos], 0),
+                        exacto=exacto[pos])[columnas].reset_index(drop=True)
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--actividad", action="append", default=[])
+    p.add_argument("--csv", help="guardar el detalle en este archivo")
+    a = p.parse_args()
+
+    r = revisar_existentes(a.actividad)
+    print(f"Registros solapados: {len(r)}  Duplicados exactos: {int(r['exacto'].sum())}  "
+          f"Metros solapados: {r['metros'].sum():,.0f}")
+    if a.csv:
+        r.to_csv(a.csv, index=False)
+    elif not r.empty:
+        print(r.head(50).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
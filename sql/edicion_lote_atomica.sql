@@ -0,0 +1,80 @@
+-- Guardado atómico de las grillas editables (edicion_lote.py): inserciones,
+-- actualizaciones por id y borrados en una sola llamada RPC. Si una fila por
+-- modificar o borrar ya no existe o está en un estado de pago no se guarda
+-- nada. Ejecutar en el editor SQL de Supabase.
+
+create or replace function guardar_lote(
+    p_tabla text,
+    p_nuevas jsonb,
+    p_modificadas jsonb,
+    p_borradas bigint[]
+) returns jsonb language plpgsql as $$
+declare
+    v_detalle text;
+    v_columna text;
+    v_ids bigint[];
+    v_existentes bigint[];
+    v_faltantes bigint[];
+    v_facturados bigint[];
+    v_columnas text;
+    v_asignaciones text;
+    v_creadas jsonb := '[]'::jsonb;
+begin
+    case p_tabla
+        when 'produccion' then
+            v_detalle := 'estados_pago_detalle';
+            v_columna := 'produccion_id';
+        when 'gastos' then
+            v_detalle := 'estados_pago_gastos';
+            v_columna := 'gasto_id';
+        else
+            raise exception 'Tabla no editable en lote: %', p_tabla;
+    end case;
+
+    v_ids := array(select (e ->> 'id')::bigint from jsonb_array_elements(p_modificadas) e)
+             || coalesce(p_borradas, '{}');
+
+    -- Bloquea las filas a tocar: nadie puede borrarlas ni facturarlas
+    -- hasta que termine la transacción
+    execute format('select array(select id from %I where id = any($1) order by id for update)', p_tabla)
+        into v_existentes using v_ids;
+    v_faltantes := array(select unnest(v_ids) except select unnest(v_existentes) order by 1);
+    execute format('select array(select distinct %1$I from %2$I where %1$I = any($1) order by 1)',
+                   v_columna, v_detalle)
+        into v_facturados using v_ids;
+    if cardinality(v_faltantes) > 0 or cardinality(v_facturados) > 0 then
+        return jsonb_build_object('creadas', '[]'::jsonb,
+                                  'faltantes', to_jsonb(v_faltantes),
+                                  'facturados', to_jsonb(v_facturados));
+    end if;
+
+    -- Todas las filas modificadas traen las mismas columnas
+    if jsonb_array_length(p_modificadas) > 0 then
+        select string_agg(format('%1$I = r.%1$I', k), ', ') into v_asignaciones
+        from jsonb_object_keys(p_modificadas -> 0) k
+        where k <> 'id';
+        if v_asignaciones is not null then
+            execute format('update %1$I t set %2$s from jsonb_populate_recordset(null::%1$I, $1) r '
+                           'where t.id = r.id', p_tabla, v_asignaciones)
+                using p_modificadas;
+        end if;
+    end if;
+
+    execute format('delete from %I where id = any($1)', p_tabla) using coalesce(p_borradas, '{}');
+
+    if jsonb_array_length(p_nuevas) > 0 then
+        select string_agg(format('%I', k), ', ') into v_columnas
+        from jsonb_object_keys(p_nuevas -> 0) k;
+        execute format('with creadas as ('
+                       '  insert into %1$I (%2$s) '
+                       '  select %2$s from jsonb_populate_recordset(null::%1$I, $1) returning *'
+                       ') select coalesce(jsonb_agg(to_jsonb(c)), ''[]''::jsonb) from creadas c',
+                       p_tabla, v_columnas)
+            into v_creadas using p_nuevas;
+    end if;
+
+    return jsonb_build_object('creadas', v_creadas,
+                              'faltantes', '[]'::jsonb,
+                              'facturados', '[]'::jsonb);
+end
+$$;
@@ -0,0 +1,67 @@
+-- Correlativo de estados de pago respaldado por una secuencia y creación
+-- atómica del estado (cabecera, detalle de producción y gastos) en una sola
+-- llamada RPC. Ejecutar en el editor SQL de Supabase.
+
+create sequence if not exists estados_pago_correlativo_seq;
+
+-- Continúa después del mayor correlativo EGTD-n existente
+select setval(
+    'estados_pago_correlativo_seq',
+    coalesce((select max((substring(correlativo from '^EGTD-(\d+)$'))::bigint)
+              from estados_pago), 0) + 1,
+    false
+);
+
+-- Una línea de producción o un gasto solo puede estar en un estado de pago
+create unique index if not exists uq_estados_pago_detalle_produccion
+    on estados_pago_detalle (produccion_id);
+create unique index if not exists uq_estados_pago_gastos_gasto
+    on estados_pago_gastos (gasto_id);
+
+create or replace function formatear_correlativo(n bigint)
+returns text language sql immutable as $$
+    select 'EGTD-' || case when n < 10 then '0' || n::text else n::text end
+$$;
+
+-- Próximo correlativo, sin consumirlo (para previsualizar)
+create or replace function siguiente_correlativo()
+returns text language sql stable as $$
+    select formatear_correlativo(case when is_called then last_value + 1 else last_value end)
+    from estados_pago_correlativo_seq
+$$;
+
+create or replace function crear_estado_pago(
+    p_empresa text,
+    p_fecha date,
+    p_total_produccion numeric,
+    p_total_gastos numeric,
+    p_neto numeric,
+    p_produccion_ids bigint[],
+    p_gasto_ids bigint[]
+) returns text language plpgsql as $$
+declare
+    v_corr text;
+begin
+    if exists (select 1 from estados_pago_detalle
+               where produccion_id = any(p_produccion_ids)) then
+        raise exception 'Hay producción que ya está en otro estado de pago';
+    end if;
+    if exists (select 1 from estados_pago_gastos
+               where gasto_id = any(p_gasto_ids)) then
+        raise exception 'Hay gastos que ya están en otro estado de pago';
+    end if;
+
+    v_corr := formatear_correlativo(nextval('estados_pago_correlativo_seq'));
+
+    insert into estados_pago (correlativo, fecha, empresa, total_produccion, total_gastos, neto)
+    values (v_corr, p_fecha, p_empresa, p_total_produccion, p_total_gastos, p_neto);
+
+    insert into estados_pago_detalle (correlativo, produccion_id)
+    select v_corr, unnest(p_produccion_ids);
+
+    insert into estados_pago_gastos (correlativo, gasto_id)
+    select v_corr, unnest(p_gasto_ids);
+
+    return v_corr;
+end
+$$;
@@ -0,0 +1,21 @@
+-- Índices para las grillas de mantenimiento (grilla.py): orden por
+-- (columna, id) para la paginación por keyset y trigramas para la búsqueda
+-- con ilike '%texto%'. Ejecutar en el editor SQL de Supabase.
+
+create extension if not exists pg_trgm;
+
+create index if not exists idx_actividades_descripcion_id on actividades (descripcion, id);
+create index if not exists idx_actividades_codigo_id on actividades (codigo, id);
+create index if not exists idx_actividades_grupo_id on actividades (grupo, id);
+create index if not exists idx_personal_nombre_id on personal (nombre, id);
+create index if not exists idx_personal_empresa_id on personal (empresa, id);
+create index if not exists idx_personal_rut_id on personal (rut, id);
+create index if not exists idx_tramos_triot_id on tramos (triot, id);
+create index if not exists idx_tramos_tramo_id on tramos (tramo, id);
+create index if not exists idx_usuarios_usuario_id on usuarios (usuario, id);
+create index if not exists idx_usuarios_nombre_id on usuarios (nombre, id);
+
+create index if not exists trgm_actividades_descripcion on actividades using gin (descripcion gin_trgm_ops);
+create index if not exists trgm_personal_nombre on personal using gin (nombre gin_trgm_ops);
+create index if not exists trgm_personal_rut on personal using gin (rut gin_trgm_ops);
+create index if not exists trgm_tramos_triot on tramos using gin (triot gin_trgm_ops);
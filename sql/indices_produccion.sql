@@ -0,0 +1,9 @@
+-- Índices del historial de producción (ingreso_produccion.py): se ordena
+-- por (fecha, id) descendente con keyset y se filtra por rango de fechas y,
+-- opcionalmente, trabajador, actividad o TRIOT.
+-- Ejecutar en el editor SQL de Supabase.
+
+create index if not exists idx_produccion_fecha_id on produccion (fecha, id);
+create index if not exists idx_produccion_trabajador_fecha on produccion (trabajador, fecha, id);
+create index if not exists idx_produccion_actividad_fecha on produccion (actividad, fecha, id);
+create index if not exists idx_produccion_triot_fecha on produccion (triot, fecha, id);
@@ -0,0 +1,43 @@
+-- Marcas para sincronizar la copia local de producción (copia_local.py):
+-- cada registro guarda cuándo se creó o modificó por última vez y los
+-- borrados quedan anotados en produccion_borrados. Así la copia trae solo
+-- las filas nuevas, las modificadas y los ids borrados desde la última vez.
+-- Ejecutar en el editor SQL de Supabase.
+
+alter table produccion
+    add column if not exists actualizado_en timestamptz not null default now();
+
+create or replace function marcar_actualizado_en()
+returns trigger language plpgsql as $$
+begin
+    new.actualizado_en := now();
+    return new;
+end;
+$$;
+
+drop trigger if exists trg_produccion_actualizado_en on produccion;
+create trigger trg_produccion_actualizado_en
+    before update on produccion
+    for each row execute function marcar_actualizado_en();
+
+create table if not exists produccion_borrados (
+    id bigint primary key,
+    borrado_en timestamptz not null default now()
+);
+
+create or replace function anotar_produccion_borrada()
+returns trigger language plpgsql as $$
+begin
+    insert into produccion_borrados (id, borrado_en) values (old.id, now())
+    on conflict (id) do update set borrado_en = excluded.borrado_en;
+    return old;
+end;
+$$;
+
+drop trigger if exists trg_produccion_borrada on produccion;
+create trigger trg_produccion_borrada
+    after delete on produccion
+    for each row execute function anotar_produccion_borrada();
+
+create index if not exists idx_produccion_actualizado_en on produccion (actualizado_en);
+create index if not exists idx_produccion_borrados_borrado_en on produccion_borrados (borrado_en);
@@ -0,0 +1,69 @@
+-- Vistas de producción y gastos aún no incluidos en un estado de pago.
+-- Ejecutar en el editor SQL de Supabase. PostgREST las expone como tablas,
+-- por lo que basta filtrar por empresa: .table("v_produccion_no_facturada").eq("empresa", ...)
+
+create or replace view v_produccion_no_facturada as
+select
+    p.id,
+    p.fecha,
+    p.actividad,
+    p.trabajador,
+    pe.empresa,
+    p.cantidad,
+    a.valor_produccion,
+    a.valor_venta,
+    p.cantidad * a.valor_produccion as monto_produccion,
+    p.triot,
+    p.tramo
+from produccion p
+join personal pe on pe.nombre = p.trabajador
+join actividades a on a.descripcion = p.actividad
+where not exists (
+    select 1 from estados_pago_detalle d where d.produccion_id = p.id
+);
+
+create or replace view v_gastos_no_facturados as
+select
+    g.id,
+    g.empresa,
+    g.detalle as descripcion,
+    g.monto,
+    g.fecha
+from gastos g
+where not exists (
+    select 1 from estados_pago_gastos eg where eg.gasto_id = g.id
+);
+
+-- Líneas de estados de pago ya guardados (para volver a emitir su PDF)
+create or replace view v_estado_pago_produccion as
+select
+    d.correlativo,
+    p.id,
+    p.fecha,
+    p.actividad,
+    p.trabajador,
+    p.cantidad,
+    a.valor_produccion,
+    a.valor_venta,
+    p.cantidad * a.valor_produccion as monto_produccion,
+    p.triot,
+    p.tramo
+from estados_pago_detalle d
+join produccion p on p.id = d.produccion_id
+join actividades a on a.descripcion = p.actividad;
+
+create or replace view v_estado_pago_gastos as
+select
+    eg.correlativo,
+    g.id,
+    g.detalle as descripcion,
+    g.monto
+from estados_pago_gastos eg
+join gastos g on g.id = eg.gasto_id;
+
+-- Índices que usan los joins y el anti-join
+create index if not exists idx_produccion_trabajador on produccion (trabajador);
+create index if not exists idx_personal_empresa on personal (empresa);
+create index if not exists idx_gastos_empresa on gastos (empresa);
+create index if not exists idx_estados_pago_detalle_produccion on estados_pago_detalle (produccion_id);
+create index if not exists idx_estados_pago_gastos_gasto on estados_pago_gastos (gasto_id);
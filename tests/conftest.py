@@ -0,0 +1,78 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import pytest
+
+# --- Base SQLite de prueba ---
+# config.py lee estas variables al importarse, así que se fijan antes de
+# importar cualquier módulo de la app.
+_DIR = tempfile.mkdtemp(prefix="pruebas_fibra_")
+os.environ.update({
+    "ALMACENAMIENTO": "sqlite",
+    "SQLITE_PATH": os.path.join(_DIR, "fibra.db"),
+    "COPIA_LOCAL_DIR": "",
+    "PDF_CACHE_DIR": os.path.join(_DIR, "cache_pdf"),
+})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generar_datos import ESQUEMA  # noqa: E402
+from migrar_sqlite import migrar  # noqa: E402
+
+_conn = sqlite3.connect(os.environ["SQLITE_PATH"])
+with _conn:
+    for _sql in ESQUEMA:
+        _conn.execute(_sql)
+migrar(_conn)
+_conn.close()
+
+_TABLAS = ["produccion", "actividades", "personal", "tramos", "empresas", "gastos",
+           "estados_pago", "estados_pago_detalle", "estados_pago_gastos"]
+
+ACTIVIDADES = [
+    {"codigo": "A1", "descripcion": "CABLE", "unidad": "M", "grupo": "G", "tipo": "T",
+     "valor_produccion": 10.0, "valor_venta": 15.0},
+    {"codigo": "A2", "descripcion": "MUFA", "unidad": "UN", "grupo": "G", "tipo": "T",
+     "valor_produccion": 100.0, "valor_venta": 150.0},
+]
+PERSONAL = [
+    {"nombre": "ANA", "rut": "1-9", "cargo": "TECNICO", "empresa": "EMPRESA A"},
+    {"nombre": "BETO", "rut": "2-7", "cargo": "TECNICO", "empresa": "EMPRESA B"},
+]
+TRAMOS = [
+    {"triot": "T1", "tramo": "1", "inicio": "0", "fin": "100", "mufa_inicio": "M0", "mufa_fin": "M1"},
+    {"triot": "T1", "tramo": "2", "inicio": "100", "fin": "300", "mufa_inicio": "M1", "mufa_fin": "M2"},
+]
+EMPRESAS = [{"nombre": "EMPRESA A"}, {"nombre": "EMPRESA B"}]
+
+
+def produccion(**campos) -> dict:
+    """Registro de producción con valores por defecto."""
+    return {"fecha": "2026-01-05", "actividad": "CABLE", "trabajador": "ANA", "triot": "T1",
+            "tramo": "1", "inicio": "0", "fin": "50", "mufa_origen": "M0", "mufa_final": "M1",
+            "cantidad": 50.0, "rematado": 0, **campos}
+
+
+@pytest.fixture
+def repo():
+    """
+    Repositorio sobre la base de prueba, con los catálogos de arriba, sin
+    producción y con las cachés en memoria de la app descartadas.
+    """
+    from almacenamiento import repo
+    import agregados
+    import avance
+    import catalogos
+    conn = sqlite3.connect(os.environ["SQLITE_PATH"])
+    with conn:
+        for tabla in _TABLAS:
+            conn.execute(f"DELETE FROM {tabla}")
+    conn.close()
+    repo.insertar("actividades", ACTIVIDADES)
+    repo.insertar("personal", PERSONAL)
+    repo.insertar("tramos", TRAMOS)
+    repo.insertar("empresas", EMPRESAS)
+    catalogos.invalidar()
+    agregados.reiniciar()
+    avance.reiniciar()
+    return repo
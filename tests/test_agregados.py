@@ -0,0 +1,80 @@
+import agregados
+import catalogos
+from conftest import produccion
+
+DIMS = ["id", "fecha", "actividad", "trabajador", "triot", "cantidad"]
+
+
+def _monto():
+    return agregados.consultar(por=[])["monto_produccion"].iloc[0]
+
+
+def _editar(repo, fila, **cambios):
+    repo.actualizar("produccion", cambios, [("id", "eq", fila["id"])])
+    agregados.aplicar_cambio({c: fila[c] for c in DIMS}, {"id": fila["id"], **cambios})
+
+
+def test_edicion_tras_cambiar_el_valor_de_la_actividad(repo):
+    fila = repo.insertar("produccion", produccion(cantidad=50.0))[0]
+    assert _monto() == 500.0
+
+    repo.actualizar("actividades", {"valor_produccion": 20.0}, [("descripcion", "eq", "CABLE")])
+    catalogos.invalidar("actividades")
+    _editar(repo, fila, cantidad=10.0)
+
+    # 10 m a 20, no 500 - 50 * 20 + 10 * 20
+    assert _monto() == 200.0
+
+
+def test_renovar_catalogos_sin_cambios_no_recalcula_el_cubo(repo, monkeypatch):
+    fila = repo.insertar("produccion", produccion(cantidad=50.0))[0]
+    assert _monto() == 500.0
+    lecturas = []
+    leer_filas = agregados.leer_filas
+    monkeypatch.setattr(agregados, "leer_filas",
+                        lambda *a, **k: lecturas.append(k["desde"]) or leer_filas(*a, **k))
+
+    catalogos.invalidar()
+    _editar(repo, fila, cantidad=10.0)
+
+    assert _monto() == 100.0
+    assert lecturas == [fila["id"]]
+
+
+def _por(*dims):
+    return agregados.consultar(por=list(dims)).to_dict("records")
+
+
+def test_aplicar_cambios_mueve_la_fila_entre_celdas(repo):
+    fila = repo.insertar("produccion", produccion(cantidad=5.0, triot="T1"))[0]
+    agregados.refrescar()
+
+    # Otro trabajador (y empresa) y otra actividad; fecha y triot se toman del anterior
+    _editar(repo, fila, trabajador="BETO", actividad="MUFA")
+
+    assert _por("empresa", "actividad") == [
+        {"empresa": "EMPRESA B", "actividad": "MUFA", "cantidad": 5.0,
+         "monto_produccion": 500.0, "monto_venta": 750.0}]
+
+
+def test_aplicar_cambios_borrado_e_insercion(repo):
+    filas = repo.insertar("produccion", [produccion(cantidad=5.0), produccion(cantidad=7.0)])
+    agregados.refrescar()
+
+    repo.eliminar("produccion", [("id", "eq", filas[0]["id"])])
+    agregados.aplicar_cambios([{c: filas[0][c] for c in DIMS}], [])
+    # Una inserción posterior al último id sumado la trae refrescar(), no el delta
+    nueva = repo.insertar("produccion", produccion(cantidad=1.0))[0]
+    agregados.aplicar_cambio(None, {c: nueva[c] for c in DIMS})
+
+    assert _por("actividad") == [{"actividad": "CABLE", "cantidad": 8.0,
+                                  "monto_produccion": 80.0, "monto_venta": 120.0}]
+
+
+def test_aplicar_cambios_que_dejan_la_celda_en_cero(repo):
+    fila = repo.insertar("produccion", produccion(cantidad=5.0))[0]
+    agregados.refrescar()
+
+    _editar(repo, fila, cantidad=0.0)
+
+    assert agregados.cubo().empty
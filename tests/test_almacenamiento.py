@@ -0,0 +1,45 @@
+import sqlite3
+import pytest
+import migrar_sqlite
+from almacenamiento import RepositorioSQLite
+from generar_datos import ESQUEMA
+
+
+@pytest.fixture
+def sin_migrar(tmp_path):
+    ruta = tmp_path / "sin_migrar.db"
+    with sqlite3.connect(ruta) as conn:
+        for sql in ESQUEMA:
+            conn.execute(sql)
+    conn.close()
+    return ruta
+
+
+def _esquema(ruta):
+    conn = sqlite3.connect(ruta)
+    filas = conn.execute("SELECT type, name, sql FROM sqlite_master ORDER BY name").fetchall()
+    conn.close()
+    return filas
+
+
+def test_repositorio_no_modifica_una_base_sin_migrar(sin_migrar):
+    antes = sin_migrar.read_bytes()
+    repo = RepositorioSQLite(str(sin_migrar))
+
+    with pytest.raises(RuntimeError, match="migrar_sqlite.py"):
+        repo.seleccionar("produccion")
+
+    assert sin_migrar.read_bytes() == antes
+
+
+def test_migrar_es_repetible(sin_migrar):
+    conn = sqlite3.connect(sin_migrar)
+    migrar_sqlite.migrar(conn)
+    conn.close()
+    migrado = _esquema(sin_migrar)
+    conn = sqlite3.connect(sin_migrar)
+    migrar_sqlite.migrar(conn)
+    conn.close()
+
+    assert _esquema(sin_migrar) == migrado
+    assert RepositorioSQLite(str(sin_migrar)).siguiente_correlativo() == "EGTD-01"
@@ -0,0 +1,46 @@
+import avance
+from conftest import produccion
+
+MEDIDAS = ["tramo", "largo", "registros", "declarado", "cubierto", "solapado", "sin_cubrir",
+           "huecos", "avance"]
+
+
+def test_por_tramo_une_los_metros_solapados(repo):
+    repo.insertar("produccion", [
+        produccion(inicio="0", fin="50"),
+        produccion(inicio="40", fin="80"),
+        # Se recorta al tramo 2 (100 a 300)
+        produccion(tramo="2", inicio="250", fin="400"),
+        produccion(inicio="0", fin="100", actividad="MUFA"),
+    ])
+
+    r = avance.por_tramo(["CABLE"])
+
+    assert r[MEDIDAS].to_dict("records") == [
+        {"tramo": "1", "largo": 100.0, "registros": 2, "declarado": 90.0, "cubierto": 80.0,
+         "solapado": 10.0, "sin_cubrir": 20.0, "huecos": 1, "avance": 80.0},
+        {"tramo": "2", "largo": 200.0, "registros": 1, "declarado": 50.0, "cubierto": 50.0,
+         "solapado": 0.0, "sin_cubrir": 150.0, "huecos": 1, "avance": 25.0},
+    ]
+    assert avance.por_tramo()["avance"].tolist() == [100.0, 25.0]
+
+
+def test_por_tramo_sin_produccion_y_huecos(repo):
+    r = avance.por_tramo()
+    assert r["avance"].tolist() == [0.0, 0.0] and r["huecos"].tolist() == [1, 1]
+
+    repo.insertar("produccion", [produccion(inicio="20", fin="30"), produccion(inicio="60", fin="70")])
+    h = avance.huecos("T1")
+    assert h[h["tramo"] == "1"][["desde", "hasta"]].to_dict("records") == [
+        {"desde": 0.0, "hasta": 20.0}, {"desde": 30.0, "hasta": 60.0}, {"desde": 70.0, "hasta": 100.0}]
+
+
+def test_recargar_toma_ediciones_y_borrados(repo):
+    filas = repo.insertar("produccion", [produccion(inicio="0", fin="50"), produccion(inicio="50", fin="100")])
+    assert avance.por_tramo()["cubierto"].tolist() == [100.0, 0.0]
+
+    repo.actualizar("produccion", {"fin": "20"}, [("id", "eq", filas[0]["id"])])
+    repo.eliminar("produccion", [("id", "eq", filas[1]["id"])])
+    avance.recargar([f["id"] for f in filas])
+
+    assert avance.por_tramo()["cubierto"].tolist() == [20.0, 0.0]
@@ -0,0 +1,38 @@
+import catalogos
+
+T2 = {"triot": "T2", "tramo": "1", "inicio": "0", "fin": "10", "mufa_inicio": "M0", "mufa_fin": "M1"}
+
+
+def test_indice_tramos_no_queda_con_la_version_de_otra_copia(repo, monkeypatch):
+    assert list(catalogos.indice_tramos()) == ["T1"]
+    repo.insertar("tramos", T2)
+    catalogos.invalidar("tramos")
+    obtener_con_version = catalogos.obtener_con_version
+
+    def y_otro_hilo_renueva(tabla, *args):
+        # Justo después de la lectura otra sesión borra T1 y renueva el catálogo
+        leido = obtener_con_version(tabla, *args)
+        repo.eliminar("tramos", [("triot", "eq", "T1")])
+        catalogos.invalidar(tabla)
+        obtener_con_version(tabla)
+        return leido
+
+    monkeypatch.setattr(catalogos, "obtener_con_version", y_otro_hilo_renueva)
+    assert list(catalogos.indice_tramos()) == ["T1", "T2"]
+    monkeypatch.setattr(catalogos, "obtener_con_version", obtener_con_version)
+
+    # El índice armado con la copia anterior no tapa al de la nueva
+    assert list(catalogos.indice_tramos()) == ["T2"]
+
+
+def test_obtener_con_version_sirve_la_copia_vencida_ante_falla_transitoria(repo, monkeypatch):
+    df, version = catalogos.obtener_con_version("tramos")
+    catalogos.invalidar("tramos")
+
+    def falla(tabla):
+        raise TimeoutError("sin conexión")
+
+    monkeypatch.setattr(catalogos, "_descargar", falla)
+    monkeypatch.setattr(catalogos, "es_transitorio", lambda e: True)
+    vencido, misma = catalogos.obtener_con_version("tramos")
+    assert vencido is df and misma == version
@@ -0,0 +1,65 @@
+import pandas as pd
+import pytest
+import copia_local
+from paginacion import leer_dataframe
+from conftest import produccion
+
+pytest.importorskip("pyarrow")
+
+COLUMNAS = ("id, fecha, actividad, trabajador, empresa, cantidad, "
+            "valor_produccion, valor_venta, monto_produccion, triot, tramo")
+
+
+@pytest.fixture
+def copia(repo, tmp_path, monkeypatch):
+    """Copia local vacía en un directorio temporal."""
+    monkeypatch.setattr(copia_local, "COPIA_LOCAL_DIR", str(tmp_path))
+    for nombre, valor in [("_cargada", False), ("_copia", None), ("_estado", {}),
+                          ("_sincronizada", None), ("_catalogos_guardados", {})]:
+        monkeypatch.setattr(copia_local, nombre, valor)
+    return repo
+
+
+def test_sincronizar_trae_nuevas_editadas_y_borradas(copia):
+    ids = [f["id"] for f in copia.insertar("produccion", [produccion(), produccion(), produccion()])]
+    copia_local.sincronizar(forzar=True)
+    copia.actualizar("produccion", {"cantidad": 7.0}, [("id", "eq", ids[0])])
+    copia.eliminar("produccion", [("id", "eq", ids[1])])
+    nueva = copia.insertar("produccion", produccion(cantidad=3.0))[0]
+
+    assert copia_local.sincronizar(forzar=True)
+
+    df = copia_local.produccion(["id", "cantidad"])
+    assert df.to_dict("records") == [{"id": ids[0], "cantidad": 7.0},
+                                     {"id": ids[2], "cantidad": 50.0},
+                                     {"id": nueva["id"], "cantidad": 3.0}]
+
+
+def test_no_facturada_toma_lo_que_se_factura_de_la_vista(copia, monkeypatch):
+    fila = copia.insertar("produccion", produccion())[0]
+    copia_local.sincronizar(forzar=True)
+    copia.actualizar("produccion", {"cantidad": 8.0, "actividad": "MUFA"}, [("id", "eq", fila["id"])])
+    # La copia queda atrasada
+    monkeypatch.setattr(copia_local, "sincronizar", lambda *a, **k: False)
+
+    df = copia_local.produccion_no_facturada(COLUMNAS, [("empresa", "eq", "EMPRESA A")])
+
+    pd.testing.assert_frame_equal(
+        df, leer_dataframe("v_produccion_no_facturada", COLUMNAS, [("empresa", "eq", "EMPRESA A")]))
+    assert df.loc[0, "monto_produccion"] == 800.0
+
+
+def test_no_facturada_sin_seguimiento_lee_la_vista(copia, monkeypatch):
+    copia.insertar("produccion", produccion())
+    copia_local.sincronizar(forzar=True)
+    monkeypatch.setitem(copia_local._estado, "seguimiento", False)
+    monkeypatch.setattr(copia_local, "sincronizar", lambda *a, **k: False)
+    lecturas = []
+    leer = copia_local.leer_dataframe
+    monkeypatch.setattr(copia_local, "leer_dataframe",
+                        lambda tabla, columnas, *a, **k: lecturas.append(columnas) or leer(
+                            tabla, columnas, *a, **k))
+
+    copia_local.produccion_no_facturada(COLUMNAS)
+
+    assert lecturas[-1] == COLUMNAS
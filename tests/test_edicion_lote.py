@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+import edicion_lote
+from conftest import produccion
+
+
+def _gastos(repo, n):
+    return [g["id"] for g in repo.insertar("gastos", [
+        {"fecha": "2026-01-05", "empresa": "EMPRESA A", "detalle": f"G{i}", "monto": 10.0 * (i + 1),
+         "observacion": ""} for i in range(n)])]
+
+
+def test_guardar_inserta_actualiza_y_borra(repo):
+    ids = _gastos(repo, 2)
+    nuevas = pd.DataFrame([{"fecha": "2026-01-06", "empresa": "EMPRESA B", "detalle": "NUEVO",
+                            "monto": 5.0, "observacion": ""}])
+    modificadas = pd.DataFrame([{"id": ids[0], "monto": 99.0}])
+
+    creadas = edicion_lote.guardar("gastos", nuevas, modificadas, [ids[1]])
+
+    filas = {g["id"]: g for g in repo.seleccionar("gastos")}
+    assert set(filas) == {ids[0], creadas[0]["id"]}
+    assert filas[ids[0]]["monto"] == 99.0 and filas[ids[0]]["detalle"] == "G0"
+    assert filas[creadas[0]["id"]]["detalle"] == "NUEVO"
+
+
+def test_guardar_no_recrea_filas_borradas_por_otro(repo):
+    ids = _gastos(repo, 2)
+    repo.eliminar("gastos", [("id", "eq", ids[1])])
+    nuevas = pd.DataFrame([{"fecha": "2026-01-06", "empresa": "EMPRESA A", "detalle": "NUEVO",
+                            "monto": 5.0, "observacion": ""}])
+    modificadas = pd.DataFrame([{"id": ids[0], "monto": 1.0}, {"id": ids[1], "monto": 2.0}])
+
+    with pytest.raises(ValueError, match="ya no existen"):
+        edicion_lote.guardar("gastos", nuevas, modificadas, [])
+
+    # Nada del lote quedó guardado
+    assert [(g["id"], g["monto"]) for g in repo.seleccionar("gastos")] == [(ids[0], 10.0)]
+
+
+def test_guardar_no_modifica_lo_facturado(repo):
+    fila = repo.insertar("produccion", produccion())[0]
+    repo.crear_estado_pago("EMPRESA A", "2026-01-31", 500.0, 0.0, 500.0, [fila["id"]], [])
+
+    with pytest.raises(ValueError, match="estado de pago"):
+        edicion_lote.guardar("produccion", pd.DataFrame(),
+                             pd.DataFrame([{"id": fila["id"], "cantidad": 1.0}]), [])
+
+    assert repo.uno("produccion", "cantidad", [("id", "eq", fila["id"])])["cantidad"] == 50.0
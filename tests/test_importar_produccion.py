@@ -0,0 +1,22 @@
+import pandas as pd
+import importar_produccion
+from conftest import ACTIVIDADES, PERSONAL, TRAMOS
+
+
+def _validar(*fechas):
+    df = pd.DataFrame({"fecha": list(fechas), "actividad": "cable", "trabajador": "ANA",
+                       "triot": "T1", "tramo": "1", "cantidad": "10", "fila": range(1, len(fechas) + 1)})
+    return importar_produccion.validar(df.astype({"fila": str}), pd.DataFrame(ACTIVIDADES),
+                                       pd.DataFrame(PERSONAL), pd.DataFrame(TRAMOS))
+
+
+def test_validar_acepta_iso_excel_y_formato_chileno():
+    validas, errores = _validar("2025-01-13", "2025-01-13 00:00:00", "13-01-2025", "13/01/2025")
+    assert errores.empty
+    assert validas["fecha"].tolist() == ["2025-01-13"] * 4
+
+
+def test_validar_rechaza_fechas_imposibles():
+    validas, errores = _validar("2025-13-01", "31-02-2025", "01.02.2025", "2025-01-13")
+    assert validas["fecha"].tolist() == ["2025-01-13"]
+    assert errores[errores["error"].str.contains("fecha")]["fila"].tolist() == ["1", "2", "3"]
@@ -0,0 +1,25 @@
+import pytest
+import ingreso_produccion
+from conftest import produccion
+
+
+@pytest.fixture
+def sin_rerun(monkeypatch):
+    monkeypatch.setattr(ingreso_produccion, "_rerun", lambda: None)
+
+
+def test_actualizar_produccion_modifica_lo_no_facturado(repo, sin_rerun):
+    fila = repo.insertar("produccion", produccion())[0]
+
+    ingreso_produccion.actualizar_produccion(fila["id"], **produccion(fecha="2026-02-01"))
+
+    assert repo.uno("produccion", "fecha", [("id", "eq", fila["id"])])["fecha"] == "2026-02-01"
+
+
+def test_actualizar_produccion_no_toca_lo_facturado(repo, sin_rerun):
+    fila = repo.insertar("produccion", produccion())[0]
+    repo.crear_estado_pago("EMPRESA A", "2026-01-31", 500.0, 0.0, 500.0, [fila["id"]], [])
+
+    ingreso_produccion.actualizar_produccion(fila["id"], **produccion(trabajador="BETO"))
+
+    assert repo.uno("produccion", "trabajador", [("id", "eq", fila["id"])])["trabajador"] == "ANA"
@@ -0,0 +1,45 @@
+import re
+import zlib
+import pandas as pd
+import pdf_estado_pago
+
+
+def _estado(n):
+    prod = pd.DataFrame({
+        "id": range(1, n + 1), "fecha": "2026-01-05",
+        "actividad": ["CABLE", "MUFA"] * (n // 2), "trabajador": "ANA", "triot": "T1",
+        "cantidad": 50.0, "valor_produccion": 10.0, "Monto Producción": 500.0,
+    })
+    gastos = pd.DataFrame({"id": [1], "descripcion": ["ARRIENDO"], "monto": [1000.0]})
+    return ("EGTD-07", "EMPRESA A", "2026-01-31", prod, gastos,
+            500.0 * n, 1000.0, 500.0 * n - 1000.0)
+
+
+def _sin_fecha(pdf: bytes) -> bytes:
+    return re.sub(rb"/CreationDate \(D:\d+\)", b"", pdf)
+
+
+def test_generar_pdf_pagina_la_tabla_con_encabezado():
+    pdf = pdf_estado_pago.generar_pdf_bytes(*_estado(400), agrupar_por="actividad")
+
+    assert pdf.startswith(b"%PDF-") and pdf.rstrip().endswith(b"%%EOF")
+    paginas = int(re.search(rb"/Count (\d+)", pdf).group(1))
+    assert paginas > 3
+    textos = [zlib.decompress(s).decode("latin1")
+              for s in re.findall(rb"stream\r?\n(.*?)\r?\nendstream", pdf, re.S)]
+    encabezado = pdf_estado_pago._encabezado(pdf_estado_pago.COLUMNAS_PRODUCCION)
+    assert sum(encabezado in t for t in textos) >= paginas - 1
+    assert f"Página {paginas}/{paginas}" in "".join(textos)
+
+
+def test_generar_pdf_igual_al_de_fpdf_sin_acumulador(monkeypatch):
+    """_Paginas y _Acumulador solo cambian el costo, no el documento."""
+    rapido = pdf_estado_pago.generar_pdf_bytes(*_estado(400))
+
+    class Simple(pdf_estado_pago._PDFEstado):
+        def __init__(self, corr):
+            super().__init__(corr)
+            self.pages, self.buffer = {}, ""
+
+    monkeypatch.setattr(pdf_estado_pago, "_PDFEstado", Simple)
+    assert _sin_fecha(pdf_estado_pago.generar_pdf_bytes(*_estado(400))) == _sin_fecha(rapido)
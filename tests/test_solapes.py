@@ -0,0 +1,54 @@
+import pandas as pd
+import solapes
+from conftest import produccion
+
+
+def test_revisar_detecta_solape_con_lo_guardado_y_dentro_del_lote(repo):
+    guardado = repo.insertar("produccion", produccion(inicio="0", fin="50"))[0]
+    lote = pd.DataFrame([
+        {"fila": 1, "triot": "T1", "tramo": "1", "actividad": "CABLE", "inicio": "40", "fin": "80"},
+        {"fila": 2, "triot": "T1", "tramo": "1", "actividad": "CABLE", "inicio": "70", "fin": "90"},
+        {"fila": 3, "triot": "T1", "tramo": "2", "actividad": "CABLE", "inicio": "40", "fin": "80"},
+    ])
+
+    cruces = solapes.revisar(lote)
+
+    assert cruces[["fila", "contra", "metros", "exacto"]].to_dict("records") == [
+        {"fila": 1, "contra": f"id {guardado['id']}", "metros": 10.0, "exacto": False},
+        {"fila": 2, "contra": 1, "metros": 10.0, "exacto": False},
+    ]
+
+
+def test_revisar_ignora_los_ids_excluidos(repo):
+    guardado = repo.insertar("produccion", produccion(inicio="0", fin="50"))[0]
+    lote = pd.DataFrame([{"fila": 1, "triot": "T1", "tramo": "1", "actividad": "CABLE",
+                          "inicio": "0", "fin": "50"}])
+
+    assert solapes.revisar(lote, excluir=[guardado["id"]]).empty
+
+
+def test_buscar_solape_identico_y_minimo(repo):
+    ids = [f["id"] for f in repo.insertar("produccion", [
+        produccion(inicio="0", fin="50"),
+        produccion(inicio="60", fin="80"),
+        produccion(inicio="40", fin="80", actividad="MUFA"),
+    ])]
+
+    r = solapes.buscar("T1", "1", "CABLE", "40", "80")
+    assert r[["id", "metros", "exacto"]].to_dict("records") == [
+        {"id": ids[0], "metros": 10.0, "exacto": False},
+        {"id": ids[1], "metros": 20.0, "exacto": False},
+    ]
+    # Idéntico aunque venga al revés y con coma decimal
+    assert solapes.buscar("T1", "1", "CABLE", "80,0", "60")["exacto"].tolist() == [True]
+    # Menos de SOLAPE_MINIMO metros no cuenta
+    assert solapes.buscar("T1", "1", "CABLE", "49.5", "55").empty
+
+
+def test_buscar_excluye_y_ve_lo_recien_guardado(repo):
+    guardado = repo.insertar("produccion", produccion(inicio="0", fin="50"))[0]
+    assert solapes.buscar("T1", "1", "CABLE", "0", "50", excluir=[guardado["id"]]).empty
+    assert solapes.buscar("T1", "1", "CABLE", "x", "50").empty
+
+    nuevo = repo.insertar("produccion", produccion(inicio="70", fin="90"))[0]
+    assert solapes.buscar("T1", "1", "CABLE", "80", "100")["id"].tolist() == [nuevo["id"]]